@@ -6,7 +6,10 @@ import os
 import json
 import csv
 from datetime import datetime
+from utils.crop_index import CropIndex
+from utils.crop_scoring import LocationScoringEngine
 from utils.location_data import LiveLocationManager as LocationManager
+from utils.metrics import timed
 from utils.scheme_manager import SchemeManager
 from utils.weather_api import WeatherService
 from utils.yield_estimation import YieldEstimator
@@ -14,18 +17,21 @@ from utils.yield_estimation import YieldEstimator
 class AgriWiz:
     def __init__(self):
         self.crop_data = []
+        self.crop_index = CropIndex()
+        self.scoring_engine = LocationScoringEngine([])
         self.location_manager = LocationManager(openweather_api_key=os.getenv('OPENWEATHER_API_KEY'))
         self.scheme_manager = SchemeManager()
         self.weather_service = WeatherService()
         self.yield_estimator = YieldEstimator()
         self.load_crop_data()
         
-    def load_crop_data(self):
-        """Load enhanced crop data from the CSV file."""
+    def load_crop_data(self, crop_data_path=None):
+        """Load enhanced crop data from the CSV file (data/raw/crop_data.csv unless a path is given)."""
         try:
-            # Get the directory where this script is located
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            crop_data_path = os.path.join(script_dir, "data", "raw", "crop_data.csv")
+            if crop_data_path is None:
+                # Get the directory where this script is located
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+                crop_data_path = os.path.join(script_dir, "data", "raw", "crop_data.csv")
             
             if os.path.exists(crop_data_path):
                 with open(crop_data_path, "r") as file:
@@ -40,6 +46,8 @@ class AgriWiz:
             print(f"Error loading crop data: {e}")
             print("Creating sample data instead...")
             self.create_sample_data()
+        self.crop_index = CropIndex(self.crop_data)
+        self.scoring_engine = LocationScoringEngine(self.crop_data)
 
     def create_sample_data(self):
         """Create sample crop data if no data file exists."""
@@ -78,11 +86,11 @@ class AgriWiz:
         ]
         self.save_crop_data()
     
-    def save_crop_data(self):
+    def save_crop_data(self, crop_data_path="data/raw/crop_data.csv"):
         """Save crop data to CSV file."""
         try:
-            os.makedirs("data/raw", exist_ok=True)
-            with open("data/raw/crop_data.csv", "w", newline="") as file:
+            os.makedirs(os.path.dirname(crop_data_path) or ".", exist_ok=True)
+            with open(crop_data_path, "w", newline="") as file:
                 fieldnames = ["crop_name", "soil_types", "climates", "seasons", "water_needs", 
                              "humidity_preference", "soil_fertility"]
                 writer = csv.DictWriter(file, fieldnames=fieldnames)
@@ -95,78 +103,49 @@ class AgriWiz:
     def add_crop(self, crop_data):
         """Add a new crop to the database."""
         self.crop_data.append(crop_data)
+        self.crop_index.add(crop_data)
+        self.scoring_engine = LocationScoringEngine(self.crop_data)
         self.save_crop_data()
+        self.yield_estimator.invalidate_known_crops()
         print(f"Added {crop_data['crop_name']} to the database.")
     
+    @timed("criteria_scoring")
     def get_recommendations(self, soil_type, climate, season, rainfall=None, humidity=None, soil_fertility=None, 
                           soil_ph=None, temperature=None, water_availability=None):
         """Enhanced get recommendations with additional parameters."""
-        recommendations = []
-        scored_recommendations = []
+        index = self.crop_index
         
-        for crop in self.crop_data:
-            score = 0
-            max_score = 0
-            
-            # Core parameters (required matches) - 3 points each
-            if any(s.strip().lower() == soil_type.lower() for s in crop["soil_types"].split(",")):
-                score += 3
-            max_score += 3
-            
-            if any(c.strip().lower() == climate.lower() for c in crop["climates"].split(",")):
-                score += 3
-            max_score += 3
-            
-            if any(s.strip().lower() == season.lower() for s in crop["seasons"].split(",")):
-                score += 3
-            max_score += 3
-            
-            # Optional parameters - 2 points each
-            if humidity and "humidity_preference" in crop:
-                max_score += 2
-                if any(h.strip().lower() == humidity.lower() for h in crop["humidity_preference"].split(",")):
-                    score += 2
-            
-            if soil_fertility and "soil_fertility" in crop:
-                max_score += 2
-                if any(f.strip().lower() == soil_fertility.lower() for f in crop["soil_fertility"].split(",")):
-                    score += 2
-            
-            # Advanced parameters - 1 point each
-            if soil_ph and "ph_range" in crop:
-                max_score += 1
-                try:
-                    ph_min, ph_max = map(float, crop["ph_range"].split("-"))
-                    if ph_min <= float(soil_ph) <= ph_max:
-                        score += 1
-                except (ValueError, AttributeError):
-                    pass
-            
-            if temperature and "temperature_range" in crop:
-                max_score += 1
-                try:
-                    temp_min, temp_max = map(float, crop["temperature_range"].split("-"))
-                    if temp_min <= float(temperature) <= temp_max:
-                        score += 1
-                except (ValueError, AttributeError):
-                    pass
-            
-            # Calculate match percentage
-            match_percentage = (score / max_score * 100) if max_score > 0 else 0
-            
-            if match_percentage >= 60:  # Include crops with at least 60% match
-                crop_info = {
-                    "crop": crop,
-                    "match_percentage": match_percentage,
-                    "score_details": {
-                        "total_score": score,
-                        "max_possible": max_score
-                    }
-                }
-                scored_recommendations.append(crop_info)
+        # Core parameters (required matches) - 3 points each
+        criteria = [
+            (3, index.mask("soil_types", soil_type), index.all_mask),
+            (3, index.mask("climates", climate), index.all_mask),
+            (3, index.mask("seasons", season), index.all_mask),
+        ]
+        
+        # Optional parameters - 2 points each
+        if humidity:
+            criteria.append((2, index.mask("humidity_preference", humidity), index.present("humidity_preference")))
+        if soil_fertility:
+            criteria.append((2, index.mask("soil_fertility", soil_fertility), index.present("soil_fertility")))
         
-        # Sort by match percentage and extract crop data
-        scored_recommendations.sort(key=lambda x: x["match_percentage"], reverse=True)
+        # Advanced parameters - 1 point each
+        if soil_ph:
+            criteria.append((1, index.range_mask("ph_range", soil_ph), index.present("ph_range")))
+        if temperature:
+            criteria.append((1, index.range_mask("temperature_range", temperature), index.present("temperature_range")))
+        
+        # Include crops with at least 60% match, best match first
+        scored_recommendations = [
+            {
+                "crop": index.crops[i],
+                "match_percentage": match_percentage,
+                "score_details": {
+                    "total_score": score,
+                    "max_possible": max_score
+                }
+            }
+            for i, match_percentage, score, max_score in index.score(criteria, 60)
+        ]
         recommendations = [item["crop"] for item in scored_recommendations]
         
         return recommendations, scored_recommendations
@@ -182,6 +161,61 @@ class AgriWiz:
         # Get weather forecast
         weather_forecast = self.weather_service.get_weather_forecast(location_name)
         
+        query, details = self._location_query(location_info, weather_forecast, humidity, soil_fertility, temperature)
+        
+        # Score the whole catalog against the location in one pass
+        recommendations = [crop for crop, _ in self.scoring_engine.score(*query)]
+        
+        return recommendations, details
+
+    def get_recommendations_for_locations(self, queries):
+        """
+        Location-based recommendations for many locations in one call.
+        
+        Args:
+            queries: List of dicts with a "location" key and optional "humidity",
+                "soil_fertility" and "temperature" overrides
+        
+        Returns:
+            Dictionary mapping each location to the (recommendations, details)
+            tuple get_recommendations_by_location would return for it
+        """
+        results = {}
+        location_infos = {}
+        for query in queries:
+            location_name = query["location"]
+            location_info = self.location_manager.get_location_info(location_name)
+            if location_info:
+                location_infos[location_name] = location_info
+            else:
+                results[location_name] = (None, "Location information not found.")
+        
+        # Fetch forecasts for the distinct locations concurrently
+        forecasts = self.weather_service.get_weather_forecasts(location_infos) if location_infos else {}
+        
+        pending = []
+        for query in queries:
+            location_name = query["location"]
+            if location_name not in location_infos:
+                continue
+            location_query, details = self._location_query(
+                location_infos[location_name],
+                forecasts.get(location_name),
+                query.get("humidity"),
+                query.get("soil_fertility"),
+                query.get("temperature")
+            )
+            pending.append((location_name, location_query, details))
+        
+        # Score every location against the catalog in one vectorized pass
+        scored = self.scoring_engine.score_batch([location_query for _, location_query, _ in pending])
+        for (location_name, _, details), scored_recommendations in zip(pending, scored):
+            results[location_name] = ([crop for crop, _ in scored_recommendations], details)
+        
+        return results
+
+    def _location_query(self, location_info, weather_forecast, humidity=None, soil_fertility=None, temperature=None):
+        """Resolve season, humidity and rainfall for a location into a scoring query and display details."""
         # Get current season for location
         current_month = datetime.now().strftime("%B").lower()
         current_season = None
@@ -194,8 +228,6 @@ class AgriWiz:
         if not current_season:
             current_season = "summer"  # Default to summer if season not found
         
-        # Get recommendations based on location data
-        soil_type = location_info["common_soil_types"][0] if location_info["common_soil_types"] else "loamy"
         climate = location_info["climate"]
         rainfall = location_info["rainfall"]
         
@@ -216,60 +248,8 @@ class AgriWiz:
         location_humidity = location_info.get("humidity", None)
         if humidity is None and location_humidity:
             humidity = location_humidity
-            
-        recommendations = []
-        scored_recommendations = []
         
-        for crop in self.crop_data:
-            score = 0
-            max_score = 0
-            
-            # Check soil type compatibility
-            crop_soils = [s.strip() for s in crop["soil_types"].split(",")]
-            if any(soil in crop_soils for soil in location_info["common_soil_types"]):
-                score += 2
-            max_score += 2
-            
-            # Check climate compatibility
-            crop_climates = [c.strip() for c in crop["climates"].split(",")]
-            if climate in crop_climates:
-                score += 3
-            elif any(c in ["subtropical", "temperate"] for c in crop_climates):
-                score += 1
-            max_score += 3
-            
-            # Check season suitability
-            crop_seasons = [s.strip() for s in crop["seasons"].split(",")]
-            if current_season in crop_seasons:
-                score += 2
-            max_score += 2
-            
-            # Check humidity preference if available
-            if humidity and "humidity_preference" in crop:
-                crop_humidity = [h.strip() for h in crop["humidity_preference"].split(",")]
-                if humidity in crop_humidity:
-                    score += 1
-                max_score += 1
-            
-            # Check soil fertility if available
-            if soil_fertility and "soil_fertility" in crop:
-                crop_fertility = [f.strip() for f in crop["soil_fertility"].split(",")]
-                if soil_fertility in crop_fertility:
-                    score += 1
-                max_score += 1
-            
-            # Calculate match percentage
-            match_percentage = (score / max_score * 100) if max_score > 0 else 0
-            
-            if match_percentage >= 40:  # Only include crops with at least 40% match
-                scored_recommendations.append({
-                    "crop": crop,
-                    "match_percentage": match_percentage
-                })
-        
-        # Sort by match percentage and extract crop data
-        scored_recommendations.sort(key=lambda x: x["match_percentage"], reverse=True)
-        recommendations = [item["crop"] for item in scored_recommendations]
+        query = (location_info["common_soil_types"], climate, current_season, humidity, soil_fertility)
         
         # Prepare location details for display
         details = {
@@ -281,7 +261,7 @@ class AgriWiz:
             "soil_fertility": soil_fertility
         }
         
-        return recommendations, details
+        return query, details
 
     def get_schemes_for_crop(self, crop_name: str, state: str, land_area: float = 0.0) -> dict:
         """Get government schemes and subsidies relevant to a specific crop."""
@@ -307,26 +287,26 @@ class AgriWiz:
 
     def get_crop_details(self, crop_name):
         """Get detailed information about a specific crop."""
-        for crop in self.crop_data:
-            if crop["crop_name"].lower() == crop_name.lower():
-                return {
-                    "name": crop["crop_name"],
-                    "growing_period": crop.get("growing_period_days", "N/A"),
-                    "yield_potential": crop.get("yield_potential_qt_per_ha", "N/A"),
-                    "major_nutrients": crop.get("major_nutrients_required", "N/A"),
-                    "pest_resistance": crop.get("pest_resistance", "N/A"),
-                    "disease_resistance": crop.get("disease_resistance", "N/A"),
-                    "market_demand": crop.get("market_demand", "N/A"),
-                    "soil_types": crop["soil_types"],
-                    "climates": crop["climates"],
-                    "seasons": crop["seasons"],
-                    "water_needs": crop["water_needs"],
-                    "humidity_preference": crop.get("humidity_preference", "N/A"),
-                    "soil_fertility": crop.get("soil_fertility", "N/A"),
-                    "ph_range": crop.get("ph_range", "N/A"),
-                    "temperature_range": crop.get("temperature_range", "N/A"),
-                    "rainfall_range": crop.get("rainfall_range_mm", "N/A")
-                }
+        crop = self.crop_index.find(crop_name)
+        if crop is not None:
+            return {
+                "name": crop["crop_name"],
+                "growing_period": crop.get("growing_period_days", "N/A"),
+                "yield_potential": crop.get("yield_potential_qt_per_ha", "N/A"),
+                "major_nutrients": crop.get("major_nutrients_required", "N/A"),
+                "pest_resistance": crop.get("pest_resistance", "N/A"),
+                "disease_resistance": crop.get("disease_resistance", "N/A"),
+                "market_demand": crop.get("market_demand", "N/A"),
+                "soil_types": crop["soil_types"],
+                "climates": crop["climates"],
+                "seasons": crop["seasons"],
+                "water_needs": crop["water_needs"],
+                "humidity_preference": crop.get("humidity_preference", "N/A"),
+                "soil_fertility": crop.get("soil_fertility", "N/A"),
+                "ph_range": crop.get("ph_range", "N/A"),
+                "temperature_range": crop.get("temperature_range", "N/A"),
+                "rainfall_range": crop.get("rainfall_range_mm", "N/A")
+            }
         return None
 
     def get_crop_calendar(self, location_name):
@@ -368,15 +348,12 @@ class AgriWiz:
         pass
 
 # CLI mode
-agri_wiz = AgriWiz()
-
-print("\n" + "="*50)
-print("🌱 Welcome to Agri Wiz - Crop Recommendation System 🌱")
-print("="*50)
-print("\nTip: Run with --gui argument to use the graphical interface")
-
-agri_wiz.main_menu()
-
 if __name__ == "__main__":
     agri_wiz = AgriWiz()
-    agri_wiz.main_menu()
\ No newline at end of file
+
+    print("\n" + "="*50)
+    print("🌱 Welcome to Agri Wiz - Crop Recommendation System 🌱")
+    print("="*50)
+    print("\nTip: Run with --gui argument to use the graphical interface")
+
+    agri_wiz.main_menu()
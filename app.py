@@ -1,9 +1,8 @@
 # REST API Server for Agri Wiz
 from flask import Flask, request, jsonify # type: ignore
 from flask_cors import CORS # type: ignore
-from agri_wiz import AgriWiz
-from utils.weather_api import WeatherAPI
-from utils.location_data import LiveLocationManager as LocationManager
+import app_context
+from utils import metrics, traffic
 import logging
 import os
 from dotenv import load_dotenv
@@ -32,6 +31,7 @@ from routes.health import health_bp
 from routes.crops import crops_bp
 from routes.weather import weather_bp
 from routes.yield_routes import yield_routes_bp
+from routes.metrics import metrics_bp
 
 
 # Configure logging
@@ -41,6 +41,15 @@ logging.basicConfig(
 
 app = Flask(__name__)
 
+# One shared AgriWiz context for every blueprint, built on first use
+app_context.init_app(app)
+
+# Append a sanitized record of every request to a JSONL log when TRAFFIC_CAPTURE=1
+traffic.init_app(app)
+
+# Per-endpoint and per-stage latency, served at /api/metrics
+metrics.init_app(app)
+
 # Configure Flask app from environment variables
 app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'False').lower() in ('true', '1', 'yes')
 app.config['ENV'] = os.getenv('FLASK_ENV', 'production')
@@ -66,11 +75,7 @@ app.register_blueprint(health_bp)
 app.register_blueprint(crops_bp)
 app.register_blueprint(weather_bp)
 app.register_blueprint(yield_routes_bp)
-
-print("something")
-
-agri_wiz = AgriWiz()
-weather_api = WeatherAPI()
+app.register_blueprint(metrics_bp)
 
 @app.after_request
 def after_request(response):
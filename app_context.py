@@ -0,0 +1,62 @@
+# Shared application context for the Agri Wiz API
+# One lazily built AgriWiz (and the services it owns) per Flask app,
+# shared by every blueprint instead of one instance per route module.
+
+import threading
+from flask import current_app # type: ignore
+
+EXTENSION_KEY = "agri_wiz"
+
+
+class AppContext:
+    """Lazily builds and holds the services shared by all blueprints."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agri_wiz = None
+        self._weather_api = None
+
+    @property
+    def agri_wiz(self):
+        """The shared AgriWiz instance, built on first use."""
+        if self._agri_wiz is None:
+            with self._lock:
+                if self._agri_wiz is None:
+                    from agri_wiz import AgriWiz
+                    self._agri_wiz = AgriWiz()
+        return self._agri_wiz
+
+    @property
+    def weather_api(self):
+        """The shared WeatherAPI instance, built on first use."""
+        if self._weather_api is None:
+            with self._lock:
+                if self._weather_api is None:
+                    from utils.weather_api import WeatherAPI
+                    self._weather_api = WeatherAPI()
+        return self._weather_api
+
+    @property
+    def location_manager(self):
+        return self.agri_wiz.location_manager
+
+    @property
+    def weather_service(self):
+        return self.agri_wiz.weather_service
+
+    @property
+    def yield_estimator(self):
+        return self.agri_wiz.yield_estimator
+
+
+def init_app(app):
+    """Attach a fresh AppContext to a Flask app."""
+    context = AppContext()
+    app.extensions[EXTENSION_KEY] = context
+    return context
+
+
+def get_context(app=None) -> AppContext:
+    """Return the AppContext of the given app, or of the app handling the current request."""
+    app = app or current_app
+    return app.extensions[EXTENSION_KEY]
@@ -0,0 +1,6 @@
+"""
+Benchmarking tools for Agri Wiz backend.
+
+This package contains a local stand-in for the upstream weather, soil and
+geolocation services, so the backend can be exercised without network access.
+"""
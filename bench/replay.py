@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# Traffic Replay for Agri Wiz
+# Plays a captured traffic log against the API and reports latency, throughput and errors per endpoint
+
+import sys
+import time
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import requests
+
+from utils.traffic import CAPTURE_PATH, read_log
+
+DEFAULT_BASE_URL = "http://127.0.0.1:5000"
+DEFAULT_CONCURRENCY = 8
+TIMEOUT = 30  # seconds per request
+
+# Statuses counted as errors; 4xx are the client's doing and reported separately
+ERROR_STATUS = 500
+
+
+def endpoint_of(record: Dict) -> str:
+    """Grouping key of a record: method and matched route, e.g. "GET /api/weather/<location>"."""
+    return f"{record.get('method', 'GET')} {record.get('endpoint') or record.get('path')}"
+
+
+def http_sender(base_url: str = DEFAULT_BASE_URL, timeout: float = TIMEOUT) -> Callable[[Dict], int]:
+    """Sends records to a running server over HTTP, one keep-alive session per worker thread."""
+    local = threading.local()
+
+    def send(record: Dict) -> int:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        response = session.request(record.get("method", "GET"), base_url.rstrip("/") + record["path"],
+                                   params=record.get("query"), json=record.get("body"), timeout=timeout)
+        return response.status_code
+    return send
+
+
+def app_sender(app) -> Callable[[Dict], int]:
+    """Sends records straight to a Flask app in this process, without a server or sockets."""
+    local = threading.local()
+
+    def send(record: Dict) -> int:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        response = client.open(record["path"], method=record.get("method", "GET"),
+                               query_string=record.get("query"), json=record.get("body"))
+        return response.status_code
+    return send
+
+
+def replay(records: Iterable[Dict], send: Callable[[Dict], int], rate: float = 0.0,
+           concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, dict]:
+    """
+    Play records back and measure every request.
+
+    Args:
+        records: Captured request records, in the order to send them
+        send: Sends one record and returns the response status
+        rate: Requests started per second; 0 sends as fast as the concurrency allows
+        concurrency: Most requests in flight at once; when all are busy the
+            schedule waits, so a server slower than the rate caps throughput
+
+    Returns:
+        Per-endpoint report (see summarize), with an "ALL" entry for the whole run
+    """
+    samples = defaultdict(list)  # endpoint -> [(latency seconds, status or None)]
+    slots = threading.Semaphore(concurrency)
+    lock = threading.Lock()
+
+    def run_one(record):
+        start = time.perf_counter()
+        try:
+            status = send(record)
+        except Exception:
+            status = None  # connection error or timeout
+        elapsed = time.perf_counter() - start
+        with lock:
+            samples[endpoint_of(record)].append((elapsed, status))
+        slots.release()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i, record in enumerate(records):
+            if rate:
+                delay = started + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            slots.acquire()
+            executor.submit(run_one, record)
+    duration = time.perf_counter() - started
+
+    report = {endpoint: summarize(endpoint_samples, duration) for endpoint, endpoint_samples in sorted(samples.items())}
+    report["ALL"] = summarize([sample for endpoint_samples in samples.values() for sample in endpoint_samples], duration)
+    return report
+
+
+def summarize(samples: List[tuple], duration: float) -> dict:
+    """Request count, throughput, error and client error rates and latency percentiles of (latency, status) samples."""
+    latencies = np.array([latency for latency, _ in samples]) * 1000 if samples else np.zeros(1)
+    errors = sum(status is None or status >= ERROR_STATUS for _, status in samples)
+    client_errors = sum(status is not None and 400 <= status < ERROR_STATUS for _, status in samples)
+    count = len(samples)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": count,
+        "throughput_rps": round(count / duration, 2) if duration else 0.0,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "client_error_rate": round(client_errors / count, 4) if count else 0.0,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+    }
+
+
+def format_report(report: Dict[str, dict]) -> str:
+    lines = [f"{'endpoint':<48}{'requests':>9}{'req/s':>9}{'errors':>8}{'4xx':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+    for endpoint, row in report.items():
+        lines.append(f"{endpoint:<48}{row['requests']:>9}{row['throughput_rps']:>9.1f}{row['error_rate']:>8.1%}"
+                     f"{row['client_error_rate']:>7.1%}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay captured Agri Wiz API traffic")
+    parser.add_argument("log", nargs="?", default=CAPTURE_PATH, help="Traffic log written with TRAFFIC_CAPTURE=1")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Server to send the requests to")
+    parser.add_argument("--in-process", action="store_true", help="Send to the Flask app in this process instead")
+    parser.add_argument("--rate", type=float, default=0.0, help="Requests per second; 0 is as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Most requests in flight")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to play the log")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="Seconds per request")
+
+    args = parser.parse_args(argv)
+    records = read_log(args.log)
+    if not records:
+        parser.error(f"No requests in {args.log}")
+    if args.in_process:
+        from app import app
+        send = app_sender(app)
+    else:
+        send = http_sender(args.base_url, args.timeout)
+    report = replay(records * args.repeat, send, args.rate, args.concurrency)
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,447 @@
+#!/usr/bin/env python
+# Benchmark Suite for Agri Wiz
+# Hot-path throughput and memory at 1x, 10x and 100x synthetic catalogs, checked against stored baselines
+
+import gc
+import io
+import os
+import csv
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from agri_wiz import AgriWiz
+from utils.cache_store import CacheStore
+from utils.scheme_manager import SchemeManager
+from utils.yield_estimation import YieldEstimator
+
+CROP_DATA_PATH = "data/raw/crop_data.csv"
+SCHEMES_PATH = "data/raw/agricultural_schemes.json"
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+DEFAULT_SCALES = (1, 10, 100)
+MIN_TIME = 0.2  # seconds each timing round runs for
+ROUNDS = 3  # timing rounds per benchmark; the fastest is kept
+THRESHOLD = 0.3  # BENCH_THRESHOLD, largest allowed slowdown or memory growth as a fraction of the baseline
+MEMORY_SLACK_KB = 16  # growth always allowed, so tiny peaks do not fail on allocator noise
+CONFIRM_RUNS = 2  # re-measurements of an apparent regression before it counts
+UPDATE_RUNS = 3  # passes whose median becomes the stored baseline
+SAVE_BATCH = 100  # cache entries written and flushed per cache_save call
+
+# Catalog fields varied between synthetic crops
+VARIED_FIELDS = ("soil_types", "climates", "seasons")
+LOCATION = "punjab"
+STATE = "punjab"
+
+
+class Result(NamedTuple):
+    name: str
+    scale: int
+    ops_per_sec: float
+    peak_kb: float
+    calibration: float  # calibration speed measured just before, see calibrate()
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.scale}x]"
+
+
+def synthetic_crops(scale: int, seed: int = 0) -> List[Dict]:
+    """The shipped crop catalog followed by (scale - 1) x as many variations of it."""
+    with open(CROP_DATA_PATH, "r") as f:
+        base = list(csv.DictReader(f))
+    vocabulary = {field: sorted({value.strip() for crop in base for value in crop[field].split(",")})
+                  for field in VARIED_FIELDS}
+    rng = random.Random(seed)
+    crops = [dict(crop) for crop in base]
+    for i in range(len(base) * (scale - 1)):
+        template = base[i % len(base)]
+        crop = dict(template, crop_name=f"{template['crop_name']} {i // len(base) + 2}")
+        for field in VARIED_FIELDS:
+            values = vocabulary[field]
+            crop[field] = ",".join(rng.sample(values, rng.randint(1, min(3, len(values)))))
+        crops.append(crop)
+    return crops
+
+
+def synthetic_schemes(scale: int) -> Dict:
+    """The shipped scheme catalog with every national and state scheme repeated scale times."""
+    with open(SCHEMES_PATH, "r") as f:
+        data = json.load(f)
+
+    def repeat(schemes):
+        return list(schemes) + [{**scheme, "name": f"{scheme['name']} {k}"}
+                                for k in range(2, scale + 1) for scheme in schemes]
+
+    data["schemes"] = repeat(data.get("schemes", []))
+    data["state_specific_schemes"] = {state: repeat(schemes)
+                                      for state, schemes in data.get("state_specific_schemes", {}).items()}
+    return data
+
+
+class Workload:
+    """An AgriWiz instance and its dependencies loaded with catalogs of one scale, in a scratch directory."""
+
+    def __init__(self, scale: int, workdir: str, yield_estimator: Optional[YieldEstimator] = None):
+        self.scale = scale
+        self.workdir = workdir
+        self.crop_path = os.path.join(workdir, f"crop_data_{scale}x.csv")
+        self.schemes_path = os.path.join(workdir, f"schemes_{scale}x.json")
+
+        crops = synthetic_crops(scale)
+        with open(self.crop_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(crops[0]))
+            writer.writeheader()
+            writer.writerows(crops)
+        schemes = synthetic_schemes(scale)
+        with open(self.schemes_path, "w") as f:
+            json.dump(schemes, f)
+        state_schemes = schemes["state_specific_schemes"].get(STATE) or schemes["schemes"]
+        self.last_scheme = state_schemes[-1]["name"]
+
+        self.agri = AgriWiz()
+        self.agri.load_crop_data(self.crop_path)
+        self.agri.scheme_manager = SchemeManager(self.schemes_path)
+
+        # A cached forecast, so location lookups measure scoring rather than the network
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.agri.weather_service.cache.set(f"{LOCATION}_{today}", {
+            "daily_forecasts": [], "averages": {"temperature": 24.0, "humidity": 65.0, "rainfall": 1.2},
+        }, ttl=24 * 3600)
+
+        self.yield_estimator = yield_estimator
+        self.cache_entries = 1000 * scale
+        self.cache_store = CacheStore(os.path.join(workdir, f"bench_cache_{scale}x.db"), "bench")
+        for i in range(self.cache_entries):
+            self.cache_store.set(f"key-{i}", {"temperature": 20 + i % 15, "humidity": 60}, ttl=3600)
+        self.cache_store.flush()
+
+
+def _yield_estimator(workdir: str) -> YieldEstimator:
+    estimator = YieldEstimator(model_dir=os.path.join(workdir, "models"), prediction_cache_size=0)
+    estimator.train_all(["rice"], n_samples=500, n_estimators=50, workers=1)
+    estimator.compile_models(["rice"])
+    return estimator
+
+
+def _conditions(n: int) -> List[Dict]:
+    rng = random.Random(1)
+    return [{"temperature": rng.uniform(18, 34), "rainfall": rng.uniform(400, 1600), "humidity": rng.uniform(40, 90),
+             "soil_ph": rng.uniform(5.5, 7.5), "soil_fertility": rng.choice(["low", "medium", "high"]),
+             "water_availability": rng.choice(["low", "medium", "high"]), "season": rng.choice(["summer", "winter"])}
+            for _ in range(n)]
+
+
+def _cycle(fn: Callable, args: List) -> Callable[[], object]:
+    """A no-argument op calling fn with each of args in turn."""
+    state = {"i": 0}
+
+    def op():
+        i = state["i"]
+        state["i"] = (i + 1) % len(args)
+        return fn(args[i])
+    return op
+
+
+# Benchmark builders: each returns a no-argument op to time against a workload
+def _recommendations(w: Workload):
+    return lambda: w.agri.get_recommendations("Loamy", "Tropical", "Kharif", humidity="70-80%", soil_fertility="High",
+                                              soil_ph=6.5, temperature=28)
+
+
+def _recommendations_by_location(w: Workload):
+    return lambda: w.agri.get_recommendations_by_location(LOCATION)
+
+
+def _crop_calendar(w: Workload):
+    return lambda: w.agri.get_crop_calendar(LOCATION)
+
+
+def _crop_catalog_load(w: Workload):
+    return lambda: w.agri.load_crop_data(w.crop_path)
+
+
+def _crop_catalog_save(w: Workload):
+    path = os.path.join(w.workdir, "saved_crop_data.csv")
+    return lambda: w.agri.save_crop_data(path)
+
+
+def _schemes_for_crop(w: Workload):
+    return lambda: w.agri.get_schemes_for_crop("Rice", STATE)
+
+
+def _scheme_details(w: Workload):
+    return lambda: w.agri.scheme_manager.get_scheme_details(w.last_scheme)
+
+
+def _eligible_schemes(w: Workload):
+    farmer = {"state": STATE, "land_ownership": True, "has_bank_account": True}
+    return lambda: w.agri.scheme_manager.get_eligible_schemes(farmer)
+
+
+def _schemes_load(w: Workload):
+    return w.agri.scheme_manager.load_schemes
+
+
+def _yield_predict(w: Workload):
+    estimator = w.yield_estimator
+    return _cycle(lambda conditions: estimator.predict_yield("rice", conditions), _conditions(64))
+
+
+def _yield_batch(w: Workload):
+    estimator, rows = w.yield_estimator, _conditions(10 * w.scale)
+    return lambda: estimator.predict_yield_batch("rice", rows)
+
+
+def _cache_get(w: Workload):
+    store = w.cache_store
+    return _cycle(store.get, [f"key-{i}" for i in range(0, w.cache_entries, 7)])
+
+
+def _cache_save(w: Workload):
+    store = w.cache_store
+    value = {"temperature": 28.5, "humidity": 65, "rainfall": 0.5, "description": "Partly cloudy"}
+
+    def save(batch):
+        for key in batch:
+            store.set(key, value, ttl=3600)
+        store.flush()
+    keys = [f"new-{i}" for i in range(w.cache_entries)]
+    return _cycle(save, [keys[i:i + SAVE_BATCH] for i in range(0, len(keys), SAVE_BATCH)])
+
+
+# Name -> (builder, whether the benchmark depends on the catalog scale)
+BENCHMARKS = {
+    "recommendations": (_recommendations, True),
+    "recommendations_by_location": (_recommendations_by_location, True),
+    "crop_calendar": (_crop_calendar, True),
+    "crop_catalog_load": (_crop_catalog_load, True),
+    "crop_catalog_save": (_crop_catalog_save, True),
+    "schemes_for_crop": (_schemes_for_crop, True),
+    "scheme_details": (_scheme_details, True),
+    "eligible_schemes": (_eligible_schemes, True),
+    "schemes_load": (_schemes_load, True),
+    "yield_predict": (_yield_predict, False),
+    "yield_batch": (_yield_batch, True),
+    "cache_get": (_cache_get, True),
+    "cache_save": (_cache_save, True),
+}
+
+
+def measure(op: Callable[[], object], min_time: float = MIN_TIME, rounds: int = ROUNDS):
+    """
+    Throughput and peak memory of an op.
+
+    Returns:
+        (calls per second in the fastest round, peak KB allocated during one call)
+    """
+    op()  # warm-up: lazy loads and first-call caches
+    best = 0.0
+    # Like timeit, keep collection pauses out of the timings
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            calls = 0
+            start = time.perf_counter()
+            while True:
+                op()
+                calls += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_time:
+                    break
+            best = max(best, calls / elapsed)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    tracemalloc.start()
+    try:
+        op()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024
+
+
+@contextlib.contextmanager
+def _environ(**values):
+    """Set environment variables for the duration of a block."""
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def calibrate(min_time: float = MIN_TIME, rounds: int = ROUNDS) -> float:
+    """Calls per second of a fixed pure-Python workload: how fast this machine is running right now.
+
+    CPU boost, throttling and noisy neighbours change a machine's speed from
+    minute to minute, so every benchmark is compared relative to a
+    calibration measured just before it.
+    """
+    return measure(lambda: sorted(str(i * 7919 % 1000) for i in range(1000)), min_time, rounds)[0]
+
+
+def run(scales=DEFAULT_SCALES, names: Optional[List[str]] = None, min_time: float = MIN_TIME,
+        rounds: int = ROUNDS) -> List[Result]:
+    """Run the selected benchmarks at every scale; scale-independent ones run once, at the smallest."""
+    names = names or list(BENCHMARKS)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, _environ(WEATHER_CACHE_DB=os.path.join(workdir, "weather_cache.db"),
+                                                           WEATHER_REFRESH_TOP_N="0"):
+        # The environment keeps the benchmark's caches and threads away from the real ones
+        yield_estimator = None
+        # The load/save paths print a line per call
+        with contextlib.redirect_stdout(io.StringIO()):
+            if any(name.startswith("yield_") for name in names):
+                yield_estimator = _yield_estimator(workdir)
+        for scale in sorted(scales):
+            with contextlib.redirect_stdout(io.StringIO()):
+                workload = Workload(scale, workdir, yield_estimator)
+
+            for name in names:
+                build, scaled = BENCHMARKS[name]
+                if not scaled and scale != min(scales):
+                    continue
+                op = build(workload)
+                calibration = calibrate(min_time, rounds)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ops_per_sec, peak_kb = measure(op, min_time, rounds)
+                results.append(Result(name, scale if scaled else 1, round(ops_per_sec, 1), round(peak_kb, 1),
+                                      round(calibration, 1)))
+    return results
+
+
+def load_baselines(path: str = BASELINE_PATH) -> Dict[str, Dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def save_baselines(results: List[Result], path: str = BASELINE_PATH):
+    """Store results as the new baselines, keeping baselines of benchmarks that were not run."""
+    stored = load_baselines(path)
+    stored.update({result.key: {"ops_per_sec": result.ops_per_sec, "peak_kb": result.peak_kb,
+                                "calibration": result.calibration} for result in results})
+    with open(path, "w") as f:
+        json.dump({"python": sys.version.split()[0], "updated": datetime.now().strftime("%Y-%m-%d"),
+                   "results": dict(sorted(stored.items()))}, f, indent=4)
+        f.write("\n")
+
+
+def median_result(samples: Iterable[Result]) -> Result:
+    """The sample with the median throughput relative to its calibration."""
+    samples = sorted(samples, key=lambda r: r.ops_per_sec / r.calibration)
+    return samples[len(samples) // 2]
+
+
+def expected_ops(result: Result, baseline: Dict) -> float:
+    """The baseline throughput scaled by how fast the machine ran then and now."""
+    return baseline["ops_per_sec"] * result.calibration / baseline["calibration"]
+
+
+def regressions(result: Result, baseline: Optional[Dict], threshold: float = THRESHOLD) -> List[str]:
+    """
+    How a result regressed against its baseline.
+
+    Returns:
+        A message for a slowdown and for memory growth beyond the threshold; empty if neither
+    """
+    if baseline is None:
+        return []
+    messages = []
+    expected = expected_ops(result, baseline)
+    if result.ops_per_sec < expected * (1 - threshold):
+        messages.append(f"{result.key}: {result.ops_per_sec:,.1f} ops/sec, expected {expected:,.1f}")
+    if result.peak_kb > baseline["peak_kb"] * (1 + threshold) + MEMORY_SLACK_KB:
+        messages.append(f"{result.key}: {result.peak_kb:,.1f} KB peak, baseline {baseline['peak_kb']:,.1f}")
+    return messages
+
+
+def confirm(results: List[Result], stored: Dict[str, Dict], threshold: float = THRESHOLD,
+            min_time: float = MIN_TIME, rounds: int = ROUNDS) -> List[Result]:
+    """Re-measure apparent regressions, keeping each benchmark's best relative throughput and smallest peak."""
+    for _ in range(CONFIRM_RUNS):
+        suspects = [result for result in results if regressions(result, stored.get(result.key), threshold)]
+        if not suspects:
+            break
+        remeasured = {}
+        for scale in sorted({result.scale for result in suspects}):
+            names = [result.name for result in suspects if result.scale == scale]
+            remeasured.update((result.key, result) for result in run([scale], names, min_time, rounds))
+        results = [
+            max(result, remeasured[result.key], key=lambda r: r.ops_per_sec / r.calibration)._replace(
+                peak_kb=min(result.peak_kb, remeasured[result.key].peak_kb))
+            if result.key in remeasured else result
+            for result in results
+        ]
+    return results
+
+
+def report(results: List[Result], stored: Dict[str, Dict]) -> str:
+    lines = [f"{'benchmark':<36}{'ops/sec':>14}{'expected':>14}{'change':>9}{'peak KB':>11}"]
+    for result in results:
+        baseline = stored.get(result.key)
+        if baseline:
+            expected = expected_ops(result, baseline)
+            change = f"{(result.ops_per_sec / expected - 1) * 100:+.0f}%"
+            reference = f"{expected:,.1f}"
+        else:
+            change = reference = "-"
+        lines.append(f"{result.key:<36}{result.ops_per_sec:>14,.1f}{reference:>14}{change:>9}{result.peak_kb:>11,.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Agri Wiz hot-path benchmarks")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES), help="Catalog multipliers")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), metavar="NAME", help="Benchmarks to run")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="Seconds per timing round")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="Timing rounds; the fastest is kept")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", THRESHOLD)),
+                        help="Largest allowed slowdown or memory growth, as a fraction of the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--update", action="store_true", help="Store the results as the new baselines")
+
+    args = parser.parse_args(argv)
+    stored = load_baselines(args.baseline)
+    results = run(args.scales, args.only, args.min_time, args.rounds)
+
+    if args.update:
+        # A best-of-rounds result from one lucky pass would make later passes look slow
+        passes = [results] + [run(args.scales, args.only, args.min_time, args.rounds) for _ in range(UPDATE_RUNS - 1)]
+        results = [median_result(samples) for samples in zip(*passes)]
+        print(report(results, stored))
+        save_baselines(results, args.baseline)
+        print(f"\nBaselines saved to {args.baseline}")
+        return 0
+    results = confirm(results, stored, args.threshold, args.min_time, args.rounds)
+    print(report(results, stored))
+    failed = [message for result in results
+              for message in regressions(result, stored.get(result.key), args.threshold)]
+    if failed:
+        print(f"\n{len(failed)} regression(s) beyond {args.threshold:.0%} of the baseline:")
+        print("\n".join(f"  {message}" for message in failed))
+        return 1
+    print("\nNo regressions" if stored else "\nNo baselines yet; run with --update to store them")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# Stand-in Upstream Server for Agri Wiz
+# Deterministic local replacement for OpenWeatherMap, SoilGrids, Nominatim and IP geolocation
+
+import json
+import time
+import zlib
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_PORT = 8765
+DEFAULT_SOIL_FIXTURE = "data/raw/solid grid query result.json"
+GAZETTEER_PATH = "data/raw/gazetteer.json"
+
+# Routes are "<original host><original path>", as sent by utils.http_client.upstream_url
+GEOCODE_ROUTE = "api.openweathermap.org/geo/1.0/direct"
+WEATHER_ROUTE = "api.openweathermap.org/data/2.5/weather"
+FORECAST_ROUTE = "api.openweathermap.org/data/2.5/forecast"
+SOIL_ROUTE = "rest.isric.org/soilgrids/v2.0/properties/query"
+REVERSE_GEOCODE_ROUTE = "nominatim.openstreetmap.org/reverse"
+IP_API_ROUTE = "ip-api.com/json/"
+IPAPI_ROUTE = "ipapi.co/json/"
+GEOLOCATION_DB_ROUTE = "geolocation-db.com/json/"
+
+# Synthetic places fall inside this (min_lat, max_lat, min_lon, max_lon) box, roughly India
+SYNTHETIC_BOX = (8.0, 35.0, 68.0, 97.0)
+# Range, in SoilGrids mapped units, of the means filled in where a fixture has no data
+SOIL_MEAN_RANGES = {
+    "bdod": (110, 160), "cec": (100, 400), "cfvo": (0, 200), "clay": (150, 500), "nitrogen": (50, 300),
+    "ocd": (100, 400), "ocs": (20, 60), "phh2o": (55, 80), "sand": (200, 600), "silt": (150, 400),
+    "soc": (50, 300), "wv0010": (200, 500), "wv0033": (150, 400), "wv1500": (80, 250),
+}
+# Quantiles filled in as a share of the mean
+SOIL_QUANTILE_SHARES = {"Q0.05": 0.8, "Q0.5": 1.0, "Q0.95": 1.2}
+DESCRIPTIONS = ("clear sky", "few clouds", "scattered clouds", "light rain", "moderate rain", "haze")
+
+
+def _unit(*parts) -> float:
+    """A number in [0, 1) fixed by its inputs, the same in every process and run."""
+    return zlib.crc32("|".join(str(part) for part in parts).encode("utf-8")) / 2 ** 32
+
+
+class StandInUpstream:
+    """Local HTTP server answering the backend's upstream requests.
+
+    Responses are synthesized from the request parameters, or replayed from
+    recorded fixtures (the SoilGrids route replays ``soil_fixture``, filtered
+    to the queried properties, depths and values, with values the recording
+    has no data for filled in per ~1 km cell unless ``keep_nulls`` is set),
+    so the same request always gets the same body. Injected latency, jitter and errors are derived from
+    the request and how many times it has been seen, so a replayed workload
+    sees the same delays and failures on every run; only rate limiting
+    depends on the wall clock.
+
+    Point the backend at it with ``UPSTREAM_BASE_URL=<base_url>``.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, rate_limit: float = 0.0, seed: int = 0,
+                 soil_fixture: str = DEFAULT_SOIL_FIXTURE, fixtures: Optional[Dict[str, str]] = None,
+                 keep_nulls: bool = False):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free one
+            latency: Seconds added to every response
+            jitter: Most seconds the latency varies by, either way
+            error_rate: Share of requests answered 503
+            rate_limit: Requests per second allowed before answering 429; 0 is unlimited
+            seed: Changes which requests get which delays and errors
+            soil_fixture: Recorded SoilGrids response replayed for soil queries
+            fixtures: Recorded JSON bodies served verbatim, by route
+            keep_nulls: Replay missing SoilGrids values as null instead of filling them in
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.seed = seed
+        self.keep_nulls = keep_nulls
+        self.fixtures = {}
+        for route, path in {SOIL_ROUTE: soil_fixture, **(fixtures or {})}.items():
+            with open(path, "r", encoding="utf-8") as f:
+                self.fixtures[route] = json.load(f)
+        self.places = self._load_gazetteer()
+        self.generators = {
+            GEOCODE_ROUTE: self._geocode,
+            WEATHER_ROUTE: self._weather,
+            FORECAST_ROUTE: self._forecast,
+            SOIL_ROUTE: self._soil,
+            REVERSE_GEOCODE_ROUTE: self._reverse_geocode,
+            IP_API_ROUTE: self._ip_api,
+            IPAPI_ROUTE: self._ipapi,
+            GEOLOCATION_DB_ROUTE: self._geolocation_db,
+        }
+
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.routes = Counter()
+        self._seen = Counter()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.upstream = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInUpstream":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stand-in-upstream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @staticmethod
+    def _load_gazetteer() -> Dict[str, tuple]:
+        try:
+            with open(GAZETTEER_PATH, "r", encoding="utf-8") as f:
+                gazetteer = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {name: (entry["lat"], entry["lon"])
+                for section in gazetteer.values() for name, entry in section.items()}
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def handle(self, target: str) -> Tuple[tuple, float]:
+        """
+        Answer one request.
+
+        Args:
+            target: Request path and query, e.g. "/api.openweathermap.org/data/2.5/weather?lat=1&lon=2"
+
+        Returns:
+            (status, extra headers, JSON body) and the seconds to wait before sending it
+        """
+        url = urlsplit(target)
+        route = url.path.lstrip("/")
+        with self._lock:
+            self.requests += 1
+            self.routes[route] += 1
+            self._seen[target] += 1
+            nth = self._seen[target]
+            allowed = self._take_token()
+            if not allowed:
+                self.rate_limited += 1
+        delay = max(0.0, self.latency + self.jitter * (2 * _unit(self.seed, "delay", target, nth) - 1))
+
+        if not allowed:
+            return (429, {"Retry-After": "1"}, {"cod": 429, "message": "Too many requests"}), delay
+        if self.error_rate and _unit(self.seed, "error", target, nth) < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return (503, {}, {"cod": 503, "message": "Injected failure"}), delay
+        if route in self.fixtures and route != SOIL_ROUTE:
+            return (200, {}, self.fixtures[route]), delay
+        generator = self.generators.get(route)
+        if generator is None:
+            return (404, {}, {"cod": 404, "message": f"No stand-in for {route}"}), delay
+        try:
+            return (200, {}, generator(parse_qs(url.query))), delay
+        except (KeyError, ValueError) as e:
+            return (400, {}, {"cod": 400, "message": f"Bad request: {e}"}), delay
+
+    def _coordinates(self, query: Dict[str, List[str]]) -> tuple:
+        if "lat" in query:
+            return float(query["lat"][0]), float(query["lon"][0])
+        return self._place(query["q"][0])
+
+    def _place(self, name: str) -> tuple:
+        key = " ".join(name.split(",")[0].strip().lower().split())
+        if key in self.places:
+            return self.places[key]
+        min_lat, max_lat, min_lon, max_lon = SYNTHETIC_BOX
+        return (round(min_lat + (max_lat - min_lat) * _unit("lat", key), 4),
+                round(min_lon + (max_lon - min_lon) * _unit("lon", key), 4))
+
+    @staticmethod
+    def _reading(lat: float, lon: float, slot: int) -> Tuple[Dict, float]:
+        """Weather at a ~1 km cell for one 3-hour slot, and its rainfall in mm."""
+        cell = (round(lat, 2), round(lon, 2))
+        temp = round(18 + 17 * _unit("temp", cell) + 4 * (_unit("temp", cell, slot) - 0.5), 2)
+        humidity = int(35 + 55 * _unit("humidity", cell, slot))
+        rain = round(4 * _unit("rain", cell, slot), 2) if _unit("wet", cell, slot) < 0.3 else 0.0
+        reading = {
+            "main": {"temp": temp, "feels_like": round(temp + humidity / 40, 2), "humidity": humidity,
+                     "pressure": 1000 + int(20 * _unit("pressure", cell, slot))},
+            "weather": [{"description": "light rain" if rain else
+                         DESCRIPTIONS[int(_unit("sky", cell, slot) * 3)]}],
+        }
+        return reading, rain
+
+    def _geocode(self, query: Dict[str, List[str]]) -> List[Dict]:
+        lat, lon = self._place(query["q"][0])
+        return [{"name": query["q"][0].split(",")[0].strip(), "lat": lat, "lon": lon, "country": "IN"}]
+
+    def _weather(self, query: Dict[str, List[str]]) -> Dict:
+        lat, lon = self._coordinates(query)
+        slot = int(time.time() // 10800)
+        reading, rain = self._reading(lat, lon, slot)
+        midnight = int(datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+        reading.update({
+            "coord": {"lat": lat, "lon": lon},
+            "wind": {"speed": round(8 * _unit("wind", lat, lon, slot), 1), "deg": int(360 * _unit("deg", lat, lon, slot))},
+            "clouds": {"all": int(100 * _unit("clouds", lat, lon, slot))},
+            "visibility": 10000,
+            "sys": {"sunrise": midnight + 3600, "sunset": midnight + 12 * 3600 + 1800},
+            "dt": slot * 10800,
+            "name": query["q"][0] if "q" in query else "",
+        })
+        if rain:
+            reading["rain"] = {"1h": round(rain / 3, 2)}
+        return reading
+
+    def _forecast(self, query: Dict[str, List[str]]) -> Dict:
+        lat, lon = self._coordinates(query)
+        first = int(time.time() // 10800) + 1
+        entries = []
+        for slot in range(first, first + 40):
+            reading, rain = self._reading(lat, lon, slot)
+            reading["dt"] = slot * 10800
+            if rain:
+                reading["rain"] = {"3h": rain}
+            entries.append(reading)
+        return {"cod": "200", "cnt": len(entries), "list": entries, "city": {"coord": {"lat": lat, "lon": lon}}}
+
+    def _soil(self, query: Dict[str, List[str]]) -> Dict:
+        fixture = self.fixtures[SOIL_ROUTE]
+        lat, lon = float(query["lat"][0]), float(query["lon"][0])
+        properties, depths, values = set(query.get("property", [])), set(query.get("depth", [])), query.get("value", [])
+        layers = []
+        for layer in fixture.get("properties", {}).get("layers", []):
+            if properties and layer["name"] not in properties:
+                continue
+            layers.append({**layer, "depths": [
+                {**depth, "values": self._soil_values(layer["name"], depth, values, lat, lon)}
+                for depth in layer["depths"] if not depths or depth["label"] in depths
+            ]})
+        return {**fixture, "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {**fixture.get("properties", {}), "layers": layers}}
+
+    def _soil_values(self, name: str, depth: Dict, statistics: List[str], lat: float, lon: float) -> Dict:
+        recorded = depth["values"]
+        values = {statistic: recorded.get(statistic) for statistic in statistics} if statistics else dict(recorded)
+        if self.keep_nulls:
+            return values
+        low, high = SOIL_MEAN_RANGES.get(name, (100, 300))
+        mean = low + (high - low) * _unit("soil", name, depth["label"], round(lat, 2), round(lon, 2))
+        for statistic, value in values.items():
+            if value is None and statistic != "uncertainty":
+                values[statistic] = round(mean * SOIL_QUANTILE_SHARES.get(statistic, 1.0))
+        return values
+
+    def _reverse_geocode(self, query: Dict[str, List[str]]) -> Dict:
+        lat, lon = float(query["lat"][0]), float(query["lon"][0])
+        town = f"Town {zlib.crc32(f'{lat:.2f},{lon:.2f}'.encode()) % 10000:04d}"
+        return {"lat": str(lat), "lon": str(lon), "display_name": f"{town}, Maharashtra, India",
+                "address": {"town": town, "state": "Maharashtra", "country": "India"}}
+
+    def _ip_api(self, query: Dict[str, List[str]]) -> Dict:
+        lat, lon = self.places.get("pune", (18.5204, 73.8567))
+        return {"status": "success", "lat": lat, "lon": lon, "city": "Pune", "regionName": "Maharashtra",
+                "country": "India"}
+
+    def _ipapi(self, query: Dict[str, List[str]]) -> Dict:
+        lat, lon = self.places.get("pune", (18.5204, 73.8567))
+        return {"latitude": lat, "longitude": lon, "city": "Pune", "region": "Maharashtra", "country_name": "India"}
+
+    def _geolocation_db(self, query: Dict[str, List[str]]) -> Dict:
+        lat, lon = self.places.get("pune", (18.5204, 73.8567))
+        return {"latitude": lat, "longitude": lon, "city": "Pune", "state": "Maharashtra", "country_name": "India"}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "rate_limited": self.rate_limited,
+                    "routes": dict(self.routes)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        (status, headers, payload), delay = self.server.upstream.handle(self.path)
+        if delay:
+            time.sleep(delay)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Agri Wiz stand-in upstream server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Most seconds the latency varies by")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before 429s; 0 is unlimited")
+    parser.add_argument("--seed", type=int, default=0, help="Changes which requests are delayed or fail")
+    parser.add_argument("--soil-fixture", default=DEFAULT_SOIL_FIXTURE, help="Recorded SoilGrids response")
+    parser.add_argument("--keep-nulls", action="store_true", help="Replay missing SoilGrids values as null")
+    parser.add_argument("--fixture", action="append", default=[], metavar="ROUTE=FILE",
+                        help="Serve a recorded JSON body for a route, e.g. ip-api.com/json/=ip.json")
+
+    args = parser.parse_args(argv)
+    fixtures = {}
+    for item in args.fixture:
+        route, sep, path = item.partition("=")
+        if not sep:
+            parser.error(f"--fixture expects ROUTE=FILE, got {item!r}")
+        fixtures[route] = path
+    upstream = StandInUpstream(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                               args.rate_limit, args.seed, args.soil_fixture, fixtures, args.keep_nulls)
+    print(f"Stand-in upstream listening on {upstream.base_url}")
+    print(f"Point the backend at it with UPSTREAM_BASE_URL={upstream.base_url}")
+    try:
+        upstream.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        upstream.httpd.server_close()
+        print(json.dumps(upstream.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,12 @@ def register_routes(app):
     from .crops import crops_bp
     from .weather import weather_bp
     from .yield_routes import yield_routes_bp
+    from .metrics import metrics_bp
     app.register_blueprint(schemes_bp)
     app.register_blueprint(state_crops_bp)
     app.register_blueprint(recommendation_bp)
     app.register_blueprint(health_bp)
     app.register_blueprint(crops_bp)
     app.register_blueprint(weather_bp)
-    app.register_blueprint(yield_routes_bp)
\ No newline at end of file
+    app.register_blueprint(yield_routes_bp)
+    app.register_blueprint(metrics_bp)
\ No newline at end of file
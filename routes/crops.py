@@ -1,13 +1,12 @@
 from flask import Blueprint, request, jsonify
-from agri_wiz import AgriWiz
+from app_context import get_context
 
 crops_bp = Blueprint("crops", __name__, url_prefix="/api")
-agri_wiz = AgriWiz()
 
 @crops_bp.route("/crops", methods=["GET"])
 def get_crops():
     """Get all available crops"""
-    return jsonify(agri_wiz.crop_data)
+    return jsonify(get_context().agri_wiz.crop_data)
 
 @crops_bp.route("/crops", methods=["POST"])
 def add_crop():
@@ -26,7 +25,7 @@ def add_crop():
         for field in required_fields:
             if field not in crop_data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
-        agri_wiz.add_crop(crop_data)
+        get_context().agri_wiz.add_crop(crop_data)
         return jsonify({"message": "Crop added successfully", "crop": crop_data})
     except Exception as e:
         return jsonify({"error": str(e)}), 500 
\ No newline at end of file
@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from utils.metrics import CONTENT_TYPE, get_metrics
+
+metrics_bp = Blueprint("metrics", __name__, url_prefix="/api")
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics_text():
+    """Request, stage and upstream metrics in the Prometheus text format"""
+    return Response(get_metrics().render(), content_type=CONTENT_TYPE)
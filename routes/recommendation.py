@@ -1,27 +1,15 @@
 from flask import Blueprint, request, jsonify
-from agri_wiz import AgriWiz
-from utils.location_data import LiveLocationManager as LocationManager
-from utils.weather_api import WeatherService, WeatherAPI
-from utils.yield_estimation import YieldEstimator
+from app_context import get_context
+from utils.metrics import span
 import logging
 from datetime import datetime
-import os
-from concurrent.futures import ThreadPoolExecutor
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Create instances
-agri_wiz = AgriWiz()
-location_manager = LocationManager(openweather_api_key=os.getenv('OPENWEATHER_API_KEY'))
-try:
-    weather_service = WeatherService()
-except Exception as e:
-    logger.warning(f"WeatherService initialization failed: {e}")
-    weather_service = None
-weather_api = WeatherAPI()
-yield_estimator = YieldEstimator()
+# Upper bound on locations accepted by the batch endpoint
+MAX_BATCH_LOCATIONS = 500
 
 # Create the recommendation blueprint
 recommendation_bp = Blueprint("recommendation", __name__, url_prefix="/api")
@@ -39,10 +27,13 @@ def get_recommendations():
         # Location-based recommendations using real-time data
         logger.debug(f"Getting location-based recommendations for: {location}")
         
+        agri_wiz = get_context().agri_wiz
+        location_info = agri_wiz.location_manager.get_location_info(location)
+        if not location_info:
+            return jsonify({"error": f"Location '{location}' not found"}), 404
+        
         # Get weather forecast for real-time data
-        weather_forecast = None
-        if weather_service:
-            weather_forecast = weather_service.get_weather_forecast(location)
+        weather_forecast = agri_wiz.weather_service.get_weather_forecast(location)
         
         # Determine current season based on location and date
         current_month = datetime.now().strftime("%B").lower()
@@ -148,11 +139,76 @@ def get_recommendations():
         logger.error(f"Error in recommendations endpoint: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@recommendation_bp.route("/recommendations/batch", methods=["POST"])
+def get_batch_recommendations():
+    """Get location-based crop recommendations for many locations in one call"""
+    try:
+        data = request.get_json(silent=True) or {}
+        locations = data.get("locations")
+        
+        if not isinstance(locations, list) or not locations:
+            return jsonify({"error": "'locations' must be a non-empty list"}), 400
+        if len(locations) > MAX_BATCH_LOCATIONS:
+            return jsonify({"error": f"At most {MAX_BATCH_LOCATIONS} locations per request"}), 400
+        
+        # Each entry is a location name or an object with optional overrides
+        queries = []
+        seen = set()
+        for entry in locations:
+            query = {"location": entry} if isinstance(entry, str) else entry
+            if not isinstance(query, dict) or not isinstance(query.get("location"), str) or not query["location"]:
+                return jsonify({"error": "Each location must be a name or an object with a 'location' field"}), 400
+            if query["location"] in seen:
+                return jsonify({"error": f"Duplicate location: {query['location']}"}), 400
+            seen.add(query["location"])
+            temperature = query.get("temperature")
+            if temperature is not None and (isinstance(temperature, bool) or not isinstance(temperature, (int, float))):
+                return jsonify({"error": f"'temperature' for {query['location']} must be a number"}), 400
+            for field in ("humidity", "soil_fertility"):
+                if query.get(field) is not None and not isinstance(query[field], str):
+                    return jsonify({"error": f"'{field}' for {query['location']} must be a string"}), 400
+            queries.append({
+                "location": query["location"],
+                "humidity": query.get("humidity"),
+                "soil_fertility": query.get("soil_fertility"),
+                "temperature": temperature
+            })
+        
+        logger.debug(f"Getting batch recommendations for {len(queries)} locations")
+        results = get_context().agri_wiz.get_recommendations_for_locations(queries)
+        
+        response_results = {}
+        for query in queries:
+            location = query["location"]
+            recommendations, location_details = results[location]
+            if recommendations is None:
+                response_results[location] = {
+                    "error": f"Unable to generate recommendations for {location}. {location_details}"
+                }
+            else:
+                response_results[location] = {
+                    "recommendations": recommendations,
+                    "location_details": location_details
+                }
+        
+        return jsonify({
+            "results": response_results,
+            "metadata": {
+                "total_locations": len(queries),
+                "resolved_locations": sum(1 for r in response_results.values() if "error" not in r),
+                "analysis_type": "location_based_batch"
+            }
+        })
+    
+    except Exception as e:
+        logger.error(f"Error in batch recommendations endpoint: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @recommendation_bp.route("/recommendation/crop/<crop_name>", methods=["GET"])
 def get_crop_details(crop_name):
     """Get detailed information about a specific crop"""
     try:
-        crop_details = agri_wiz.get_crop_details(crop_name)
+        crop_details = get_context().agri_wiz.get_crop_details(crop_name)
         
         if crop_details is None:
             return jsonify({"error": f"Crop '{crop_name}' not found"}), 404
@@ -168,7 +224,7 @@ def get_crop_details(crop_name):
 def get_crop_calendar(location):
     """Get crop calendar for a specific location"""
     try:
-        calendar = agri_wiz.get_crop_calendar(location)
+        calendar = get_context().agri_wiz.get_crop_calendar(location)
         
         if calendar is None:
             return jsonify({"error": f"Location '{location}' not found"}), 404
@@ -185,7 +241,7 @@ def get_crop_calendar(location):
 def get_current_season():
     """Get current season information"""
     try:
-        current_season = agri_wiz.get_current_season()
+        current_season = get_context().agri_wiz.get_current_season()
         
         return jsonify({
             "current_season": current_season,
@@ -212,55 +268,54 @@ def get_live_recommendations():
     lat = float(lat)
     lon = float(lon)
 
+    context = get_context()
+    location_manager = context.location_manager
+    yield_estimator = context.yield_estimator
+
     # Fetch live weather and soil data concurrently
-    with ThreadPoolExecutor() as executor:
-        weather_future = executor.submit(location_manager.get_live_weather, lat, lon)
-        soil_future = executor.submit(location_manager.get_live_soil_data, lat, lon)
-        weather = weather_future.result()
-        soil = soil_future.result()
-    print("weather", weather)
-    print("soil", soil)
+    weather, soil = location_manager.get_live_conditions(lat, lon)
+    logger.debug(f"Live conditions for {lat},{lon}: weather={weather}, soil={soil}")
     if not weather:
         return jsonify({"error": "Could not fetch live weather data.", "weather": weather}), 500
     if not soil:
         return jsonify({"error": "Could not fetch live soil data.", "soil": soil}), 500
 
-    # 2. Extract values from weather and soil structures
-    temperature = weather.get("main", {}).get("temp", 25)
-    humidity = weather.get("main", {}).get("humidity", 60)
-    rainfall = weather.get("rain", {}).get("1h", 0)
-    # Extract soil pH from solid grid query result structure
-    ph_layer = next((layer for layer in soil.get("properties", {}).get("layers", []) if layer["name"] == "phh2o"), None)
-    soil_ph = None
-    if ph_layer:
-        # Use mean or Q0.5 if available, else fallback
-        soil_ph = ph_layer["depths"][0]["values"].get("mean")
-        if soil_ph is None:
-            soil_ph = ph_layer["depths"][0]["values"].get("Q0.5", 6.5)
+    # 2. Extract values from the flattened weather and soil summaries
+    temperature = weather.get("temperature", 25)
+    humidity = weather.get("humidity", 60)
+    rainfall = weather.get("rainfall_mm", 0)
+    soil_ph = soil.get("soil_ph")
     if soil_ph is None:
         soil_ph = 6.5
+    soil_fertility = soil.get("soil_fertility") or "high"
 
-    # 3. For each crop, check suitability and predict yield
-    recommendations = []
-    for crop in agri_wiz.crop_data:
+    # 3. Predict every crop's yield in one pass over the shared conditions
+    crops = {}
+    for crop in context.agri_wiz.crop_data:
         crop_name = crop.get("crop_name")
         if not crop_name or not isinstance(crop_name, str):
             continue  # Skip crops without a valid name
+        crops.setdefault(crop_name, crop)
+    conditions = {
+        "temperature": temperature,
+        "rainfall": rainfall,
+        "humidity": humidity,
+        "soil_ph": soil_ph,
+        "soil_fertility": soil_fertility,
+        "water_availability": "high",  # Placeholder
+        "season": "summer"  # Placeholder, can use month
+    }
+    ranked = yield_estimator.predict_all_crops(conditions, list(crops))
+
+    # 4. Build recommendations in ranked (estimated yield descending) order
+    recommendations = []
+    for yield_info in ranked:
+        crop_name = yield_info["crop_name"]
+        crop = crops[crop_name]
         ai_confidence = 80  # Placeholder, can be improved
         risk = "Low Risk"
         profit = "High Profit"
         recommendation_label = "Recommended"
-        # Predict yield
-        conditions = {
-            "temperature": temperature,
-            "rainfall": rainfall,
-            "humidity": humidity,
-            "soil_ph": soil_ph,
-            "soil_fertility": "high",  # Placeholder, can be improved
-            "water_availability": "high",  # Placeholder
-            "season": "summer"  # Placeholder, can use month
-        }
-        yield_info = yield_estimator.predict_yield(crop_name, conditions)
         estimated_yield = yield_info.get("estimated_yield", None)
         # Revenue (mock calculation)
         price_per_unit = crop.get("market_price", 2000)
@@ -292,6 +347,5 @@ def get_live_recommendations():
             "risk": risk,
             "recommendation_label": recommendation_label
         })
-    # Sort by estimated yield descending
-    recommendations = sorted(recommendations, key=lambda x: float(x["yield"].split()[0]) if x["yield"] != "N/A" else 0, reverse=True)
-    return jsonify({"recommendations": recommendations, "weather": weather, "soil": soil, "location": location or f"{lat},{lon}"})
+    with span("serialize"):
+        return jsonify({"recommendations": recommendations, "weather": weather, "soil": soil, "location": location or f"{lat},{lon}"})
@@ -2,23 +2,19 @@
 from flask import Blueprint, request, jsonify # type: ignore
 import logging
 
-# Import from the project root
-from agri_wiz import AgriWiz
-from utils.location_data import LiveLocationManager as LocationManager
+from app_context import get_context
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Create instances
-agri_wiz = AgriWiz()
-
 schemes_bp = Blueprint("schemes", __name__, url_prefix="/api")
 
 @schemes_bp.route("/schemes", methods=["GET"])
 def get_schemes():
   """Get government schemes based on parameters"""
   try:
+    agri_wiz = get_context().agri_wiz
     crop_name = request.args.get("crop")
     state = request.args.get("state")
     land_area = request.args.get("land_area")
@@ -37,9 +33,7 @@ def get_schemes():
     # Handle location-based scheme requests
     if location:
       logger.debug(f"Fetching location info and schemes for: {location}")
-      import os
-      location_manager = LocationManager(openweather_api_key=os.getenv('OPENWEATHER_API_KEY'))
-      location_info = location_manager.get_location_info(location)
+      location_info = agri_wiz.location_manager.get_location_info(location)
       if not location_info:
         logger.warning(f"Location not found: {location}")
         return jsonify({"error": f"Location '{location}' not found"}), 404
@@ -112,7 +106,7 @@ def get_schemes():
 def get_all_schemes():
   """Get all available government schemes"""
   try:
-    all_schemes = agri_wiz.scheme_manager.get_all_schemes()
+    all_schemes = get_context().agri_wiz.scheme_manager.get_all_schemes()
     return jsonify({"schemes": all_schemes})
   except Exception as e:
     logger.error(f"Error in get_all_schemes endpoint: {str(e)}")
@@ -122,7 +116,7 @@ def get_all_schemes():
 def get_scheme_categories():
   """Get all scheme categories"""
   try:
-    categories = agri_wiz.scheme_manager.get_categories()
+    categories = get_context().agri_wiz.scheme_manager.get_categories()
     return jsonify({"categories": categories})
   except Exception as e:
     logger.error(f"Error in get_scheme_categories endpoint: {str(e)}")
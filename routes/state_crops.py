@@ -1,12 +1,7 @@
 # routes/state_crops.py
 from flask import Blueprint, request, jsonify # type: ignore
 
-# Import from the project root
-from agri_wiz import AgriWiz
-from utils.location_data import LiveLocationManager as LocationManager
-
-# Create instance
-agri_wiz = AgriWiz()
+from app_context import get_context
 
 state_crops_bp = Blueprint("state_crops", __name__, url_prefix="/api")
 
@@ -14,10 +9,8 @@ state_crops_bp = Blueprint("state_crops", __name__, url_prefix="/api")
 def get_state_crops(location):
     """Get crop and soil data specific to a state/location"""
     try:
-        # Initialize location manager to get state info
-        import os
-        location_manager = LocationManager(openweather_api_key=os.getenv('OPENWEATHER_API_KEY'))
-        location_info = location_manager.get_location_info(location)
+        agri_wiz = get_context().agri_wiz
+        location_info = agri_wiz.location_manager.get_location_info(location)
 
         if not location_info:
             return jsonify({"error": "Location not found"}), 404
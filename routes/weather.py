@@ -1,14 +1,13 @@
 from flask import Blueprint, jsonify
-from utils.weather_api import WeatherAPI
+from app_context import get_context
 
 weather_bp = Blueprint("weather", __name__, url_prefix="/api")
-weather_api = WeatherAPI()
 
 @weather_bp.route("/weather/<location>", methods=["GET"])
 def get_weather(location):
     """Get weather data for a location"""
     try:
-        weather_data = weather_api.get_weather_data(location)
+        weather_data = get_context().weather_api.get_weather_data(location)
         if weather_data:
             return jsonify(weather_data)
         return jsonify({"error": "Could not fetch weather data"}), 404
@@ -1,30 +1,127 @@
 from flask import Blueprint, request, jsonify
-from agri_wiz import AgriWiz
+from app_context import get_context
 
 yield_routes_bp = Blueprint("yield_routes", __name__, url_prefix="/api")
-agri_wiz = AgriWiz()
+
+# Condition fields every estimate needs
+CONDITION_FIELDS = [
+    "temperature",
+    "rainfall",
+    "humidity",
+    "soil_ph",
+    "soil_fertility",
+    "water_availability",
+    "season",
+]
+
+# Upper bound on rows accepted by the batch endpoint
+MAX_BATCH_ROWS = 10000
 
 @yield_routes_bp.route("/yield/estimate", methods=["POST"])
 def estimate_yield():
     """Estimate crop yield based on parameters"""
     try:
         data = request.json
-        required_fields = [
-            "crop_name",
-            "temperature",
-            "rainfall",
-            "humidity",
-            "soil_ph",
-            "soil_fertility",
-            "water_availability",
-            "season",
-        ]
+        required_fields = ["crop_name"] + CONDITION_FIELDS
         for field in required_fields:
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
-        yield_estimate = agri_wiz.yield_estimator.predict_yield(data["crop_name"], data)
+        yield_estimate = get_context().yield_estimator.predict_yield(data["crop_name"], data)
         if "error" in yield_estimate:
             return jsonify({"error": yield_estimate["error"]}), 400
         return jsonify(yield_estimate)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@yield_routes_bp.route("/yield/estimate/batch", methods=["POST"])
+def estimate_yield_batch():
+    """Estimate crop yield for many sets of conditions in one call"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be an object with 'crop_name' and 'conditions'"}), 400
+        crop_name = data.get("crop_name")
+        conditions = data.get("conditions")
+        if not crop_name:
+            return jsonify({"error": "Missing required field: crop_name"}), 400
+        if not isinstance(crop_name, str):
+            return jsonify({"error": "'crop_name' must be a string"}), 400
+        if not isinstance(conditions, list) or not conditions:
+            return jsonify({"error": "'conditions' must be a non-empty list"}), 400
+        if len(conditions) > MAX_BATCH_ROWS:
+            return jsonify({"error": f"At most {MAX_BATCH_ROWS} rows per request"}), 400
+
+        # Rows missing fields are reported per row instead of failing the batch
+        errors = {}
+        valid_rows = []
+        for i, row in enumerate(conditions):
+            missing = [field for field in CONDITION_FIELDS if not isinstance(row, dict) or field not in row]
+            if missing:
+                errors[i] = f"Missing required field: {missing[0]}"
+            else:
+                valid_rows.append(i)
+
+        estimated_yield = [None] * len(conditions)
+        confidence_interval = [None] * len(conditions)
+        if valid_rows:
+            result = get_context().yield_estimator.predict_yield_batch(
+                crop_name, [conditions[i] for i in valid_rows]
+            )
+            if "error" in result:
+                return jsonify({"error": result["error"]}), 400
+            for j, message in result["errors"].items():
+                errors[valid_rows[j]] = message
+            for j, i in enumerate(valid_rows):
+                if j not in result["errors"]:
+                    estimated_yield[i] = float(result["estimated_yield"][j])
+                    confidence_interval[i] = [float(ci) for ci in result["confidence_interval"][j]]
+
+        return jsonify({
+            "crop_name": crop_name,
+            "estimated_yield": estimated_yield,
+            "confidence_interval": confidence_interval,
+            "errors": {str(i): message for i, message in sorted(errors.items())},
+            "unit": "quintals per hectare"
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@yield_routes_bp.route("/yield/observations", methods=["POST"])
+def record_yield_observations():
+    """Record observed field yields; the crop's model is retrained in the background"""
+    try:
+        data = request.get_json(silent=True) or {}
+        crop_name = data.get("crop_name")
+        observations = data.get("observations")
+        if not crop_name:
+            return jsonify({"error": "Missing required field: crop_name"}), 400
+        if not isinstance(crop_name, str):
+            return jsonify({"error": "'crop_name' must be a string"}), 400
+        if not isinstance(observations, list) or not observations:
+            return jsonify({"error": "'observations' must be a non-empty list"}), 400
+        if len(observations) > MAX_BATCH_ROWS:
+            return jsonify({"error": f"At most {MAX_BATCH_ROWS} rows per request"}), 400
+
+        for i, row in enumerate(observations):
+            if not isinstance(row, dict):
+                return jsonify({"error": f"Observation {i} must be an object"}), 400
+            for field in CONDITION_FIELDS + ["yield"]:
+                if field not in row:
+                    return jsonify({"error": f"Observation {i} is missing required field: {field}"}), 400
+            if not isinstance(row["yield"], (int, float)) or isinstance(row["yield"], bool):
+                return jsonify({"error": f"Observation {i} has a non-numeric yield"}), 400
+
+        try:
+            get_context().yield_estimator.record_observations(crop_name, observations)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({
+            "crop_name": crop_name,
+            "recorded": len(observations),
+            "status": "retraining"
+        }), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,65 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from utils.yield_estimation import YieldEstimator
+
+
+def _fit_model(model_dir, crop_name, seed, n_estimators=5):
+    """Fit a small forest and scaler for a crop and save them like the real artifacts."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(15, 35, 200),
+        rng.uniform(300, 1500, 200),
+        rng.uniform(40, 90, 200),
+        rng.uniform(5.5, 7.5, 200),
+        rng.integers(1, 4, 200),
+        rng.integers(1, 4, 200),
+        rng.integers(1, 5, 200),
+    ])
+    y = X[:, 0] + X[:, 1] / 50 + X[:, 4] * 3 + X[:, 5] * 2 + rng.normal(0, 1, 200)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=seed).fit(scaler.transform(X), y)
+    joblib.dump(model, os.path.join(model_dir, f"{crop_name}_model.joblib"))
+    joblib.dump(scaler, os.path.join(model_dir, f"{crop_name}_scaler.joblib"))
+    return model, scaler
+
+
+@pytest.fixture
+def write_model(tmp_path):
+    """Writes a small model and scaler for a crop into tmp_path: write_model(crop_name, seed, n_estimators=5)."""
+    def write(crop_name, seed, n_estimators=5):
+        return _fit_model(str(tmp_path), crop_name, seed, n_estimators)
+    return write
+
+
+@pytest.fixture
+def model_dir(tmp_path, write_model):
+    """A model directory holding small rice and wheat models."""
+    write_model("rice", 1, n_estimators=20)
+    write_model("wheat", 2, n_estimators=20)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def make_estimator(model_dir):
+    """Builds YieldEstimators over model_dir with the given options."""
+    def make(**options):
+        return YieldEstimator(model_dir=model_dir, **options)
+    return make
+
+
+@pytest.fixture
+def estimator(make_estimator):
+    """A YieldEstimator with default settings over model_dir."""
+    return make_estimator()
+
+
+@pytest.fixture(autouse=True)
+def no_background_refresh(monkeypatch):
+    """Weather caches built in tests only refresh hot keys when a test turns it on."""
+    monkeypatch.setenv("WEATHER_REFRESH_TOP_N", "0")
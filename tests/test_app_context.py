@@ -0,0 +1,86 @@
+import pytest
+from flask import Flask
+
+import app_context
+from routes.crops import crops_bp
+from routes.recommendation import MAX_BATCH_LOCATIONS, recommendation_bp
+
+
+def _make_app():
+    app = Flask(__name__)
+    app_context.init_app(app)
+    app.register_blueprint(crops_bp)
+    app.register_blueprint(recommendation_bp)
+    return app
+
+
+def test_context_is_built_lazily_and_once():
+    app = _make_app()
+    context = app_context.get_context(app)
+    assert context._agri_wiz is None
+    assert context.agri_wiz is context.agri_wiz
+    assert context.yield_estimator is context.agri_wiz.yield_estimator
+
+
+def test_each_app_owns_its_context():
+    assert app_context.get_context(_make_app()) is not app_context.get_context(_make_app())
+
+
+def test_added_crop_is_visible_to_other_blueprints(monkeypatch):
+    app = _make_app()
+    agri_wiz = app_context.get_context(app).agri_wiz
+    monkeypatch.setattr(agri_wiz, "save_crop_data", lambda: None)
+    client = app.test_client()
+
+    crop = {
+        "crop_name": "Foxtail Millet",
+        "soil_types": "sandy,loamy",
+        "climates": "semi-arid",
+        "seasons": "kharif",
+        "water_needs": "low",
+        "humidity_preference": "low",
+        "soil_fertility": "low",
+    }
+    assert client.post("/api/crops", json=crop).status_code == 200
+
+    response = client.get("/api/recommendation/crop/foxtail millet")
+    assert response.status_code == 200
+    assert response.get_json()["crop_details"]["name"] == "Foxtail Millet"
+
+
+def _batch_client(monkeypatch):
+    app = _make_app()
+    weather_service = app_context.get_context(app).agri_wiz.weather_service
+    monkeypatch.setattr(weather_service, "get_weather_forecasts", lambda locations: {})
+    return app.test_client()
+
+
+def test_batch_recommendations_are_keyed_by_location(monkeypatch):
+    client = _batch_client(monkeypatch)
+    response = client.post("/api/recommendations/batch", json={
+        "locations": ["punjab", {"location": "kerala", "humidity": "high", "temperature": 28}, "atlantis"]
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert set(body["results"]) == {"punjab", "kerala", "atlantis"}
+    assert "recommendations" in body["results"]["punjab"]
+    assert body["results"]["kerala"]["location_details"]["humidity"] == "high"
+    assert "error" in body["results"]["atlantis"]
+    assert body["metadata"]["total_locations"] == 3
+    assert body["metadata"]["resolved_locations"] == 2
+
+
+@pytest.mark.parametrize("locations", [
+    [],
+    ["punjab"] * (MAX_BATCH_LOCATIONS + 1),
+    ["punjab", {"location": "punjab"}],
+    [{"location": "punjab", "humidity": ["x"]}],
+    [{"location": "punjab", "soil_fertility": {"level": "high"}}],
+    [{"location": "punjab", "temperature": True}],
+    [{"location": "punjab", "temperature": "hot"}],
+])
+def test_batch_recommendations_reject_bad_requests(monkeypatch, locations):
+    client = _batch_client(monkeypatch)
+    response = client.post("/api/recommendations/batch", json={"locations": locations})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from utils.async_weather import AsyncWeatherProvider, WeatherProvider
+from utils.geocode_cache import GeocodeCache
+from utils.soil_cache import SoilCache, bbox_points, warm
+from utils.weather_api import WeatherService
+
+DELAY = 0.2
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        time.sleep(DELAY)
+        if url.path == "/geo":
+            name = query["q"][0]
+            payload = [] if name == "Nowhere" else [{"lat": len(name), "lon": 70.0}]
+        elif url.path == "/forecast":
+            payload = {"list": [{"dt": 1700000000, "main": {"temp": float(query["lat"][0]), "humidity": 60}}]}
+        elif url.path == "/soil":
+            payload = {"properties": {"layers": [
+                {"name": name, "unit_measure": {"d_factor": 10},
+                 "depths": [{"label": depth, "values": {value: 68 for value in query["value"]}} for depth in query["depth"]]}
+                for name in query["property"]
+            ]}}
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    upstream = AsyncWeatherProvider(retries=0)
+    upstream.geocode_url, upstream.forecast_url = f"{base}/geo", f"{base}/forecast"
+    upstream.weather_url, upstream.soil_url = f"{base}/missing", f"{base}/soil"
+    facade = WeatherProvider(upstream)
+    yield facade
+    facade.close()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_forecasts_fan_out_concurrently(provider):
+    locations = [f"Place {'x' * i}" for i in range(20)] + ["Nowhere"]
+    start = time.perf_counter()
+    forecasts = provider.location_forecasts(locations, "key")
+    elapsed = time.perf_counter() - start
+
+    # Geocode then forecast, so two round trips however many locations there are
+    assert elapsed < 10 * DELAY
+    assert forecasts["Nowhere"] is None
+    assert forecasts["Place xxx"]["list"][0]["main"]["temp"] == len("Place xxx")
+    host = next(iter(provider.stats().values()))
+    assert host["requests"] == 41 and host["errors"] == 0
+
+
+def test_failed_lookup_does_not_sink_the_other(provider):
+    weather, profile = provider.current_and_soil(18.52, 73.86, "key")
+    assert weather is None
+    assert profile.get("phh2o") == 6.8
+    assert profile.get("clay", depth="100-200cm", statistic="Q0.95") == 6.8
+
+
+def test_service_batches_cache_misses(provider, tmp_path):
+    service = WeatherService(cache_path=str(tmp_path / "cache.db"))
+    service.weather_provider = provider
+    assert service.get_weather_forecast("Pune")["averages"]["temperature"] == 4
+
+    forecasts = service.get_weather_forecasts(["Pune", "Mumbai", "Nowhere"])
+    assert forecasts["Mumbai"]["averages"]["temperature"] == 6
+    assert forecasts["Nowhere"] is None
+    assert sum(host["requests"] for host in provider.stats().values()) == 2 + 3
+
+
+def test_geocode_cache_skips_the_geocoder(provider, tmp_path):
+    provider.provider.geocode_cache = GeocodeCache(path=str(tmp_path / "cache.db"))
+    forecasts = provider.location_forecasts(["Pune", "Solapur", "Nowhere"], "key")
+    assert forecasts["Pune"]["list"][0]["main"]["temp"] == 18.5204
+    provider.location_forecasts(["Solapur", "Nowhere"], "key")
+
+    # Pune is in the gazetteer; Solapur and Nowhere were geocoded once each
+    host = next(iter(provider.stats().values()))
+    assert host["requests"] == 4 + 1
+
+
+def test_soil_cells_are_fetched_once_and_shared(provider, tmp_path):
+    path = str(tmp_path / "soil.db")
+    provider.provider.soil_cache = SoilCache(path)
+    counts = warm([(18.5204, 73.8567), (18.5210, 73.8570), (19.0760, 72.8777)], provider)
+    assert counts == {"cells": 2, "cached": 0, "fetched": 2, "failed": 0}
+    host = next(iter(provider.stats().values()))
+    assert host["requests"] == 2
+
+    # Another process opening the same file sees the warmed cells
+    provider.provider.soil_cache = SoilCache(path)
+    _, profile = provider.current_and_soil(18.5215, 73.8555, "key")
+    assert profile.get("phh2o") == 6.8
+    assert warm([(19.0760, 72.8777)], provider)["cached"] == 1
+    host = next(iter(provider.stats().values()))
+    assert host["requests"] == 2 + 1  # only the current weather call
+
+
+def test_bounding_box_prefetch(provider, tmp_path):
+    provider.provider.soil_cache = SoilCache(str(tmp_path / "soil.db"))
+    points = bbox_points(30.90, 75.85, 30.91, 75.86)
+    assert len(points) == 25
+    assert warm(points, provider) == {"cells": 25, "cached": 0, "fetched": 25, "failed": 0}
+    with pytest.raises(ValueError):
+        bbox_points(30.0, 75.0, 31.0, 76.0)
@@ -0,0 +1,35 @@
+import json
+
+from bench.suite import BENCHMARKS, BASELINE_PATH, DEFAULT_SCALES, Result, regressions, run, synthetic_crops, synthetic_schemes
+
+
+def test_synthetic_catalogs_scale():
+    one, ten = synthetic_crops(1), synthetic_crops(10)
+    assert len(ten) == 10 * len(one)
+    assert len({crop["crop_name"] for crop in ten}) == len(ten)
+    assert synthetic_crops(10) == ten  # seeded
+
+    schemes = synthetic_schemes(3)
+    assert len(schemes["schemes"]) == 3 * len(synthetic_schemes(1)["schemes"])
+
+
+def test_quick_run_and_regression_check():
+    results = run(scales=[1], names=["recommendations", "scheme_details", "cache_get"], min_time=0.01, rounds=1)
+    assert [result.key for result in results] == ["recommendations[1x]", "scheme_details[1x]", "cache_get[1x]"]
+    assert all(result.ops_per_sec > 0 and result.calibration > 0 for result in results)
+
+    baseline = {"ops_per_sec": 1000.0, "peak_kb": 10.0, "calibration": 500.0}
+    same_speed = Result("recommendations", 1, 1000.0, 10.0, 500.0)
+    assert regressions(same_speed, baseline) == []
+    # Half the throughput on a machine running at half the speed is not a regression
+    assert regressions(same_speed._replace(ops_per_sec=500.0, calibration=250.0), baseline) == []
+    assert len(regressions(same_speed._replace(ops_per_sec=500.0), baseline)) == 1
+    assert len(regressions(same_speed._replace(peak_kb=100.0), baseline)) == 1
+
+
+def test_every_benchmark_has_a_baseline():
+    with open(BASELINE_PATH) as f:
+        stored = json.load(f)["results"]
+    for name, (_, scaled) in BENCHMARKS.items():
+        for scale in DEFAULT_SCALES if scaled else (1,):
+            assert f"{name}[{scale}x]" in stored
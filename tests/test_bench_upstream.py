@@ -0,0 +1,56 @@
+import pytest
+
+from bench.upstream import StandInUpstream
+from utils.async_weather import AsyncWeatherProvider, WeatherProvider
+from utils.http_client import UpstreamClient, upstream_url
+
+WEATHER = "/api.openweathermap.org/data/2.5/weather?lat=18.52&lon=73.85"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    with StandInUpstream(port=0) as server:
+        monkeypatch.setenv("UPSTREAM_BASE_URL", server.base_url)
+        yield server
+
+
+def test_replay_is_deterministic():
+    def replay(**options):
+        server = StandInUpstream(port=0, error_rate=0.3, jitter=0.05, latency=0.1, seed=7, **options)
+        try:
+            return [server.handle(target) for target in [WEATHER] * 10 + ["/ip-api.com/json/"] * 10]
+        finally:
+            server.stop()
+
+    first, second = replay(), replay()
+    assert first == second
+    statuses = [status for (status, _, _), _ in first]
+    assert 0 < statuses.count(503) < len(statuses)
+    assert all(0.05 <= delay <= 0.15 for _, delay in first)
+
+    limited = StandInUpstream(port=0, rate_limit=2)
+    try:
+        (status, headers, _), _ = [limited.handle(WEATHER) for _ in range(3)][-1]
+    finally:
+        limited.stop()
+    assert status == 429 and headers["Retry-After"] == "1"
+
+
+def test_both_http_stacks_are_routed_to_the_stand_in(upstream):
+    assert upstream_url("https://ipapi.co/json/?a=1") == f"{upstream.base_url}/ipapi.co/json/?a=1"
+
+    client = UpstreamClient(retries=0)
+    response = client.get("https://api.openweathermap.org/data/2.5/weather",
+                          params={"q": "Ludhiana", "appid": "key", "units": "metric"})
+    assert response.status_code == 200 and response.json()["coord"] == {"lat": 30.901, "lon": 75.8573}
+    assert "api.openweathermap.org" in client.stats()
+
+    provider = WeatherProvider(AsyncWeatherProvider(retries=0))
+    try:
+        weather, soil = provider.current_and_soil(18.52, 73.85, "key")
+        forecast = provider.location_forecast("Ludhiana", "key")
+    finally:
+        provider.close()
+    assert weather["main"]["temp"] > 0 and soil is not None and soil.get("clay") is not None
+    assert len(forecast["list"]) == 40
+    assert upstream.stats()["routes"]["rest.isric.org/soilgrids/v2.0/properties/query"] == 1
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from utils.compiled_forest import CompiledForest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _random_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(10, 40, n),
+        rng.uniform(200, 2000, n),
+        rng.uniform(30, 95, n),
+        rng.uniform(5, 8, n),
+        rng.integers(1, 4, n),
+        rng.integers(1, 4, n),
+        rng.integers(1, 5, n),
+    ])
+
+
+def test_compiled_forest_matches_sklearn_trees(write_model):
+    model, scaler = write_model("rice", 4, n_estimators=15)
+    forest = CompiledForest.from_sklearn(model, scaler)
+    X = _random_rows(1500)
+    expected = np.column_stack([
+        tree.predict(scaler.transform(X).astype(np.float32)) for tree in model.estimators_
+    ])
+    assert np.allclose(forest.tree_predictions(X), expected, rtol=1e-6)
+    assert np.array_equal(forest.feature_importances_, model.feature_importances_)
+
+
+def test_saved_forest_round_trips(tmp_path, write_model):
+    model, scaler = write_model("rice", 5)
+    forest = CompiledForest.from_sklearn(model, scaler)
+    path = str(tmp_path / "rice_forest.npz")
+    forest.save(path)
+    X = _random_rows(50, seed=1)
+    assert np.array_equal(CompiledForest.load(path).tree_predictions(X), forest.tree_predictions(X))
+
+
+def test_estimator_serves_compiled_models(estimator, make_estimator):
+    conditions = {"temperature": 27, "rainfall": 900, "humidity": 65, "soil_ph": 6.8,
+                  "soil_fertility": "medium", "water_availability": "high", "season": "fall"}
+    sklearn_result = make_estimator().predict_yield("rice", conditions)
+
+    assert estimator.compile_models() == ["rice", "wheat"]
+    assert isinstance(estimator.model_store.get("rice").model, CompiledForest)
+    compiled_result = estimator.predict_yield("rice", conditions)
+    assert abs(compiled_result["estimated_yield"] - sklearn_result["estimated_yield"]) <= 0.01
+    assert "factors" in estimator.get_yield_factors("rice")
+
+
+def test_compiled_models_load_without_sklearn(model_dir, estimator):
+    estimator.compile_models()
+    script = (
+        "import sys; from utils.yield_estimation import YieldEstimator; "
+        f"r = YieldEstimator(model_dir={model_dir!r}).predict_yield('wheat', {{}}); "
+        "assert r['estimated_yield'] > 0 and 'sklearn' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True)
+
+
+def test_compiled_predictions_are_json_floats(estimator):
+    estimator.compile_models(["rice"])
+    result = estimator.predict_yield("rice", {})
+    assert type(result["estimated_yield"]) in (float, np.float64)
+    assert result["estimated_yield"] == round(result["estimated_yield"], 2)
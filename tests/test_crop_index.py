@@ -0,0 +1,127 @@
+import csv
+import random
+
+from agri_wiz import AgriWiz
+from utils.crop_index import CropIndex
+
+
+def _reference_recommendations(crops, soil_type, climate, season, humidity=None,
+                               soil_fertility=None, soil_ph=None, temperature=None):
+    """The original per-crop scoring loop from AgriWiz.get_recommendations."""
+    scored = []
+    for crop in crops:
+        score = 0
+        max_score = 0
+        if any(s.strip().lower() == soil_type.lower() for s in crop["soil_types"].split(",")):
+            score += 3
+        max_score += 3
+        if any(c.strip().lower() == climate.lower() for c in crop["climates"].split(",")):
+            score += 3
+        max_score += 3
+        if any(s.strip().lower() == season.lower() for s in crop["seasons"].split(",")):
+            score += 3
+        max_score += 3
+        if humidity and "humidity_preference" in crop:
+            max_score += 2
+            if any(h.strip().lower() == humidity.lower() for h in crop["humidity_preference"].split(",")):
+                score += 2
+        if soil_fertility and "soil_fertility" in crop:
+            max_score += 2
+            if any(f.strip().lower() == soil_fertility.lower() for f in crop["soil_fertility"].split(",")):
+                score += 2
+        if soil_ph and "ph_range" in crop:
+            max_score += 1
+            try:
+                ph_min, ph_max = map(float, crop["ph_range"].split("-"))
+                if ph_min <= float(soil_ph) <= ph_max:
+                    score += 1
+            except (ValueError, AttributeError):
+                pass
+        if temperature and "temperature_range" in crop:
+            max_score += 1
+            try:
+                temp_min, temp_max = map(float, crop["temperature_range"].split("-"))
+                if temp_min <= float(temperature) <= temp_max:
+                    score += 1
+            except (ValueError, AttributeError):
+                pass
+        match_percentage = (score / max_score * 100) if max_score > 0 else 0
+        if match_percentage >= 60:
+            scored.append((crop["crop_name"], match_percentage, score, max_score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored
+
+
+SOILS = ["Clay", "loamy", " sandy loam", "Black Soil", "red"]
+CLIMATES = ["tropical", "Subtropical", "temperate", "arid"]
+SEASONS = ["kharif", "Rabi", "summer", "winter", "rainy"]
+LEVELS = ["low", "medium", "High"]
+
+
+def _random_catalog(rng, size):
+    crops = []
+    for i in range(size):
+        crop = {
+            "crop_name": f"Crop {i}",
+            "soil_types": ",".join(rng.sample(SOILS, rng.randint(1, 3))),
+            "climates": ",".join(rng.sample(CLIMATES, rng.randint(1, 2))),
+            "seasons": ",".join(rng.sample(SEASONS, rng.randint(1, 3))),
+            "water_needs": rng.choice(LEVELS),
+        }
+        if rng.random() < 0.8:
+            crop["humidity_preference"] = ",".join(rng.sample(LEVELS, rng.randint(1, 2)))
+        if rng.random() < 0.8:
+            crop["soil_fertility"] = ",".join(rng.sample(LEVELS, rng.randint(1, 2)))
+        if rng.random() < 0.5:
+            crop["ph_range"] = rng.choice(["5.5-7.0", "6.0-7.5", "bad", "6-6.5"])
+        if rng.random() < 0.5:
+            crop["temperature_range"] = rng.choice(["20-30", "15-25", "25-35"])
+        crops.append(crop)
+    return crops
+
+
+def test_get_recommendations_matches_reference_loop(tmp_path):
+    rng = random.Random(7)
+    catalog = _random_catalog(rng, 300)
+    fields = list(dict.fromkeys(field for crop in catalog for field in crop))
+    path = tmp_path / "crop_data.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(catalog)
+    agri_wiz = AgriWiz()
+    agri_wiz.load_crop_data(str(path))
+    crops = agri_wiz.crop_data
+    assert len(crops) == len(catalog)
+
+    for _ in range(200):
+        query = {
+            "soil_type": rng.choice(SOILS).strip(),
+            "climate": rng.choice(CLIMATES).upper(),
+            "season": rng.choice(SEASONS),
+            "humidity": rng.choice(LEVELS + [None]),
+            "soil_fertility": rng.choice(LEVELS + [None]),
+            "soil_ph": rng.choice([None, 6.2, "7", "n/a"]),
+            "temperature": rng.choice([None, 18, 27.5]),
+        }
+        recommendations, scored = agri_wiz.get_recommendations(**query)
+        expected = _reference_recommendations(crops, **query)
+        assert [crop["crop_name"] for crop in recommendations] == [name for name, _, _, _ in expected]
+        assert [(item["crop"]["crop_name"], item["match_percentage"], item["score_details"]["total_score"],
+                 item["score_details"]["max_possible"]) for item in scored] == expected
+
+
+def test_find_is_case_insensitive_and_keeps_first_match():
+    first = {"crop_name": "Rice", "soil_types": "clay", "climates": "tropical", "seasons": "kharif"}
+    second = {"crop_name": "RICE", "soil_types": "loamy", "climates": "tropical", "seasons": "rabi"}
+    index = CropIndex([first, second])
+    assert index.find("rice") is first
+    assert index.find("wheat") is None
+
+
+def test_add_extends_existing_masks():
+    index = CropIndex([{"crop_name": "Rice", "soil_types": "Clay", "climates": "tropical", "seasons": "kharif"}])
+    index.add({"crop_name": "Jute", "soil_types": "clay, alluvial", "climates": "Tropical", "seasons": "kharif"})
+    assert index.mask("soil_types", "CLAY") == 0b11
+    assert index.mask("soil_types", "alluvial") == 0b10
+    assert index.find("jute")["crop_name"] == "Jute"
@@ -0,0 +1,98 @@
+import random
+
+from utils.crop_scoring import LocationScoringEngine
+
+
+def _reference_scores(crops, common_soil_types, climate, current_season, humidity=None, soil_fertility=None):
+    """The original per-crop loop from AgriWiz.get_recommendations_by_location."""
+    scored_recommendations = []
+    for crop in crops:
+        score = 0
+        max_score = 0
+        crop_soils = [s.strip() for s in crop["soil_types"].split(",")]
+        if any(soil in crop_soils for soil in common_soil_types):
+            score += 2
+        max_score += 2
+        crop_climates = [c.strip() for c in crop["climates"].split(",")]
+        if climate in crop_climates:
+            score += 3
+        elif any(c in ["subtropical", "temperate"] for c in crop_climates):
+            score += 1
+        max_score += 3
+        crop_seasons = [s.strip() for s in crop["seasons"].split(",")]
+        if current_season in crop_seasons:
+            score += 2
+        max_score += 2
+        if humidity and "humidity_preference" in crop:
+            crop_humidity = [h.strip() for h in crop["humidity_preference"].split(",")]
+            if humidity in crop_humidity:
+                score += 1
+            max_score += 1
+        if soil_fertility and "soil_fertility" in crop:
+            crop_fertility = [f.strip() for f in crop["soil_fertility"].split(",")]
+            if soil_fertility in crop_fertility:
+                score += 1
+            max_score += 1
+        match_percentage = (score / max_score * 100) if max_score > 0 else 0
+        if match_percentage >= 40:
+            scored_recommendations.append({"crop": crop, "match_percentage": match_percentage})
+    scored_recommendations.sort(key=lambda x: x["match_percentage"], reverse=True)
+    return [(item["crop"], item["match_percentage"]) for item in scored_recommendations]
+
+
+SOILS = ["clay", "loamy", "sandy loam", "Loamy", "black soil", "alluvial"]
+CLIMATES = ["tropical", "subtropical", "temperate", "arid", "Tropical"]
+SEASONS = ["summer", "winter", "rainy", "spring", "kharif"]
+LEVELS = ["low", "medium", "high", "High"]
+
+
+def _random_catalog(rng, size):
+    crops = []
+    for i in range(size):
+        crop = {
+            "crop_name": f"Crop {i}",
+            "soil_types": ", ".join(rng.sample(SOILS, rng.randint(1, 3))),
+            "climates": ",".join(rng.sample(CLIMATES, rng.randint(1, 2))),
+            "seasons": ",".join(rng.sample(SEASONS, rng.randint(1, 3))),
+        }
+        if rng.random() < 0.7:
+            crop["humidity_preference"] = ",".join(rng.sample(LEVELS, rng.randint(1, 2)))
+        if rng.random() < 0.7:
+            crop["soil_fertility"] = " ,".join(rng.sample(LEVELS, rng.randint(1, 2)))
+        crops.append(crop)
+    return crops
+
+
+def test_engine_matches_reference_loop():
+    rng = random.Random(11)
+    crops = _random_catalog(rng, 400)
+    engine = LocationScoringEngine(crops)
+    for _ in range(300):
+        args = (
+            rng.sample(SOILS, rng.randint(0, 3)),
+            rng.choice(CLIMATES),
+            rng.choice(SEASONS),
+            rng.choice(LEVELS + [None, ""]),
+            rng.choice(LEVELS + [None]),
+        )
+        expected = _reference_scores(crops, *args)
+        actual = engine.score(*args)
+        assert [(id(c), p) for c, p in actual] == [(id(c), p) for c, p in expected]
+
+
+def test_engine_handles_empty_catalog():
+    assert LocationScoringEngine([]).score(["loamy"], "tropical", "summer", "high", "high") == []
+
+
+def test_score_batch_matches_single_queries():
+    rng = random.Random(3)
+    crops = _random_catalog(rng, 150)
+    engine = LocationScoringEngine(crops)
+    queries = [
+        (rng.sample(SOILS, 2), rng.choice(CLIMATES), rng.choice(SEASONS),
+         rng.choice(LEVELS + [None]), rng.choice(LEVELS + [None]))
+        for _ in range(40)
+    ]
+    batched = engine.score_batch(queries)
+    for query, result in zip(queries, batched):
+        assert [(id(c), p) for c, p in result] == [(id(c), p) for c, p in _reference_scores(crops, *query)]
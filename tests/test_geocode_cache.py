@@ -0,0 +1,26 @@
+import time
+
+from utils.geocode_cache import GeocodeCache
+
+
+def test_gazetteer_seeds_locations_and_districts(tmp_path):
+    cache = GeocodeCache(path=str(tmp_path / "cache.db"))
+    assert cache.get("Punjab") == (31.1471, 75.3412)
+    assert cache.get("  ludhiana ") == (30.9010, 75.8573)
+    assert cache.get("Atlantis") is None
+    assert cache.stats() == {"known": 14, "hits": 2, "misses": 1}
+
+
+def test_lookups_persist_and_failures_expire(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = GeocodeCache(path=path, negative_ttl=0.2, gazetteer_path=None)
+    cache.put("Solapur", (17.6599, 75.9064))
+    cache.put("Atlantis", None)
+    assert cache.get("Atlantis") == ()
+    cache.store.flush()
+
+    reopened = GeocodeCache(path=path, negative_ttl=0.2, gazetteer_path=None)
+    assert reopened.get("solapur") == (17.6599, 75.9064)
+    assert reopened.get("Atlantis") == ()
+    time.sleep(0.3)
+    assert reopened.get("Atlantis") is None
@@ -0,0 +1,68 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils.http_client import UpstreamClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.peers.add(self.client_address)
+        server.hits += 1
+        if self.path == "/flaky" and server.hits <= 2:
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.peers, httpd.hits = set(), 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_connections_are_kept_alive(server):
+    client = UpstreamClient()
+    for _ in range(5):
+        assert client.get(_url(server, "/weather")).json() == {"ok": True}
+    assert len(server.peers) == 1
+    stats = client.stats()[f"127.0.0.1:{server.server_address[1]}"]
+    assert stats["requests"] == 5 and stats["errors"] == 0
+
+
+def test_retryable_statuses_are_retried(server):
+    client = UpstreamClient(retries=2)
+    assert client.get(_url(server, "/flaky")).status_code == 200
+    stats = client.stats()[f"127.0.0.1:{server.server_address[1]}"]
+    assert stats["requests"] == 3 and stats["retries"] == 2
+
+
+def test_connection_errors_raise_after_retries():
+    client = UpstreamClient(retries=1, connect_timeout=0.2)
+    with pytest.raises(requests.ConnectionError):
+        client.get("http://127.0.0.1:9/unreachable")
+    assert client.stats()["127.0.0.1:9"] == {**client.stats()["127.0.0.1:9"], "requests": 2, "errors": 2, "retries": 1}
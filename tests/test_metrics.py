@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from flask import Flask, jsonify
+
+from agri_wiz import AgriWiz
+from bench.upstream import StandInUpstream
+from routes.metrics import metrics_bp
+from utils import metrics
+from utils.crop_scoring import LocationScoringEngine
+from utils.http_client import get_client
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    metrics.init_app(app)
+    app.register_blueprint(metrics_bp)
+
+    @app.route("/api/slow/<name>")
+    def slow(name):
+        with metrics.span("test_fetch"):
+            pass
+        with metrics.span("test_serialize"):
+            return jsonify({"name": name})
+
+    engine = LocationScoringEngine([{"crop_name": "Rice", "soil_types": "clay", "climates": "tropical",
+                                     "seasons": "kharif"}])
+
+    @app.route("/api/score")
+    def score():
+        return jsonify({"crops": [crop["crop_name"] for crop, _ in engine.score(["clay"], "tropical", "kharif")]})
+
+    agri_wiz = AgriWiz()
+
+    @app.route("/api/criteria")
+    def criteria():
+        return jsonify({"crops": agri_wiz.get_recommendations("loamy", "tropical", "summer")})
+
+    @app.route("/api/broken")
+    def broken():
+        with metrics.span("test_broken"):
+            raise RuntimeError("upstream down")
+
+    return app.test_client()
+
+
+def sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_requests_and_stages_are_exported(client):
+    registry = metrics.get_metrics()
+    before = registry.request_seconds.count(("GET", "/api/slow/<name>"))
+    response = client.get("/api/slow/pune")
+    client.get("/api/slow/nashik")
+    assert client.get("/api/broken").status_code == 500
+    client.get("/api/nowhere")
+
+    stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    assert stages == ["test_fetch", "test_serialize"]
+
+    text = client.get("/api/metrics").get_data(as_text=True)
+    assert "# TYPE agriwiz_request_duration_seconds histogram" in text
+    endpoint = 'method="GET",endpoint="/api/slow/<name>"'
+    assert sample(text, f"agriwiz_request_duration_seconds_count{{{endpoint}}}") == before + 2
+    assert sample(text, f'agriwiz_request_duration_seconds_bucket{{{endpoint},le="+Inf"}}') == before + 2
+    assert sample(text, 'agriwiz_stage_duration_seconds_count{stage="test_fetch"}') >= 2
+    assert sample(text, 'agriwiz_stage_errors_total{stage="test_broken"}') >= 1
+    assert sample(text, 'agriwiz_request_errors_total{method="GET",endpoint="/api/broken"}') >= 1
+    assert sample(text, 'agriwiz_requests_total{method="GET",endpoint="unmatched",status="404"}') >= 1
+
+
+def test_nested_scoring_records_one_stage(client):
+    response = client.get("/api/score")
+    assert response.get_json() == {"crops": ["Rice"]}
+    assert [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")] == ["crop_scoring"]
+
+
+def test_criteria_and_location_scoring_are_separate_stages(client):
+    assert client.get("/api/criteria").headers["Server-Timing"].split(";")[0] == "criteria_scoring"
+    assert client.get("/api/score").headers["Server-Timing"].split(";")[0] == "crop_scoring"
+    text = client.get("/api/metrics").get_data(as_text=True)
+    assert sample(text, 'agriwiz_stage_duration_seconds_count{stage="criteria_scoring"}') >= 1
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("a",), seconds)
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{stage="a",le="0.1"} 2',
+        'test_seconds_bucket{stage="a",le="1.0"} 3',
+        'test_seconds_bucket{stage="a",le="+Inf"} 4',
+        'test_seconds_sum{stage="a"} 3.65',
+        'test_seconds_count{stage="a"} 4',
+    ]
+
+
+def test_timed_coroutines_and_upstream_counts(monkeypatch):
+    @metrics.timed("test_async")
+    async def fetch():
+        await asyncio.sleep(0)
+        return 42
+
+    registry = metrics.get_metrics()
+    before = registry.stage_seconds.count(("test_async",))
+    assert asyncio.run(fetch()) == 42
+    assert registry.stage_seconds.count(("test_async",)) == before + 1
+
+    with StandInUpstream(port=0) as server:
+        monkeypatch.setenv("UPSTREAM_BASE_URL", server.base_url)
+        host = 'agriwiz_upstream_requests_total{host="ip-api.com"}'
+        before = sample(registry.render(), host)
+        get_client().get("http://ip-api.com/json/")
+        assert sample(registry.render(), host) == before + 1
@@ -0,0 +1,55 @@
+import os
+
+from utils import model_store
+from utils.model_store import ModelStore
+
+
+def test_models_load_on_first_use(tmp_path, write_model):
+    write_model("rice", 1)
+    store = ModelStore(str(tmp_path))
+    assert store.stats()["loaded"] == []
+    assert "rice" in store and "wheat" not in store
+    assert store.get("rice") is store.get("rice")
+    assert store.get("wheat") is None
+    assert store.stats()["hits"] == 1
+
+
+def test_unknown_crops_leave_no_bookkeeping(tmp_path, write_model, monkeypatch):
+    monkeypatch.setattr(model_store, "MAX_TRACKED_CROPS", 4)
+    write_model("rice", 1)
+    store = ModelStore(str(tmp_path))
+    for i in range(50):
+        assert store.get(f"unknown-{i}") is None
+    store.get("rice")
+    store.get("rice")
+    assert store.most_requested(5) == ["rice"]
+    assert store._load_locks == {}
+
+    for i in range(10):
+        store._count_request(f"crop-{i}")
+    assert len(store._requests) <= 4
+
+
+def test_lru_stays_within_budget(tmp_path, write_model):
+    for seed, crop_name in enumerate(["rice", "wheat", "maize"]):
+        write_model(crop_name, seed)
+    one_crop = sum(os.path.getsize(tmp_path / f) for f in os.listdir(tmp_path) if f.startswith("rice"))
+    store = ModelStore(str(tmp_path), max_bytes=int(one_crop * 2.5))
+
+    store.get("rice")
+    store.get("wheat")
+    store.get("rice")
+    store.get("maize")
+
+    stats = store.stats()
+    assert stats["loaded"] == ["rice", "maize"]
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= store.max_bytes
+
+
+def test_mmap_loading_gives_same_predictions(estimator, make_estimator):
+    conditions = {"temperature": 4, "rainfall": 6, "humidity": 2, "soil_ph": 5,
+                  "soil_fertility": "high", "water_availability": "low", "season": "winter"}
+    eager = estimator.predict_yield("rice", conditions)
+    mapped = make_estimator(mmap_mode="r").predict_yield("rice", conditions)
+    assert eager == mapped
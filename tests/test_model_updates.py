@@ -0,0 +1,96 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from flask import Flask
+
+import app_context
+from routes.yield_routes import yield_routes_bp
+from utils.compiled_forest import CompiledForest
+from utils.observation_log import ObservationLog
+from utils.yield_estimation import _save_artifacts
+
+OBSERVATION = {"temperature": 31, "rainfall": 1400, "humidity": 75, "soil_ph": 6.4,
+               "soil_fertility": "high", "water_availability": "high", "season": "summer", "yield": 80}
+
+
+def test_log_is_append_only_and_skips_torn_lines(tmp_path):
+    log = ObservationLog(str(tmp_path), 2)
+    log.append("rice", [[1, 2]], [3])
+    log.append("rice", [[4, 5], [6, 7]], [8, 9])
+    with open(log.path("rice"), "a") as f:
+        f.write('{"features": [1, ')
+    X, y = log.read("rice")
+    assert X.tolist() == [[1, 2], [4, 5], [6, 7]] and y.tolist() == [3, 8, 9]
+    assert log.read("wheat")[0].shape == (0, 2)
+
+
+def test_observations_warm_start_a_new_version(estimator):
+    before = estimator.model_store.get("rice")
+
+    assert estimator.record_observations("Rice", [OBSERVATION] * 5).result() is True
+    after = estimator.model_store.get("rice")
+    assert isinstance(after.model, CompiledForest)
+    assert after.model.n_trees == before.model.n_estimators + 20
+    assert after.version > before.version
+    # The old entry is untouched and still usable by requests that hold it
+    assert len(before.model.estimators_) == 20
+
+    assert estimator.update_model("rice", {"features": [[30, 1500, 70, 6.5, 3, 3, 2]], "yields": [55]}, wait=True)
+    assert estimator.model_store.get("rice").model.n_trees == before.model.n_estimators + 40
+    assert len(estimator.observation_log.read("rice")[1]) == 6
+
+
+def test_refits_from_scratch_past_tree_cap(make_estimator):
+    estimator = make_estimator(max_trees=30)
+    estimator.record_observations("wheat", [OBSERVATION]).result()
+    assert estimator.model_store.get("wheat").model.n_trees == 100
+    assert not np.isnan(estimator.predict_yield("wheat", OBSERVATION)["estimated_yield"])
+
+
+def test_bad_update_is_rejected(estimator):
+    assert estimator.update_model("rice", {"features": [[1, 2]], "yields": [3]}) is False
+
+
+def _files_under(path):
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+
+
+@pytest.mark.parametrize("crop_name", ["../x", "unknown-crop", "rice/../../x"])
+def test_observations_for_unknown_crops_are_rejected(tmp_path, estimator, crop_name):
+    app = Flask(__name__)
+    app_context.init_app(app)
+    app_context.get_context(app)._agri_wiz = SimpleNamespace(yield_estimator=estimator)
+    app.register_blueprint(yield_routes_bp)
+    before = _files_under(tmp_path.parent)
+
+    response = app.test_client().post("/api/yield/observations",
+                                      json={"crop_name": crop_name, "observations": [OBSERVATION]})
+    assert response.status_code == 400
+    assert _files_under(tmp_path.parent) == before
+    assert estimator.update_model(crop_name, {"features": [[30, 1500, 70, 6.5, 3, 3, 2]], "yields": [55]}) is False
+    assert estimator.model_store.get(crop_name) is None
+
+
+def test_artifact_paths_reject_traversal(tmp_path):
+    with pytest.raises(ValueError):
+        ObservationLog(str(tmp_path), 2).path("../escaped")
+    with pytest.raises(ValueError):
+        _save_artifacts(str(tmp_path), "../escaped", None, None)
+    assert not os.path.exists(tmp_path.parent / "escaped.jsonl")
+
+
+def test_known_crops_are_cached_until_models_change(estimator, write_model, monkeypatch):
+    assert estimator.is_known_crop("rice")
+    listings = []
+    monkeypatch.setattr(estimator.model_store, "crops", lambda: listings.append(1) or [])
+    monkeypatch.setattr(estimator, "_load_crop_params", lambda: listings.append(1) or {})
+    assert estimator.is_known_crop("wheat") and not estimator.is_known_crop("quinoa")
+    assert listings == []
+    monkeypatch.undo()
+
+    write_model("quinoa", 3)
+    assert not estimator.is_known_crop("quinoa")
+    assert estimator.compile_models(["quinoa"]) == ["quinoa"]
+    assert estimator.is_known_crop("quinoa")
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta
+
+from utils.cache_store import CacheStore
+from utils.refresher import HotKeyRefresher
+from utils.weather_api import WeatherAPI, WeatherService
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_hot_keys_are_refreshed_before_expiry_and_warmed_on_restart(tmp_path):
+    history = CacheStore(str(tmp_path / "cache.db"), "access")
+    expiries = {"punjab": time.time() + 3600, "kerala": time.time() + 60}
+    refreshed = []
+    refresher = HotKeyRefresher("test", history, expiries.get, refreshed.extend, top_n=2, lead_time=120)
+    for key in ["punjab"] * 3 + ["kerala"] * 2 + ["pune"]:
+        refresher.touch(key)
+
+    refresher.run_once()
+    assert refresher.hot() == ["punjab", "kerala"]
+    assert refreshed == ["kerala"]  # punjab is fresh, pune is not hot
+    refresher.run_once()
+    assert refreshed == ["kerala"]  # not retried within the lead time
+
+    history.flush()
+    refreshed.clear()
+    restarted = HotKeyRefresher("test", CacheStore(str(tmp_path / "cache.db"), "access"),
+                                {}.get, refreshed.extend, top_n=2, interval=60)
+    restarted.start()
+    assert _wait_for(lambda: sorted(refreshed) == ["kerala", "punjab"])
+
+
+def test_expired_weather_is_served_stale_while_refreshing(tmp_path, monkeypatch):
+    monkeypatch.setenv("WEATHER_REFRESH_TOP_N", "5")
+    api = WeatherAPI(cache_path=str(tmp_path / "cache.db"))
+    api.weather_cache.set("Punjab, India", {"temperature": 20.0, "humidity": 50, "rainfall": 0,
+                                            "description": "Old", "timestamp": time.time() - 4000},
+                          expires_at=time.time() - 400)
+
+    stale = api.get_weather_data("Punjab, India")
+    assert stale["stale"] is True and stale["description"] == "Old"
+    assert _wait_for(lambda: api.weather_cache.get("Punjab, India") is not None)
+    fresh = api.get_weather_data("Punjab, India")
+    assert "stale" not in fresh and fresh["description"] == "Partly cloudy"
+
+
+def test_yesterdays_forecast_is_served_stale_while_refreshing(tmp_path, monkeypatch):
+    monkeypatch.setenv("WEATHER_REFRESH_TOP_N", "5")
+    service = WeatherService(cache_path=str(tmp_path / "cache.db"))
+    monkeypatch.setattr(service.weather_provider, "location_forecasts", lambda locations, api_key: {
+        location: {"list": [{"dt": 1700000000, "main": {"temp": 30.0, "humidity": 60}}]} for location in locations
+    })
+    yesterday = datetime.now() - timedelta(days=1)
+    service.cache.set(f"Pune_{yesterday.strftime('%Y-%m-%d')}", {"averages": {"temperature": 25.0}},
+                      expires_at=time.time() - 60)
+
+    assert service.get_weather_forecast("Pune") == {"averages": {"temperature": 25.0}, "stale": True}
+    assert _wait_for(lambda: service.get_weather_forecast("Pune")["averages"]["temperature"] == 30.0)
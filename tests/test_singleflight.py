@@ -0,0 +1,51 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"temperature": 30}
+
+    with ThreadPoolExecutor(8) as pool:
+        leader = pool.submit(flight.do, "punjab", fetch)
+        started.wait()
+        followers = [pool.submit(flight.do, "punjab", fetch) for _ in range(7)]
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": 1, "coalesced": 7, "in_flight": 0}
+    # A finished call is not reused
+    flight.do("punjab", fetch)
+    assert len(calls) == 2
+
+
+def test_errors_propagate_and_waiters_time_out():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def slow():
+        release.wait()
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "kerala", slow)
+        while not flight.stats()["in_flight"]:
+            time.sleep(0.01)
+        with pytest.raises(SingleFlightTimeout):
+            flight.do("kerala", slow, timeout=0.05)
+        release.set()
+        with pytest.raises(ValueError):
+            leader.result()
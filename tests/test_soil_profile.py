@@ -0,0 +1,39 @@
+import json
+import os
+
+import numpy as np
+
+from utils.soil_profile import SOIL_DEPTHS, SOIL_PROPERTIES, SOIL_STATISTICS, SoilProfile
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "raw", "solid grid query result.json")
+
+
+def _response(values):
+    return {"properties": {"layers": [
+        {"name": name, "unit_measure": {"d_factor": 10},
+         "depths": [{"label": depth, "values": {"mean": values.get((name, depth)), "Q0.5": None}}
+                    for depth in SOIL_DEPTHS]}
+        for name in SOIL_PROPERTIES + ("wv0033",)
+    ]}}
+
+
+def test_parses_into_fixed_layout():
+    profile = SoilProfile.from_soilgrids(_response({("phh2o", "0-5cm"): 72, ("soc", "0-5cm"): 154,
+                                                    ("clay", "30-60cm"): 310}))
+    assert profile.values.shape == (len(SOIL_PROPERTIES), len(SOIL_DEPTHS), len(SOIL_STATISTICS))
+    assert profile.values.dtype == np.float32
+    assert profile.get("phh2o") == 7.2
+    assert profile.get("clay", depth="30-60cm") == 31.0
+    assert profile.get("phh2o", statistic="Q0.5") is None
+    assert profile.fertility() == "medium"
+    assert json.dumps(profile.topsoil())  # NaN is reported as null
+
+    decoded = SoilProfile.decode(profile.encode())
+    assert np.array_equal(decoded.values, profile.values, equal_nan=True)
+
+
+def test_no_data_pixels_are_empty():
+    with open(FIXTURE) as f:
+        profile = SoilProfile.from_soilgrids(json.load(f))
+    assert profile.empty and profile.fertility() is None
+    assert len(profile.encode()) < 1100
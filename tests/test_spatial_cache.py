@@ -0,0 +1,92 @@
+import threading
+import time
+
+from utils.spatial_cache import SpatialCache, geohash_bounds, geohash_encode, geohash_neighbors, haversine_km
+from utils.weather_api import WeatherAPI
+
+
+def test_geohash_matches_reference():
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    min_lat, max_lat, min_lon, max_lon = geohash_bounds("tdr1v")
+    assert min_lat <= 12.9716 <= max_lat and min_lon <= 77.5946 <= max_lon
+    assert sorted(geohash_neighbors("dqcjq")) == ["dqcjj", "dqcjm", "dqcjn", "dqcjp", "dqcjr", "dqcjt", "dqcjw", "dqcjx"]
+    assert 1.9 < haversine_km(30.9010, 75.8573, 30.9010, 75.8773) < 2.0
+
+
+def test_nearby_points_share_a_cell_entry(tmp_path):
+    cache = SpatialCache(str(tmp_path / "cache.db"), "test", tolerance_km=3)
+    cache.set(30.9010, 75.8573, {"temperature": 31}, ttl=60)
+    assert cache.get(30.9050, 75.8600) == {"temperature": 31}
+    # Across a cell boundary from the cached point, but within the tolerance
+    assert geohash_encode(30.9010, 75.8573) != geohash_encode(30.9010, 75.8400)
+    assert cache.get(30.9010, 75.8400) == {"temperature": 31}
+    assert cache.get(31.6340, 74.8723) is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["neighbor_hits"] == 1
+    assert cache.stats()["hit_ratio"] == round(2 / 3, 4)
+
+
+class _Response:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+def test_coordinate_weather_is_fetched_once_per_area(tmp_path, monkeypatch):
+    api = WeatherAPI(api_key="test", cache_path=str(tmp_path / "cache.db"))
+    calls = []
+
+    def fake_get(url, params=None, **kwargs):
+        calls.append(params)
+        return _Response({"main": {"temp": 29.0, "humidity": 70}, "weather": [{"description": "haze"}]})
+
+    monkeypatch.setattr(api.http, "get", fake_get)
+    first = api.get_weather_by_coordinates(18.5204, 73.8567)
+    nearby = api.get_weather_by_coordinates(18.5300, 73.8600)
+    assert len(calls) == 1
+    assert nearby["temperature"] == first["temperature"] == 29.0
+    assert nearby["latitude"] == 18.5300
+
+    api.get_weather_by_coordinates(19.0760, 72.8777)
+    assert len(calls) == 2
+
+
+def test_followers_beyond_the_tolerance_fetch_their_own_point(tmp_path, monkeypatch):
+    api = WeatherAPI(api_key="test", cache_path=str(tmp_path / "cache.db"))
+    api.coordinate_cache.tolerance_km = 1
+    leader_point, follower_point = (18.5204, 73.8567), (18.5330, 73.8700)
+    assert api.coordinate_cache.cell(*leader_point) == api.coordinate_cache.cell(*follower_point)
+    assert haversine_km(*leader_point, *follower_point) > 1
+    release = threading.Event()
+    calls = []
+
+    def fake_get(url, params=None, **kwargs):
+        calls.append((params["lat"], params["lon"]))
+        if len(calls) == 1:
+            release.wait(5)
+        return _Response({"main": {"temp": 20.0 + len(calls), "humidity": 70}, "weather": [{"description": "haze"}]})
+
+    monkeypatch.setattr(api.http, "get", fake_get)
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(leader=api.get_weather_by_coordinates(*leader_point)))
+    leader.start()
+    while not calls:
+        time.sleep(0.01)
+    follower = threading.Thread(target=lambda: results.update(follower=api.get_weather_by_coordinates(*follower_point)))
+    follower.start()
+    while api.inflight.stats()["coalesced"] == 0:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert calls == [leader_point, follower_point]
+    assert results["leader"]["temperature"] == 21.0
+    assert results["follower"]["temperature"] == 22.0
+    # One lookup per call, even though the follower re-checked the cache
+    assert api.coordinate_cache.stats()["misses"] == 2
+    assert api.coordinate_cache.stats()["hits"] == 0
@@ -0,0 +1,71 @@
+from flask import Flask, jsonify, request
+
+from bench.replay import app_sender, replay
+from utils import traffic
+
+
+def make_app(path):
+    app = Flask(__name__)
+
+    @app.route("/api/weather/<location>")
+    def weather(location):
+        return jsonify({"location": location, "lat": request.args.get("lat")})
+
+    @app.route("/api/yield", methods=["POST"])
+    def predict():
+        data = request.get_json()
+        if "crop" not in data:
+            return jsonify({"error": "crop is required"}), 400
+        return jsonify({"crop": data["crop"]})
+
+    @app.route("/api/broken")
+    def broken():
+        return jsonify({"error": "upstream down"}), 503
+
+    capture = traffic.init_app(app, path=str(path))
+    return app, capture
+
+
+def test_capture_is_sanitized(tmp_path):
+    log = tmp_path / "traffic.jsonl"
+    app, capture = make_app(log)
+    client = app.test_client()
+    client.get("/api/weather/pune?lat=18.520434&lon=73.856743&appid=secret-key")
+    client.post("/api/yield", json={"crop": "rice", "farmer_name": "Asha", "conditions": {"lat": 18.520434}})
+    client.options("/api/weather/pune")
+    capture.flush()
+
+    records = traffic.read_log(str(log))
+    assert len(records) == 2 and capture.stats()["captured"] == 2
+    weather, predict = records
+    assert weather["endpoint"] == "/api/weather/<location>" and weather["path"] == "/api/weather/pune"
+    assert weather["query"] == {"lat": [18.52], "lon": [73.86], "appid": [traffic.REDACTED]}
+    assert weather["status"] == 200 and weather["latency_ms"] >= 0
+    assert predict["body"] == {"crop": "rice", "farmer_name": traffic.REDACTED, "conditions": {"lat": 18.52}}
+    assert "secret-key" not in log.read_text() and "Asha" not in log.read_text()
+
+
+def test_capture_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("TRAFFIC_CAPTURE", raising=False)
+    assert traffic.init_app(Flask(__name__)) is None
+
+
+def test_replay_reports_each_endpoint(tmp_path):
+    log = tmp_path / "traffic.jsonl"
+    app, capture = make_app(log)
+    client = app.test_client()
+    for _ in range(3):
+        client.get("/api/weather/pune?lat=18.52")
+    client.post("/api/yield", json={"crop": "rice"})
+    client.post("/api/yield", json={})
+    client.get("/api/broken")
+    capture.flush()
+
+    report = replay(traffic.read_log(str(log)), app_sender(app), concurrency=2)
+    assert report["GET /api/weather/<location>"]["requests"] == 3
+    assert report["GET /api/weather/<location>"]["error_rate"] == 0
+    assert report["POST /api/yield"]["client_error_rate"] == 0.5
+    assert report["GET /api/broken"]["error_rate"] == 1
+    assert report["ALL"]["requests"] == 6
+    assert report["ALL"]["p50_ms"] <= report["ALL"]["p99_ms"]
+    assert capture.stats()["captured"] == 12  # the replay was captured too
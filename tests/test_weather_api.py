@@ -0,0 +1,110 @@
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from utils.cache_store import CacheStore
+from utils.weather_api import WeatherAPI, WeatherService
+
+
+def test_store_expires_and_persists(tmp_path):
+    path = str(tmp_path / "cache.db")
+    store = CacheStore(path, "test")
+    store.set("fresh", {"temperature": 30}, ttl=60)
+    store.set("stale", {"temperature": 10}, ttl=-1)
+    assert store.get("fresh") == {"temperature": 30}
+    assert store.get("stale") is None
+    store.flush()
+
+    reopened = CacheStore(path, "test")
+    assert reopened.get("fresh") == {"temperature": 30}
+    assert CacheStore(path, "other").get("fresh") is None
+    assert reopened.purge_expired() == 1
+    assert len(reopened) == 1
+
+
+def _write_entries(path, worker):
+    store = CacheStore(path, "shared", flush_interval=0.01)
+    for i in range(200):
+        store.set(f"{worker}-{i}", {"i": i}, ttl=60)
+    store.flush()
+
+
+def test_concurrent_processes_share_one_file(tmp_path):
+    path = str(tmp_path / "cache.db")
+    CacheStore(path, "shared").purge_expired()  # create the schema up front
+    workers = [multiprocessing.Process(target=_write_entries, args=(path, w)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    store = CacheStore(path, "shared")
+    assert len(store) == 800
+    assert store.get("3-199") == {"i": 199}
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "weather_cache.json"
+    legacy.write_text(json.dumps({
+        "Punjab": {"temperature": 35.0, "humidity": 59, "rainfall": 1.5,
+                   "description": "Warm", "timestamp": time.time()},
+        "Ludhiana": {"temperature": 22.0, "humidity": 56, "rainfall": 1.5,
+                     "description": "Warm", "timestamp": time.time() - 7200},
+    }))
+    api = WeatherAPI(cache_path=str(tmp_path / "cache.db"))
+    api.weather_cache.legacy_json = str(legacy)
+    assert api.get_weather_data("Punjab")["temperature"] == 35.0
+    assert api.weather_cache.get("Ludhiana") is None
+
+
+def test_weather_data_is_cached(tmp_path):
+    api = WeatherAPI(cache_path=str(tmp_path / "cache.db"))
+    first = api.get_weather_data("Kerala, India")
+    api.weather_cache.flush()
+    again = WeatherAPI(cache_path=str(tmp_path / "cache.db")).get_weather_data("Kerala, India")
+    assert again == first
+
+
+def test_forecasts_expire_at_the_end_of_their_day(tmp_path):
+    service = WeatherService(cache_path=str(tmp_path / "cache.db"))
+    today = datetime.now().strftime("%Y-%m-%d")
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    legacy = tmp_path / "forecasts.json"
+    legacy.write_text(json.dumps({f"Pune_{today}": {"averages": {}}, f"Pune_{yesterday}": {"averages": {}}}))
+    service.cache.legacy_json = str(legacy)
+    assert service.get_weather_forecast("Pune") == {"averages": {}}
+    assert service.cache.get(f"Pune_{yesterday}") is None
+
+
+def test_concurrent_forecast_misses_fetch_once(tmp_path, monkeypatch):
+    service = WeatherService(cache_path=str(tmp_path / "cache.db"))
+    calls = []
+
+    def fake_location_forecast(location, api_key):
+        calls.append(location)
+        time.sleep(0.1)
+        return {"list": [{"dt": 1700000000, "main": {"temp": 28.0, "humidity": 60}}]}
+
+    monkeypatch.setattr(service.weather_provider, "location_forecast", fake_location_forecast)
+    with ThreadPoolExecutor(10) as pool:
+        results = list(pool.map(service.get_weather_forecast, ["Pune"] * 10))
+
+    assert calls == ["Pune"]
+    assert all(result["averages"]["temperature"] == 28.0 for result in results)
+
+
+def test_mock_weather_is_the_same_in_every_process(tmp_path):
+    script = ("import json; from utils.weather_api import WeatherAPI; "
+              f"data = WeatherAPI(cache_path={str(tmp_path / 'cache.db')!r})._get_mock_weather_data('Atlantis'); "
+              "data.pop('timestamp'); print(json.dumps(data, sort_keys=True))")
+    outputs = {
+        subprocess.run([sys.executable, "-c", script], env={**os.environ, "PYTHONHASHSEED": seed},
+                       capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+        for seed in ("1", "2")
+    }
+    assert len(outputs) == 1
@@ -0,0 +1,187 @@
+import os
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from flask import Flask
+
+import app_context
+from routes.yield_routes import MAX_BATCH_ROWS, yield_routes_bp
+from utils.yield_estimation import YieldEstimator
+
+CONDITIONS = [
+    {"temperature": 30, "rainfall": 1500, "humidity": 70, "soil_ph": 6.5,
+     "soil_fertility": "high", "water_availability": "high", "season": "summer"},
+    {"temperature": 18.5, "rainfall": 420, "humidity": 55, "soil_ph": 7.1,
+     "soil_fertility": "low", "water_availability": "medium", "season": "winter"},
+    {"temperature": 25},
+]
+
+
+def _loop_prediction(estimator, crop_name, conditions):
+    """The original one-row, tree-by-tree prediction."""
+    entry = estimator.model_store.get(crop_name)
+    features = entry.scaler.transform(np.array(estimator._feature_row(conditions)).reshape(1, -1))
+    predictions = [tree.predict(features)[0] for tree in entry.model.estimators_]
+    return round(np.mean(predictions), 2), [round(ci, 2) for ci in np.percentile(predictions, [5, 95])]
+
+
+def test_batch_matches_per_row_tree_loop(estimator):
+    result = estimator.predict_yield_batch("Rice", CONDITIONS)
+    assert result["errors"] == {}
+    for i, conditions in enumerate(CONDITIONS):
+        mean, interval = _loop_prediction(estimator, "rice", conditions)
+        assert result["estimated_yield"][i] == mean
+        assert list(result["confidence_interval"][i]) == interval
+        assert estimator.predict_yield("rice", conditions)["estimated_yield"] == mean
+
+
+def test_batch_reports_bad_rows_without_failing(estimator):
+    result = estimator.predict_yield_batch("rice", [CONDITIONS[0], {"temperature": "hot"}])
+    assert list(result["errors"]) == [1]
+    assert np.isnan(result["estimated_yield"][1])
+    assert not np.isnan(result["estimated_yield"][0])
+    assert estimator.predict_yield("rice", {"temperature": "hot"})["error"] == "Error processing input data"
+
+
+def _yield_client(estimator):
+    app = Flask(__name__)
+    app_context.init_app(app)
+    app_context.get_context(app)._agri_wiz = SimpleNamespace(yield_estimator=estimator)
+    app.register_blueprint(yield_routes_bp)
+    return app.test_client()
+
+
+def test_estimate_batch_route(estimator):
+    rows = [CONDITIONS[0], {**CONDITIONS[1], "temperature": "hot"}, CONDITIONS[1], {"temperature": 25}]
+    response = _yield_client(estimator).post("/api/yield/estimate/batch",
+                                             json={"crop_name": "rice", "conditions": rows})
+    assert response.status_code == 200
+    body = response.get_json()
+    expected = estimator.predict_yield_batch("rice", [CONDITIONS[0], CONDITIONS[1]])
+    assert body["estimated_yield"] == [expected["estimated_yield"][0], None, expected["estimated_yield"][1], None]
+    assert body["confidence_interval"][0] == list(expected["confidence_interval"][0])
+    assert body["confidence_interval"][2] == list(expected["confidence_interval"][1])
+    assert body["confidence_interval"][1] is None
+    low, high = body["confidence_interval"][0]
+    assert low <= body["estimated_yield"][0] <= high
+    assert set(body["errors"]) == {"1", "3"}
+    assert body["errors"]["3"] == "Missing required field: rainfall"
+
+
+@pytest.mark.parametrize("payload", [
+    ["rice"],
+    {"crop_name": "rice", "conditions": CONDITIONS[0]},
+    {"crop_name": "rice", "conditions": []},
+    {"crop_name": "rice", "conditions": [CONDITIONS[0]] * (MAX_BATCH_ROWS + 1)},
+    {"crop_name": ["rice"], "conditions": [CONDITIONS[0]]},
+])
+def test_estimate_batch_route_rejects_bad_requests(estimator, payload):
+    response = _yield_client(estimator).post("/api/yield/estimate/batch", json=payload)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_unknown_crop(estimator):
+    assert estimator.predict_yield_batch("kiwi", CONDITIONS)["error"] == "Crop model not available"
+
+
+def test_predict_all_crops_ranks_numerically(estimator):
+    ranked = estimator.predict_all_crops(CONDITIONS[0], ["Kiwi", "Wheat", "Rice"])
+    assert sorted(item["crop_name"] for item in ranked) == ["Kiwi", "Rice", "Wheat"]
+    assert ranked[-1]["crop_name"] == "Kiwi" and ranked[-1]["estimated_yield"] is None
+    for item in ranked[:2]:
+        single = estimator.predict_yield(item["crop_name"], CONDITIONS[0])
+        assert item["estimated_yield"] == single["estimated_yield"]
+        assert item["confidence_interval"] == single["confidence_interval"]
+    assert ranked[0]["estimated_yield"] >= ranked[1]["estimated_yield"]
+    assert sorted(item["crop_name"] for item in estimator.predict_all_crops(CONDITIONS[0])) == ["rice", "wheat"]
+
+
+def test_optimization_grid_search(estimator):
+    current = dict(CONDITIONS[1])
+    result = estimator.get_optimization_suggestions("rice", current, top_k=3, ph_step=0.5)
+
+    assert result["current_yield"] == estimator.predict_yield("rice", current)
+    suggestions = result["suggestions"]
+    assert 0 < len(suggestions) <= 3
+    gains = [s["potential_improvement"] for s in suggestions]
+    assert gains == sorted(gains, reverse=True)
+
+    # Each suggestion's yield is what a direct prediction of that combination gives
+    for suggestion in suggestions:
+        assert suggestion["changes"]
+        predicted = estimator.predict_yield("rice", {**current, **suggestion["changes"]})
+        assert predicted["estimated_yield"] == suggestion["estimated_yield"]
+
+    # Searching the full grid never finds less than varying one factor at a time
+    single = max(
+        estimator.predict_yield("rice", {**current, "soil_fertility": level})["estimated_yield"]
+        for level in ("low", "medium", "high")
+    )
+    assert suggestions[0]["estimated_yield"] >= single
+
+
+def test_sample_data_is_seeded_and_vectorized(tmp_path):
+    estimator = YieldEstimator(model_dir=str(tmp_path))
+    first = estimator._generate_sample_data(n_samples=200, seed=7)
+    second = estimator._generate_sample_data(n_samples=200, seed=7)
+    assert "rice" in first and "potato" in first
+    assert first["rice"]["features"].shape == (200, 7)
+    assert np.array_equal(first["rice"]["yields"], second["rice"]["yields"])
+    assert not np.array_equal(first["rice"]["yields"], first["wheat"]["yields"])
+
+
+def test_train_all_writes_servable_models(tmp_path):
+    estimator = YieldEstimator(model_dir=str(tmp_path))
+    trained = estimator.train_all(["Rice", "Wheat"], n_samples=100, n_estimators=5, workers=2)
+    assert trained == ["rice", "wheat"]
+    assert sorted(os.listdir(tmp_path)) == [
+        "rice_forest.npz", "rice_model.joblib", "rice_scaler.joblib",
+        "wheat_forest.npz", "wheat_model.joblib", "wheat_scaler.joblib",
+    ]
+    assert estimator.predict_yield("wheat", CONDITIONS[0])["estimated_yield"] > 0
+
+
+def test_cached_predictions_match_uncached(estimator, make_estimator):
+    cached = estimator
+    uncached = make_estimator(prediction_cache_size=0)
+    nearby = {**CONDITIONS[1], "temperature": 18.6, "rainfall": 421, "soil_ph": 7.08}
+
+    first = cached.predict_yield("rice", CONDITIONS[1])
+    again = cached.predict_yield("rice", nearby)
+    assert cached.prediction_cache.stats()["hits"] == 1
+    for result in (first, again):
+        expected = uncached.predict_yield("rice", CONDITIONS[1])
+        assert result["estimated_yield"].tobytes() == expected["estimated_yield"].tobytes()
+        assert np.array(result["confidence_interval"]).tobytes() == np.array(expected["confidence_interval"]).tobytes()
+
+    batch = cached.predict_yield_batch("rice", CONDITIONS * 3)
+    fresh = uncached.predict_yield_batch("rice", CONDITIONS * 3)
+    assert batch["estimated_yield"].tobytes() == fresh["estimated_yield"].tobytes()
+    assert batch["confidence_interval"].tobytes() == fresh["confidence_interval"].tobytes()
+
+
+def test_uncached_predictions_use_exact_inputs(estimator, make_estimator):
+    off_grid = {**CONDITIONS[0], "temperature": 22.86, "rainfall": 1233, "soil_ph": 6.47}
+    snapped = {**CONDITIONS[0], "temperature": 23.0, "rainfall": 1235, "soil_ph": 6.5}
+    uncached = make_estimator(prediction_cache_size=0)
+    mean, interval = _loop_prediction(uncached, "rice", off_grid)
+    exact = uncached.predict_yield("rice", off_grid)
+    assert exact["estimated_yield"] == mean
+    assert uncached.predict_yield_batch("rice", [off_grid])["confidence_interval"][0].tolist() == interval
+
+    # With the cache on, inputs snap to the quantization grid
+    assert estimator.predict_yield("rice", off_grid) == uncached.predict_yield("rice", snapped)
+    assert uncached.predict_yield("rice", snapped)["estimated_yield"] != exact["estimated_yield"]
+
+
+def test_new_model_version_invalidates_cache(make_estimator):
+    estimator = make_estimator(prediction_cache_size=2)
+    before = estimator.predict_yield("rice", CONDITIONS[0])["estimated_yield"]
+    assert estimator.update_model("rice", {"features": [[30, 1500, 70, 6.5, 3, 3, 2]], "yields": [500]}, wait=True)
+    assert len(estimator.prediction_cache) == 0
+    assert estimator.predict_yield("rice", CONDITIONS[0])["estimated_yield"] != before
+    estimator.predict_all_crops(CONDITIONS[1])
+    assert estimator.prediction_cache.stats()["evictions"] == 1
@@ -5,6 +5,8 @@ This package contains helper functions and utility modules.
 """
 
 from .weather_helpers import get_humidity_level, get_rainfall_level
+from .crop_index import CropIndex
+from .crop_scoring import LocationScoringEngine
 from .location_data import LiveLocationManager as LocationManager
 from .scheme_manager import SchemeManager  
 from .weather_api import WeatherAPI, WeatherService
@@ -13,6 +15,8 @@ from .yield_estimation import YieldEstimator
 __all__ = [
     'get_humidity_level', 
     'get_rainfall_level',
+    'CropIndex',
+    'LocationScoringEngine',
     'LocationManager',
     'SchemeManager',
     'WeatherAPI',
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# Async Weather Provider for Agri Wiz
+# Geocoding, forecast, current weather and soil lookups as coroutines on one aiohttp session
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from utils.geocode_cache import GeocodeCache
+from utils.soil_cache import SoilCache
+from utils.metrics import timed
+from utils.soil_profile import PROFILE_QUERY, SoilProfile
+from utils.http_client import (
+    CONNECT_TIMEOUT, READ_TIMEOUT, RETRIES, POOL_SIZE, RETRY_STATUSES, HostStats, backoff_delay,
+    upstream_url
+)
+
+GEOCODE_URL = "https://api.openweathermap.org/geo/1.0/direct"
+FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+SOIL_URL = "https://rest.isric.org/soilgrids/v2.0/properties/query"
+REVERSE_GEOCODE_URL = "https://nominatim.openstreetmap.org/reverse"
+
+# SoilGrids properties, depths and values requested by default
+SOIL_QUERY = (("phh2o",), ("0-5cm",), ("mean",))
+
+
+class AsyncWeatherProvider:
+    """Upstream weather and soil lookups as coroutines sharing one ClientSession.
+
+    The session is created on first use inside the running event loop and
+    caps open connections per host, so any number of lookups can be awaited
+    together without a thread each; the excess waits for a free connection.
+    Retryable statuses and connection errors are retried with the same
+    backoff as the synchronous client, and calls are counted per host.
+    With a geocode cache, place names it knows skip the geocoding call, and
+    with a soil cache, grid cells fetched before skip SoilGrids.
+    """
+
+    def __init__(self, connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 retries: Optional[int] = None, pool_size: Optional[int] = None,
+                 geocode_cache: Optional[GeocodeCache] = None, soil_cache: Optional[SoilCache] = None):
+        self.connect_timeout = connect_timeout or float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", CONNECT_TIMEOUT))
+        self.read_timeout = read_timeout or float(os.getenv("UPSTREAM_READ_TIMEOUT", READ_TIMEOUT))
+        self.retries = retries if retries is not None else int(os.getenv("UPSTREAM_RETRIES", RETRIES))
+        self.pool_size = pool_size or int(os.getenv("UPSTREAM_POOL_SIZE", POOL_SIZE))
+        self.geocode_cache = geocode_cache
+        self.soil_cache = soil_cache
+
+        # Endpoints, overridable to point at a local stand-in
+        self.geocode_url = GEOCODE_URL
+        self.forecast_url = FORECAST_URL
+        self.weather_url = WEATHER_URL
+        self.soil_url = SOIL_URL
+        self.reverse_geocode_url = REVERSE_GEOCODE_URL
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+                headers={"User-Agent": "AgriWiz/1.0"},
+            )
+        return self._session
+
+    def _host_stats(self, host: str) -> HostStats:
+        with self._lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = HostStats()
+            return stats
+
+    def _record(self, stats: HostStats, elapsed: float, error: bool, retry: bool):
+        with self._lock:
+            stats.requests += 1
+            stats.total_seconds += elapsed
+            stats.latencies.append(elapsed)
+            if error:
+                stats.errors += 1
+            if retry:
+                stats.retries += 1
+
+    async def get_json(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+                       timeout: Optional[float] = None, retries: Optional[int] = None):
+        """
+        GET a URL and decode its JSON body.
+
+        Args:
+            url: Full URL
+            params: Query parameters
+            headers: Extra request headers
+            timeout: Overall seconds allowed per attempt; defaults to the session's connect and read timeouts
+            retries: Extra attempts allowed; defaults to the provider setting
+
+        Returns:
+            The decoded JSON; error statuses and connection errors on the last attempt are raised
+        """
+        if retries is None:
+            retries = self.retries
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        stats = self._host_stats(urlsplit(url).netloc)
+        session = self._get_session()
+        target = upstream_url(url)
+
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            try:
+                async with session.get(target, params=params, headers=headers, timeout=request_timeout) as response:
+                    retry = response.status in RETRY_STATUSES and attempt < retries
+                    self._record(stats, time.perf_counter() - start,
+                                 response.status >= 500 or response.status == 429, retry)
+                    if not retry:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                    delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                retry = attempt < retries
+                self._record(stats, time.perf_counter() - start, True, retry)
+                if not retry:
+                    raise
+                logging.warning(f"Retrying GET {urlsplit(url).netloc} after error: {e!r}")
+                delay = backoff_delay(attempt)
+            await asyncio.sleep(delay)
+
+    async def geocode(self, location: str, api_key: str) -> Optional[Tuple[float, float]]:
+        """Coordinates of a place name, or None if OpenWeatherMap does not know it."""
+        # A memory hit or a local SQLite read, cheap enough to run on the event loop
+        if self.geocode_cache is not None:
+            cached = self.geocode_cache.get(location)
+            if cached is not None:
+                return cached or None
+        places = await self.get_json(self.geocode_url, params={"q": location, "limit": 1, "appid": api_key})
+        coordinates = (places[0]["lat"], places[0]["lon"]) if places else None
+        if self.geocode_cache is not None:
+            self.geocode_cache.put(location, coordinates)
+        return coordinates
+
+    async def forecast(self, lat: float, lon: float, api_key: str) -> Dict:
+        """Raw 5-day / 3-hour OpenWeatherMap forecast for coordinates."""
+        return await self.get_json(
+            self.forecast_url, params={"lat": lat, "lon": lon, "appid": api_key, "units": "metric"}
+        )
+
+    @timed("openweathermap_forecast")
+    async def location_forecast(self, location: str, api_key: str) -> Optional[Dict]:
+        """Raw forecast for a place name, or None if it cannot be geocoded."""
+        coordinates = await self.geocode(location, api_key)
+        if coordinates is None:
+            return None
+        return await self.forecast(*coordinates, api_key)
+
+    @timed("openweathermap_current")
+    async def current_weather(self, lat: float, lon: float, api_key: str) -> Dict:
+        """Raw OpenWeatherMap current weather for coordinates."""
+        return await self.get_json(
+            self.weather_url, params={"lat": lat, "lon": lon, "appid": api_key, "units": "metric"}
+        )
+
+    async def soil(self, lat: float, lon: float, properties: Iterable[str] = SOIL_QUERY[0],
+                   depths: Iterable[str] = SOIL_QUERY[1], values: Iterable[str] = SOIL_QUERY[2]) -> Dict:
+        """Raw SoilGrids v2 properties query for coordinates."""
+        query = (tuple(properties), tuple(depths), tuple(values))
+        if self.soil_cache is not None:
+            cached = self.soil_cache.get(lat, lon, query)
+            if cached is not None:
+                return cached
+        data = await self._query_soil(lat, lon, query)
+        if self.soil_cache is not None:
+            self.soil_cache.put(lat, lon, query, data)
+        return data
+
+    @timed("soilgrids_profile")
+    async def soil_profile(self, lat: float, lon: float) -> SoilProfile:
+        """Every profile property, depth and statistic for coordinates, fetched in one SoilGrids query.
+
+        Only the parsed array is cached, so a cached cell costs a small
+        base64 decode rather than a parse of the full SoilGrids document.
+        """
+        if self.soil_cache is not None:
+            cached = self.soil_cache.get(lat, lon, PROFILE_QUERY)
+            if cached is not None:
+                return SoilProfile.decode(cached)
+        profile = SoilProfile.from_soilgrids(await self._query_soil(lat, lon, PROFILE_QUERY))
+        if self.soil_cache is not None:
+            self.soil_cache.put(lat, lon, PROFILE_QUERY, profile.encode())
+        return profile
+
+    async def _query_soil(self, lat: float, lon: float, query: Sequence[Sequence[str]]) -> Dict:
+        params = [("lon", lon), ("lat", lat)]
+        params += [("property", p) for p in query[0]]
+        params += [("depth", d) for d in query[1]]
+        params += [("value", v) for v in query[2]]
+        return await self.get_json(self.soil_url, params=params)
+
+    async def reverse_geocode(self, lat: float, lon: float, timeout: Optional[float] = None) -> Dict:
+        """Raw Nominatim address lookup for coordinates."""
+        return await self.get_json(
+            self.reverse_geocode_url,
+            params={"lat": lat, "lon": lon, "format": "json"},
+            headers={"User-Agent": "AgriWiz/1.0 (agricultural-assistant)", "Accept-Language": "en-US,en;q=0.5"},
+            timeout=timeout,
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-host request, error, retry and latency figures."""
+        with self._lock:
+            return {host: stats.as_dict() for host, stats in self._stats.items()}
+
+
+class WeatherProvider:
+    """Synchronous facade running an AsyncWeatherProvider on a background event loop.
+
+    Flask handlers call the blocking methods below; each schedules coroutines
+    on the provider's loop and waits for the result, so a batch of lookups is
+    awaited together on one thread instead of occupying a thread per request.
+    Coroutines that already run on another loop await ``run_async`` instead.
+    """
+
+    def __init__(self, provider: Optional[AsyncWeatherProvider] = None):
+        self.provider = provider or AsyncWeatherProvider()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="weather-provider", daemon=True)
+        self._thread.start()
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the provider loop and return its result."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("WeatherProvider.run called from its own event loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def run_async(self, coro) -> asyncio.Future:
+        """Run a coroutine on the provider loop, returning a future awaitable from the caller's loop."""
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    def location_forecast(self, location: str, api_key: str) -> Optional[Dict]:
+        """Raw forecast for a place name, or None if it cannot be geocoded."""
+        return self.run(self.provider.location_forecast(location, api_key))
+
+    def location_forecasts(self, locations: Iterable[str], api_key: str) -> Dict[str, Optional[Dict]]:
+        """
+        Raw forecasts for many place names, fetched concurrently.
+
+        Returns:
+            Dictionary mapping each location to its forecast, or None if it
+            could not be geocoded or fetched
+        """
+        locations = list(dict.fromkeys(locations))
+
+        async def fetch_all():
+            return await asyncio.gather(
+                *(self.provider.location_forecast(location, api_key) for location in locations),
+                return_exceptions=True,
+            )
+
+        forecasts = {}
+        for location, result in zip(locations, self.run(fetch_all())):
+            if isinstance(result, Exception):
+                logging.error(f"Error fetching forecast for {location}: {result!r}")
+                result = None
+            forecasts[location] = result
+        return forecasts
+
+    def soil_profiles(self, points: Sequence[Tuple[float, float]]) -> List[Optional[SoilProfile]]:
+        """Soil profiles for many coordinates, fetched concurrently; None for a failed lookup."""
+        async def fetch_all():
+            return await asyncio.gather(*(self.provider.soil_profile(*point) for point in points),
+                                        return_exceptions=True)
+
+        profiles = []
+        for point, result in zip(points, self.run(fetch_all()) if points else []):
+            if isinstance(result, Exception):
+                logging.error(f"Error fetching soil data for {point[0]},{point[1]}: {result!r}")
+                result = None
+            profiles.append(result)
+        return profiles
+
+    def current_and_soil(self, lat: float, lon: float,
+                         api_key: str) -> Tuple[Optional[Dict], Optional[SoilProfile]]:
+        """Raw current weather and the soil profile for coordinates, fetched concurrently; None for a failed lookup."""
+        async def fetch_both():
+            return await asyncio.gather(
+                self.provider.current_weather(lat, lon, api_key),
+                self.provider.soil_profile(lat, lon),
+                return_exceptions=True,
+            )
+
+        results = self.run(fetch_both())
+        for name, result in zip(("weather", "soil"), results):
+            if isinstance(result, Exception):
+                logging.error(f"Error fetching live {name} for {lat},{lon}: {result!r}")
+        return tuple(None if isinstance(result, Exception) else result for result in results)
+
+    def stats(self) -> Dict[str, dict]:
+        return self.provider.stats()
+
+    def close(self):
+        """Close the session and stop the loop."""
+        self.run(self.provider.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_weather_provider(create: bool = True) -> Optional[WeatherProvider]:
+    """The process-wide weather provider, created on first use (None if create is False and there is none yet)."""
+    global _provider
+    if _provider is None and create:
+        with _provider_lock:
+            if _provider is None:
+                _provider = WeatherProvider(AsyncWeatherProvider(
+                    geocode_cache=GeocodeCache(), soil_cache=SoilCache()
+                ))
+    return _provider
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# Cache Store for Agri Wiz
+# Persistent key/value cache in SQLite with per-entry expiry and write-behind
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Default database shared by the weather caches (env WEATHER_CACHE_DB)
+DEFAULT_CACHE_DB = "data/processed/weather_cache.db"
+
+# Expiry for entries that should be kept until overwritten
+NO_EXPIRY = float("inf")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (namespace, expires_at);
+CREATE TABLE IF NOT EXISTS imports (
+    namespace TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (namespace, source)
+);
+"""
+
+
+class CacheStore:
+    """A namespaced, expiring key/value cache backed by an SQLite table.
+
+    Writes go to an in-memory buffer and are flushed in one transaction by a
+    background thread, so ``set`` never touches the disk on the request path
+    and costs the same however many entries are cached. SQLite in WAL mode
+    serialises writers across processes, so several workers can share one
+    database file. Expired entries are never returned and are deleted
+    periodically through the expiry index, ``stale_ttl`` seconds after
+    they expire; until then ``peek`` can still serve them as stale data.
+    """
+
+    def __init__(self, path: str, namespace: str, flush_interval: float = 0.5,
+                 purge_interval: float = 300, legacy_json: Optional[str] = None,
+                 legacy_expiry: Optional[Callable[[str, Any], Optional[float]]] = None,
+                 stale_ttl: float = 0):
+        """
+        Args:
+            path: SQLite database file, created on first use
+            namespace: Name separating this cache's keys from other caches in the file
+            flush_interval: Seconds between background flushes of buffered writes
+            purge_interval: Seconds between deletions of expired entries
+            legacy_json: JSON cache file to import once, on first use
+            legacy_expiry: Returns the expiry time for an imported (key, value), or None to skip it
+            stale_ttl: Seconds expired entries are kept for ``peek`` before being purged
+        """
+        self.path = path
+        self.namespace = namespace
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        self.legacy_json = legacy_json
+        self.legacy_expiry = legacy_expiry
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[str, tuple] = {}
+        self._flushing: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._ready = False
+        self._last_purge = time.time()
+        self._flusher = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection; SQLite connections are not shared between threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.executescript(SCHEMA)
+                    if self.legacy_json:
+                        self._import_legacy(conn)
+                    self._ready = True
+        return conn
+
+    def _import_legacy(self, conn: sqlite3.Connection):
+        """Import the legacy JSON cache once per database, whichever process gets there first."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            claimed = conn.execute(
+                "INSERT OR IGNORE INTO imports (namespace, source) VALUES (?, ?)",
+                (self.namespace, os.path.abspath(self.legacy_json)),
+            ).rowcount
+            imported = 0
+            if claimed and os.path.exists(self.legacy_json):
+                with open(self.legacy_json, "r") as f:
+                    entries = json.load(f)
+                now = time.time()
+                for key, value in entries.items():
+                    expires_at = self.legacy_expiry(key, value) if self.legacy_expiry else None
+                    if expires_at is None or expires_at <= now:
+                        continue
+                    conn.execute(
+                        "INSERT OR IGNORE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                        (self.namespace, key, json.dumps(value), expires_at),
+                    )
+                    imported += 1
+            conn.execute("COMMIT")
+            if imported:
+                logging.info(f"Imported {imported} entries from {self.legacy_json} into the {self.namespace} cache")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logging.error(f"Error importing legacy cache {self.legacy_json}: {e}")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None if it is missing or expired."""
+        entry = self.peek(key)
+        found = entry is not None and entry[1] > time.time()
+        value = entry[0] if found else None
+
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return value if found else None
+
+    def peek(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(value, expires_at) for a key even if it has expired, until it is purged; not counted in stats."""
+        with self._lock:
+            pending = self._pending.get(key) or self._flushing.get(key)
+        if pending is not None:
+            return pending
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Error reading {self.namespace} cache: {e}")
+            return None
+        return (json.loads(row[0]), row[1]) if row is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None):
+        """Cache a JSON-serialisable value until ``expires_at``, or for ``ttl`` seconds."""
+        if expires_at is None:
+            expires_at = time.time() + (ttl or 0)
+        with self._lock:
+            self._pending[key] = (value, expires_at)
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name=f"cache-flush-{self.namespace}", daemon=True
+                )
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write buffered entries to the database and purge expired ones when due."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        # Entries being written stay readable until they are committed
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushing = pending
+        now = time.time()
+        try:
+            conn = self._connection()
+            if pending:
+                rows = [(self.namespace, key, json.dumps(value), expires_at)
+                        for key, (value, expires_at) in pending.items()]
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)", rows
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            if now - self._last_purge >= self.purge_interval:
+                self.purge_expired()
+        except Exception as e:
+            logging.error(f"Error writing {self.namespace} cache: {e}")
+            # Keep the entries for the next flush unless newer values arrived meanwhile
+            with self._lock:
+                for key, entry in pending.items():
+                    self._pending.setdefault(key, entry)
+        finally:
+            with self._lock:
+                self._flushing = {}
+
+    def purge_expired(self) -> int:
+        """Delete entries expired more than stale_ttl ago; returns how many were removed."""
+        self._last_purge = time.time()
+        cursor = self._connection().execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, self._last_purge - self.stale_ttl),
+        )
+        return cursor.rowcount
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Every unexpired (key, value), including unflushed writes."""
+        self.flush()
+        rows = self._connection().execute(
+            "SELECT key, value FROM cache WHERE namespace = ? AND expires_at > ?", (self.namespace, time.time())
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def __len__(self) -> int:
+        """Number of unexpired entries, including unflushed writes."""
+        self.flush()
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ? AND expires_at > ?", (self.namespace, time.time())
+        ).fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "pending": len(self._pending)}
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# Compiled Forest for Agri Wiz
+# Tree ensembles flattened into contiguous NumPy arrays and evaluated without sklearn
+
+import os
+import threading
+
+import numpy as np
+
+COMPILED_SUFFIX = "_forest.npz"
+
+# Rows traversed together; keeps the (rows, trees) working arrays cache sized
+CHUNK_ROWS = 512
+
+
+class CompiledForest:
+    """A regression forest stored as flat node arrays.
+
+    Every tree's nodes live in the same ``feature``, ``threshold``, ``left``,
+    ``right`` and ``value`` arrays; ``roots`` holds the index of each tree's
+    root. Leaves point to themselves, so a fixed number of steps walks every
+    (row, tree) pair to its leaf at once. Thresholds are in raw input units:
+    the scaler the forest was trained behind is folded into them on export.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, feature_importances):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float32)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.feature_importances_ = np.asarray(feature_importances, dtype=np.float64)
+
+        # Working copies for traversal: native index types avoid a cast on every
+        # step, and children are interleaved so one gather picks the next node
+        self._feature = self.feature.astype(np.intp)
+        self._threshold = self.threshold.astype(np.float64)
+        self._children = np.column_stack([self.right, self.left]).ravel().astype(np.intp)
+        self._roots = self.roots.astype(np.intp)
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None) -> "CompiledForest":
+        """Flatten a fitted sklearn forest, folding an optional StandardScaler into its thresholds."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            own_index = np.arange(offset, offset + n_nodes)
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            threshold = np.where(is_leaf, 0.0, tree.threshold)
+            if scaler is not None:
+                # x_scaled <= t  <=>  x <= t * scale + mean, since scale > 0
+                scale = scaler.scale_ if scaler.scale_ is not None else np.ones(model.n_features_in_)
+                mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(model.n_features_in_)
+                threshold = np.where(is_leaf, 0.0, threshold * scale[feature] + mean[feature])
+
+            # Round down to float32 so "x <= threshold" keeps its answer for every
+            # float32-representable x, e.g. integer-coded categories sitting on a split
+            threshold32 = threshold.astype(np.float32)
+            rounded_up = threshold32 > threshold
+            threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+
+            features.append(feature)
+            thresholds.append(threshold32)
+            lefts.append(np.where(is_leaf, own_index, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own_index, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.concatenate(values),
+            np.array(roots),
+            max(estimator.tree_.max_depth for estimator in model.estimators_),
+            model.feature_importances_,
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (
+            self.feature, self.threshold, self.left, self.right, self.value, self.roots, self.feature_importances_,
+            self._feature, self._threshold, self._children, self._roots
+        ))
+
+    def tree_predictions(self, X) -> np.ndarray:
+        """Predictions of every tree for every raw feature row, shaped (rows, trees)."""
+        X = np.asarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        predictions = np.empty((n_rows, self.n_trees))
+        for start in range(0, n_rows, CHUNK_ROWS):
+            chunk = np.ascontiguousarray(X[start:start + CHUNK_ROWS])
+            flat = chunk.ravel()
+            row_offsets = (np.arange(len(chunk)) * n_features)[:, None]
+            node = np.repeat(self._roots[None, :], len(chunk), axis=0)
+            for _ in range(self.max_depth):
+                go_left = flat.take(row_offsets + self._feature.take(node)) <= self._threshold.take(node)
+                node = self._children.take(2 * node + go_left)
+            predictions[start:start + CHUNK_ROWS] = self.value.take(node)
+        return predictions
+
+    def save(self, path: str):
+        """Write the forest to an .npz file, replacing any existing file atomically."""
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    feature=self.feature,
+                    threshold=self.threshold,
+                    left=self.left,
+                    right=self.right,
+                    value=self.value,
+                    roots=self.roots,
+                    max_depth=np.array(self.max_depth),
+                    feature_importances=self.feature_importances_,
+                )
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        with np.load(path) as data:
+            return cls(
+                data["feature"],
+                data["threshold"],
+                data["left"],
+                data["right"],
+                data["value"],
+                data["roots"],
+                data["max_depth"],
+                data["feature_importances"],
+            )
@@ -0,0 +1,153 @@
+"""
+Compiled crop catalog index for Agri Wiz.
+
+The crop catalog stores its attributes as comma-separated strings. This
+module splits and normalises them once, when the catalog is loaded, into
+an inverted index that maps every attribute value to a bitmask of crop
+positions. Matching a query then costs a few bitwise operations per
+criterion instead of re-parsing every crop row on every request.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Comma-separated attributes that are matched case-insensitively
+INDEXED_FIELDS = (
+    "soil_types",
+    "climates",
+    "seasons",
+    "humidity_preference",
+    "soil_fertility",
+)
+
+# "min-max" numeric attributes
+RANGE_FIELDS = ("ph_range", "temperature_range")
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of the set bits in mask, lowest first."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def _parse_range(value) -> Optional[Tuple[float, float]]:
+    """Parse a "min-max" string, returning None if it is not a valid range."""
+    try:
+        low, high = map(float, value.split("-"))
+    except (ValueError, AttributeError):
+        return None
+    return low, high
+
+
+class CropIndex:
+    """Inverted bitmask index over a list of crop dictionaries.
+
+    Bit ``i`` of every mask refers to ``crops[i]``.
+    """
+
+    def __init__(self, crops: Optional[List[Dict]] = None):
+        self.crops: List[Dict] = []
+        self.all_mask = 0
+        self._postings: Dict[str, Dict[str, int]] = {field: {} for field in INDEXED_FIELDS}
+        self._present: Dict[str, int] = {field: 0 for field in INDEXED_FIELDS + RANGE_FIELDS}
+        self._ranges: Dict[str, List[Tuple[int, float, float]]] = {field: [] for field in RANGE_FIELDS}
+        self._by_name: Dict[str, Dict] = {}
+        for crop in crops or []:
+            self.add(crop)
+
+    def __len__(self) -> int:
+        return len(self.crops)
+
+    def add(self, crop: Dict):
+        """Append a crop to the index."""
+        bit = 1 << len(self.crops)
+        self.crops.append(crop)
+        self.all_mask |= bit
+
+        for field in INDEXED_FIELDS:
+            if field not in crop:
+                continue
+            self._present[field] |= bit
+            postings = self._postings[field]
+            for value in (crop[field] or "").split(","):
+                key = value.strip().lower()
+                postings[key] = postings.get(key, 0) | bit
+
+        for field in RANGE_FIELDS:
+            if field not in crop:
+                continue
+            self._present[field] |= bit
+            parsed = _parse_range(crop[field])
+            if parsed:
+                self._ranges[field].append((bit, parsed[0], parsed[1]))
+
+        name = crop.get("crop_name")
+        if isinstance(name, str):
+            # Keep the first crop registered under a name, like a linear scan would
+            self._by_name.setdefault(name.lower(), crop)
+
+    def find(self, crop_name: str) -> Optional[Dict]:
+        """Case-insensitive lookup of a crop by name."""
+        return self._by_name.get(crop_name.lower())
+
+    def mask(self, field: str, value: str) -> int:
+        """Bitmask of crops whose ``field`` list contains ``value``."""
+        return self._postings[field].get(value.lower(), 0)
+
+    def present(self, field: str) -> int:
+        """Bitmask of crops that define ``field`` at all."""
+        return self._present[field]
+
+    def range_mask(self, field: str, value) -> int:
+        """Bitmask of crops whose ``field`` range contains ``value``."""
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return 0
+        mask = 0
+        for bit, low, high in self._ranges[field]:
+            if low <= number <= high:
+                mask |= bit
+        return mask
+
+    def score(self, criteria: List[Tuple[int, int, int]], min_percentage: float) -> List[Tuple[int, float, int, int]]:
+        """
+        Score every crop against a list of weighted criteria.
+
+        Args:
+            criteria: (weight, matched_mask, present_mask) tuples. A crop
+                earns ``weight`` points when its bit is set in matched_mask,
+                and the criterion only counts towards its maximum score when
+                its bit is set in present_mask.
+            min_percentage: Minimum match percentage to include a crop.
+
+        Returns:
+            (crop_index, match_percentage, score, max_score) tuples sorted by
+            match percentage, highest first, ties kept in catalog order.
+        """
+        # Partition the catalog into groups of crops sharing the same
+        # (score, max_score); the number of groups is bounded by the
+        # distinct match patterns, not by the catalog size.
+        groups = [(self.all_mask, 0, 0)] if self.all_mask else []
+        for weight, matched, present in criteria:
+            split = []
+            for mask, score, max_score in groups:
+                counted = mask & present
+                for part, part_score, part_max in (
+                    (counted & matched, score + weight, max_score + weight),
+                    (counted & ~matched, score, max_score + weight),
+                    (mask & ~present, score, max_score),
+                ):
+                    if part:
+                        split.append((part, part_score, part_max))
+            groups = split
+
+        results = []
+        for mask, score, max_score in groups:
+            match_percentage = (score / max_score * 100) if max_score > 0 else 0
+            if match_percentage >= min_percentage:
+                results.extend((i, match_percentage, score, max_score) for i in iter_bits(mask))
+
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results
@@ -0,0 +1,149 @@
+"""
+Vectorized location scoring for Agri Wiz.
+
+Keeps the crop attributes used by location-based recommendations as a
+precomputed one-hot matrix (crops x attribute values), so a location query
+is scored against the whole catalog with a single matrix product instead
+of a per-crop Python loop.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import timed
+
+# Column blocks of the one-hot matrix, in query column order
+SCORED_FIELDS = ("soil_types", "climates", "seasons", "humidity_preference", "soil_fertility")
+
+# Climates that earn partial credit when the location climate does not match
+FALLBACK_CLIMATES = ("subtropical", "temperate")
+
+MIN_MATCH_PERCENTAGE = 40
+
+# (soil_types, climate, season, humidity, soil_fertility)
+LocationQuery = Tuple[List[str], str, str, Optional[str], Optional[str]]
+
+
+class LocationScoringEngine:
+    """Scores crops against location conditions using one-hot NumPy matrices.
+
+    Values are compared exactly as stored (stripped, case-sensitive), which
+    is how the location scoring has always matched them.
+    """
+
+    def __init__(self, crops: Iterable[Dict]):
+        self.crops: List[Dict] = list(crops)
+        self._columns: Dict[str, Dict[str, int]] = {field: {} for field in SCORED_FIELDS}
+
+        entries = []
+        for i, crop in enumerate(self.crops):
+            for field in SCORED_FIELDS:
+                if field not in crop:
+                    continue
+                columns = self._columns[field]
+                for value in (crop[field] or "").split(","):
+                    entries.append((i, field, columns.setdefault(value.strip(), len(columns))))
+
+        # Lay the field blocks out side by side
+        self._offsets: Dict[str, int] = {}
+        width = 0
+        for field in SCORED_FIELDS:
+            self._offsets[field] = width
+            width += len(self._columns[field])
+
+        self._onehot = np.zeros((len(self.crops), width), dtype=np.float32)
+        for i, field, column in entries:
+            self._onehot[i, self._offsets[field] + column] = 1
+
+        self._has_humidity = np.array(["humidity_preference" in crop for crop in self.crops], dtype=bool)
+        self._has_fertility = np.array(["soil_fertility" in crop for crop in self.crops], dtype=bool)
+        self._fallback_climate = self._hits("climates", FALLBACK_CLIMATES)
+
+    def _hits(self, field: str, values: Iterable[str]) -> np.ndarray:
+        """Boolean vector of crops whose ``field`` list contains any of values."""
+        query = np.zeros(self._onehot.shape[1], dtype=np.float32)
+        self._set_query(query, field, values)
+        return (self._onehot @ query) > 0
+
+    def _set_query(self, query: np.ndarray, field: str, values: Iterable[str]):
+        columns = self._columns[field]
+        for value in values:
+            column = columns.get(value)
+            if column is not None:
+                query[self._offsets[field] + column] = 1
+
+    @timed("crop_scoring")
+    def score(self, soil_types: List[str], climate: str, season: str,
+              humidity: Optional[str] = None, soil_fertility: Optional[str] = None) -> List[Tuple[Dict, float]]:
+        """
+        Score every crop for a location.
+
+        Args:
+            soil_types: Soil types common at the location
+            climate: Location climate
+            season: Current season at the location
+            humidity: Optional humidity level ("low", "medium", "high")
+            soil_fertility: Optional soil fertility level
+
+        Returns:
+            (crop, match_percentage) tuples for crops with at least a 40%
+            match, highest first, ties kept in catalog order.
+        """
+        return self._score_batch([(soil_types, climate, season, humidity, soil_fertility)])[0]
+
+    @timed("crop_scoring_batch")
+    def score_batch(self, queries: List[LocationQuery]) -> List[List[Tuple[Dict, float]]]:
+        """
+        Score every crop for several locations with a single matrix product.
+
+        Args:
+            queries: (soil_types, climate, season, humidity, soil_fertility)
+                tuples, with the same meaning as the arguments of score().
+
+        Returns:
+            One score() result per query, in query order.
+        """
+        return self._score_batch(queries)
+
+    def _score_batch(self, queries: List[LocationQuery]) -> List[List[Tuple[Dict, float]]]:
+        # Untimed, so score() records one stage rather than two nested ones
+        n_fields = len(SCORED_FIELDS)
+
+        # One query column per scored field per location
+        query = np.zeros((self._onehot.shape[1], n_fields * len(queries)), dtype=np.float32)
+        for q, (soil_types, climate, season, humidity, soil_fertility) in enumerate(queries):
+            base = q * n_fields
+            self._set_query(query[:, base], "soil_types", soil_types)
+            self._set_query(query[:, base + 1], "climates", [climate])
+            self._set_query(query[:, base + 2], "seasons", [season])
+            if humidity:
+                self._set_query(query[:, base + 3], "humidity_preference", [humidity])
+            if soil_fertility:
+                self._set_query(query[:, base + 4], "soil_fertility", [soil_fertility])
+
+        matched = ((self._onehot @ query) > 0).reshape(len(self.crops), len(queries), n_fields)
+
+        # Optional criteria only count for queries that set them
+        use_humidity = np.array([bool(q[3]) for q in queries], dtype=bool)
+        use_fertility = np.array([bool(q[4]) for q in queries], dtype=bool)
+        humidity_counted = self._has_humidity[:, None] & use_humidity
+        fertility_counted = self._has_fertility[:, None] & use_fertility
+
+        score = (
+            2 * matched[:, :, 0]
+            + np.where(matched[:, :, 1], 3, self._fallback_climate[:, None])
+            + 2 * matched[:, :, 2]
+            + (matched[:, :, 3] & humidity_counted)
+            + (matched[:, :, 4] & fertility_counted)
+        )
+        max_score = 7 + humidity_counted.astype(int) + fertility_counted
+        match_percentage = score / max_score * 100
+
+        results = []
+        for q in range(len(queries)):
+            column = match_percentage[:, q]
+            selected = np.flatnonzero(column >= MIN_MATCH_PERCENTAGE)
+            selected = selected[np.argsort(-column[selected], kind="stable")]
+            results.append([(self.crops[i], float(column[i])) for i in selected])
+        return results
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# Geocode Cache for Agri Wiz
+# Place name to coordinates, kept forever and seeded from a bundled gazetteer
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from utils.cache_store import CacheStore, DEFAULT_CACHE_DB, NO_EXPIRY
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAZETTEER_PATH = os.path.join(BASE_DIR, "data", "raw", "gazetteer.json")
+LOCATION_DATA_PATH = os.path.join(BASE_DIR, "data", "processed", "location_data.json")
+
+# Seconds an unknown place name is remembered before it is looked up again (env GEOCODE_NEGATIVE_TTL)
+NEGATIVE_TTL = 600
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.strip().lower().split())
+
+
+class GeocodeCache:
+    """Coordinates of place names, without expiry.
+
+    A place does not move, so successful lookups are cached forever; names
+    the geocoder does not know are remembered for ``negative_ttl`` seconds.
+    Entries are persisted through a CacheStore and kept in memory once read,
+    and the bundled gazetteer is loaded into memory up front so the known
+    locations and districts never reach the geocoder at all.
+    """
+
+    def __init__(self, path: Optional[str] = None, negative_ttl: Optional[float] = None,
+                 gazetteer_path: Optional[str] = GAZETTEER_PATH,
+                 location_data_path: Optional[str] = LOCATION_DATA_PATH):
+        """
+        Args:
+            path: SQLite database file; defaults to the shared weather cache (env WEATHER_CACHE_DB)
+            negative_ttl: Seconds to remember failed lookups (env GEOCODE_NEGATIVE_TTL)
+            gazetteer_path: JSON gazetteer of {"locations": {...}, "districts": {...}} with lat/lon; None skips seeding
+            location_data_path: Location database whose entries the gazetteer should cover
+        """
+        self.store = CacheStore(path or os.getenv("WEATHER_CACHE_DB", DEFAULT_CACHE_DB), "geocode")
+        self.negative_ttl = negative_ttl if negative_ttl is not None else float(
+            os.getenv("GEOCODE_NEGATIVE_TTL", NEGATIVE_TTL)
+        )
+        self.hits = 0
+        self.misses = 0
+        self._known: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        if gazetteer_path:
+            self.seed(gazetteer_path, location_data_path)
+
+    def seed(self, gazetteer_path: str, location_data_path: Optional[str] = None) -> int:
+        """Load a gazetteer's coordinates into memory; returns how many places were added."""
+        try:
+            with open(gazetteer_path, "r") as f:
+                gazetteer = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Geocode cache not seeded, cannot read {gazetteer_path}: {e}")
+            return 0
+
+        places = {}
+        for section in ("locations", "districts"):
+            for name, entry in gazetteer.get(section, {}).items():
+                places[_normalize(name)] = (float(entry["lat"]), float(entry["lon"]))
+        with self._lock:
+            self._known.update(places)
+
+        if location_data_path and os.path.exists(location_data_path):
+            with open(location_data_path, "r") as f:
+                missing = [name for name in json.load(f) if _normalize(name) not in places]
+            if missing:
+                logging.warning(f"Gazetteer has no coordinates for: {', '.join(missing)}")
+        return len(places)
+
+    def get(self, name: str) -> Optional[Tuple]:
+        """
+        Look up a place name.
+
+        Returns:
+            (lat, lon) if known, () if a recent lookup found nothing, or None if it must be geocoded
+        """
+        key = _normalize(name)
+        coordinates = self._known.get(key)
+        if coordinates is None:
+            value = self.store.get(key)
+            if value is not None:
+                coordinates = tuple(value)
+                if coordinates:
+                    with self._lock:
+                        self._known[key] = coordinates
+        with self._lock:
+            if coordinates is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return coordinates
+
+    def put(self, name: str, coordinates: Optional[Tuple[float, float]]):
+        """Record a lookup result; None records that the geocoder did not know the name."""
+        key = _normalize(name)
+        if coordinates is None:
+            self.store.set(key, [], ttl=self.negative_ttl)
+            return
+        coordinates = (float(coordinates[0]), float(coordinates[1]))
+        with self._lock:
+            self._known[key] = coordinates
+        self.store.set(key, list(coordinates), expires_at=NO_EXPIRY)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"known": len(self._known), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# Upstream HTTP Client for Agri Wiz
+# One pooled, keep-alive session shared by every external integration
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+# Defaults, each overridable through the environment
+CONNECT_TIMEOUT = 3.05  # UPSTREAM_CONNECT_TIMEOUT, seconds
+READ_TIMEOUT = 10  # UPSTREAM_READ_TIMEOUT, seconds
+RETRIES = 2  # UPSTREAM_RETRIES, extra attempts after the first
+POOL_SIZE = 20  # UPSTREAM_POOL_SIZE, kept-alive connections per host
+
+# Responses worth retrying; anything else is returned to the caller as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+BACKOFF_BASE = 0.2
+BACKOFF_MAX = 5.0
+
+# Recent latencies kept per host for percentiles
+LATENCY_WINDOW = 1000
+
+
+def upstream_url(url: str) -> str:
+    """
+    Where a request for an upstream URL is actually sent.
+
+    When UPSTREAM_BASE_URL is set (e.g. http://127.0.0.1:8765, a stand-in
+    started with ``python -m bench.upstream``), every upstream request goes
+    to that server instead, with the original host as the first path
+    segment: https://api.openweathermap.org/data/2.5/weather becomes
+    http://127.0.0.1:8765/api.openweathermap.org/data/2.5/weather.
+    """
+    base = os.getenv("UPSTREAM_BASE_URL")
+    if not base:
+        return url
+    parts = urlsplit(url)
+    return f"{base.rstrip('/')}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number attempt + 1: Retry-After if given, else full jitter."""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class HostStats:
+    """Request counts and latencies for one upstream host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def as_dict(self) -> dict:
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "mean_ms": round(self.total_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+            "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+            "max_ms": round(float(latencies.max()) * 1000, 2),
+        }
+
+
+class UpstreamClient:
+    """A requests Session with per-host connection pools, timeouts and retries.
+
+    Connections are kept alive and reused across calls and threads, so only
+    the first request to a host pays for the TCP and TLS handshake. Failed
+    connections, timeouts and retryable statuses on idempotent requests are
+    retried with exponential backoff and full jitter, honouring Retry-After.
+    """
+
+    def __init__(self, connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 retries: Optional[int] = None, pool_size: Optional[int] = None):
+        self.connect_timeout = connect_timeout or float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", CONNECT_TIMEOUT))
+        self.read_timeout = read_timeout or float(os.getenv("UPSTREAM_READ_TIMEOUT", READ_TIMEOUT))
+        self.retries = retries if retries is not None else int(os.getenv("UPSTREAM_RETRIES", RETRIES))
+        pool_size = pool_size or int(os.getenv("UPSTREAM_POOL_SIZE", POOL_SIZE))
+
+        self.session = requests.Session()
+        # Retries are handled here, not by urllib3, so they can be counted per host
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "AgriWiz/1.0"
+
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+    def _host_stats(self, host: str) -> HostStats:
+        with self._lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = HostStats()
+            return stats
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared session.
+
+        Args:
+            method: HTTP method
+            url: Full URL
+            retries: Extra attempts allowed; defaults to the client setting (only idempotent methods retry)
+            **kwargs: Passed to requests, e.g. params, headers, or timeout to override the defaults
+
+        Returns:
+            The final response; connection errors and timeouts on the last attempt are raised
+        """
+        method = method.upper()
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        if retries is None:
+            retries = self.retries
+        if method not in IDEMPOTENT_METHODS:
+            retries = 0
+        stats = self._host_stats(urlsplit(url).netloc)
+        target = upstream_url(url)
+
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, target, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    stats.requests += 1
+                    stats.errors += 1
+                    stats.total_seconds += elapsed
+                    stats.latencies.append(elapsed)
+                if attempt == retries:
+                    raise
+                logging.warning(f"Retrying {method} {urlsplit(url).netloc} after error: {e}")
+                with self._lock:
+                    stats.retries += 1
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            elapsed = time.perf_counter() - start
+            retry = response.status_code in RETRY_STATUSES and attempt < retries
+            with self._lock:
+                stats.requests += 1
+                stats.total_seconds += elapsed
+                stats.latencies.append(elapsed)
+                if response.status_code >= 500 or response.status_code == 429:
+                    stats.errors += 1
+                if retry:
+                    stats.retries += 1
+            if not retry:
+                return response
+            delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+            response.close()
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-host request, error, retry and latency figures."""
+        with self._lock:
+            return {host: stats.as_dict() for host, stats in self._stats.items()}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> UpstreamClient:
+    """The process-wide upstream client, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = UpstreamClient()
+    return _client
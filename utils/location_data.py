@@ -1,10 +1,13 @@
-import requests
 import os
+import json
 import pytz
 
 from datetime import datetime
 from dotenv import load_dotenv
 
+from utils.async_weather import get_weather_provider
+from utils.metrics import timed
+
 load_dotenv()
 
 
@@ -15,109 +18,121 @@ class LiveLocationManager:
         self.openweather_api_key = openweather_api_key or os.getenv(
             "OPENWEATHER_API_KEY"
         )
+        self.location_data = self._load_location_data()
+        self.weather_provider = get_weather_provider()
+
+    def _load_location_data(self):
+        """Load static location information (soil, climate, seasons) from JSON."""
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(base_dir, "data", "processed", "location_data.json")
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except Exception as e:
+            print(f"Error loading location data: {e}")
+            return {}
 
+    def get_location_info(self, location_name):
+        """Get static agricultural information for a location, or None if unknown."""
+        if not location_name:
+            return None
+        return self.location_data.get(location_name.strip().lower())
 
+    @timed("live_weather")
     def get_live_weather(self, lat, lon):
         """Fetch detailed live weather data from OpenWeatherMap API."""
         if not self.openweather_api_key:
             raise ValueError("OpenWeatherMap API key is missing.")
 
-        print("openweather_api_key", self.openweather_api_key)
-        print("lat", lat)
-        print("lon", lon)
-
         try:
-            # Current weather endpoint
-            url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={self.openweather_api_key}&units=metric"
-            response = requests.get(url)
-            data = response.json()
-
-            print("data", data)
-
-            # Convert sunrise/sunset to local time (using Indian timezone)
-            timezone = pytz.timezone("Asia/Kolkata")
-            print("this is running 39")
-            sunrise = (
-                datetime.utcfromtimestamp(data["sys"]["sunrise"])
-                .replace(tzinfo=pytz.utc)
-                .astimezone(timezone)
-                .strftime("%#I:%M %p")
+            data = self.weather_provider.run(
+                self.weather_provider.provider.current_weather(lat, lon, self.openweather_api_key)
             )
-            print("this is running 46")
-            sunset = (
-                datetime.utcfromtimestamp(data["sys"]["sunset"])
-                .replace(tzinfo=pytz.utc)
-                .astimezone(timezone)
-                .strftime("%#I:%M %p")
-            )
-            print("this is running 53") 
-            
-
-            print("return_data", {
-                "temperature": data["main"]["temp"],
-                "feels_like": data["main"]["feels_like"],
-                "humidity": data["main"]["humidity"],
-                "wind_speed": data["wind"]["speed"],
-                "wind_direction": data["wind"]["deg"],
-                "pressure": data["main"]["pressure"],
-                "visibility_km": data.get("visibility", 10000) / 1000,  # default to 10 km
-                "cloud_cover": data["clouds"]["all"],  # %
-                "dew_point": None,  # Needs calculation or OneCall API
-                "sunrise": sunrise,
-                "sunset": sunset,
-                "weather_description": data["weather"][0]["description"].capitalize(),
-                "rainfall_mm": data.get("rain", {}).get("1h", 0),
-            })
-            return {
-                "temperature": data["main"]["temp"],
-                "feels_like": data["main"]["feels_like"],
-                "humidity": data["main"]["humidity"],
-                "wind_speed": data["wind"]["speed"],
-                "wind_direction": data["wind"]["deg"],
-                "pressure": data["main"]["pressure"],
-                "visibility_km": data.get("visibility", 10000) / 1000,  # default to 10 km
-                "cloud_cover": data["clouds"]["all"],  # %
-                "dew_point": None,  # Needs calculation or OneCall API
-                "sunrise": sunrise,
-                "sunset": sunset,
-                "weather_description": data["weather"][0]["description"].capitalize(),
-                "rainfall_mm": data.get("rain", {}).get("1h", 0),
-            }
-
+            return self._parse_live_weather(data)
         except Exception as e:
             print(f"Error fetching weather: {e}")
             return {}
 
-
+    @timed("live_soil")
     def get_live_soil_data(self, lat, lon):
-        """Fetch live soil pH data using SoilGrids API v2."""
+        """Fetch live soil properties using SoilGrids API v2."""
         try:
-            url = (
-                "https://rest.isric.org/soilgrids/v2.0/properties/query"
-                f"?lon={lon}&lat={lat}"
-                "&property=phh2o"
-                "&depth=0-5cm"
-                "&value=mean"
-            )
-            response = requests.get(url)
-            print(f"[DEBUG] SoilGrids API URL: {url}")
-            print(f"[DEBUG] SoilGrids API status code: {response.status_code}")
-            data = response.json()
-            print(f"[DEBUG] Full SoilGrids response: {data}")
-
-            # Extract pH value for 0-5cm depth, mean
-            phh2o = None
-            try:
-                phh2o = data["properties"]["phh2o"]["values"]["0-5cm"]["mean"]
-            except Exception as e:
-                print(f"[DEBUG] Error extracting pH: {e}")
-
-            print(f"[DEBUG] Extracted soil pH: {phh2o}")
-            return {"soil_ph": phh2o}
+            profile = self.weather_provider.run(self.weather_provider.provider.soil_profile(lat, lon))
+            return self._parse_soil(profile)
         except Exception as e:
             print(f"Error fetching soil data: {e}")
             return {}
 
+    @timed("live_conditions")
+    def get_live_conditions(self, lat, lon):
+        """
+        Fetch live weather and soil data for coordinates concurrently.
+
+        Returns:
+            (weather, soil) tuple shaped like get_live_weather and
+            get_live_soil_data, with {} for a lookup that failed
+        """
+        if not self.openweather_api_key:
+            raise ValueError("OpenWeatherMap API key is missing.")
+
+        weather_data, profile = self.weather_provider.current_and_soil(lat, lon, self.openweather_api_key)
+        weather, soil = {}, {}
+        try:
+            if weather_data is not None:
+                weather = self._parse_live_weather(weather_data)
+        except Exception as e:
+            print(f"Error fetching weather: {e}")
+        try:
+            if profile is not None:
+                soil = self._parse_soil(profile)
+        except Exception as e:
+            print(f"Error fetching soil data: {e}")
+        return weather, soil
+
+    def _parse_live_weather(self, data):
+        """Flatten an OpenWeatherMap current weather response."""
+        # Convert sunrise/sunset to local time (using Indian timezone)
+        timezone = pytz.timezone("Asia/Kolkata")
+        sunrise = (
+            datetime.utcfromtimestamp(data["sys"]["sunrise"])
+            .replace(tzinfo=pytz.utc)
+            .astimezone(timezone)
+            .strftime("%#I:%M %p")
+        )
+        sunset = (
+            datetime.utcfromtimestamp(data["sys"]["sunset"])
+            .replace(tzinfo=pytz.utc)
+            .astimezone(timezone)
+            .strftime("%#I:%M %p")
+        )
+
+        return {
+            "temperature": data["main"]["temp"],
+            "feels_like": data["main"]["feels_like"],
+            "humidity": data["main"]["humidity"],
+            "wind_speed": data["wind"]["speed"],
+            "wind_direction": data["wind"]["deg"],
+            "pressure": data["main"]["pressure"],
+            "visibility_km": data.get("visibility", 10000) / 1000,  # default to 10 km
+            "cloud_cover": data["clouds"]["all"],  # %
+            "dew_point": None,  # Needs calculation or OneCall API
+            "sunrise": sunrise,
+            "sunset": sunset,
+            "weather_description": data["weather"][0]["description"].capitalize(),
+            "rainfall_mm": data.get("rain", {}).get("1h", 0),
+        }
+
+    def _parse_soil(self, profile):
+        """Summarize a SoilProfile: topsoil pH, fertility and the 0-5cm mean of every property."""
+        soil_ph = profile.get("phh2o")
+        if soil_ph is None:
+            soil_ph = profile.get("phh2o", statistic="Q0.5")
+        return {
+            "soil_ph": soil_ph,
+            "soil_fertility": profile.fertility(),
+            "topsoil": profile.topsoil(),
+        }
+
 
 if __name__ == "__main__":
     # Example coordinates: Pune, India
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# Request Metrics for Agri Wiz
+# Per-request stage timing and a Prometheus text exposition of latencies, upstream calls and errors
+
+import time
+import asyncio
+import threading
+import functools
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import request  # type: ignore
+
+EXTENSION_KEY = "metrics"
+
+# Histogram bucket upper bounds in seconds; in-memory stages take well under 1 ms
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Responses counted as request errors
+ERROR_STATUS = 500
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, label_values: Tuple = ()) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines += [f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    """Observation counts per bucket, with their sum and count, per label set."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[Tuple, list] = {}  # label values -> [bucket counts (last is +Inf), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: Tuple, seconds: float):
+        self.observe_many([(label_values, seconds)])
+
+    def observe_many(self, observations: List[Tuple[Tuple, float]]):
+        """Record (label values, seconds) pairs under one lock acquisition."""
+        with self._lock:
+            for label_values, seconds in observations:
+                series = self._series.get(label_values)
+                if series is None:
+                    series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                series[0][bisect_left(self.buckets, seconds)] += 1
+                series[1] += seconds
+                series[2] += 1
+
+    def count(self, label_values: Tuple = ()) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, [list(counts), total, count]) for key, (counts, total, count) in self._series.items())
+        bounds = [_format_number(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, 'le="' + bound + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+def upstream_collector() -> List[str]:
+    """Request, error and retry counts per upstream host, summed over the sync and async clients."""
+    from utils.async_weather import get_weather_provider
+    from utils.http_client import get_client
+
+    totals: Dict[str, List[int]] = {}
+    sources = [get_client().stats()]
+    provider = get_weather_provider(create=False)
+    if provider is not None:
+        sources.append(provider.stats())
+    for stats in sources:
+        for host, host_stats in stats.items():
+            total = totals.setdefault(host, [0, 0, 0])
+            total[0] += host_stats["requests"]
+            total[1] += host_stats["errors"]
+            total[2] += host_stats["retries"]
+
+    lines = []
+    for index, (suffix, help_text) in enumerate([
+        ("requests_total", "Requests sent to an upstream host, including retries"),
+        ("errors_total", "Upstream requests that failed, timed out or returned 429 or 5xx"),
+        ("retries_total", "Upstream requests that were retried"),
+    ]):
+        name = f"agriwiz_upstream_{suffix}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{host="{_escape(host)}"}} {total[index]}' for host, total in sorted(totals.items())]
+    return lines
+
+
+class _RequestState(threading.local):
+    """Start time and stages of the request on this thread; class defaults avoid getattr fallbacks."""
+    start: Optional[float] = None
+    stages: Optional[List[Tuple[str, float, bool]]] = None
+
+
+class Metrics:
+    """Request and stage latencies, request and stage errors, and scrape-time collectors.
+
+    Request timing hooks into Flask's before/after_request. Stage timing
+    comes from ``span`` and ``timed`` around the expensive calls. A span on
+    the request's own thread only appends to a per-request list, folded
+    into the histograms in one go when the request ends and listed in the
+    response's Server-Timing header, so one slow request can be broken
+    down without scraping. Spans on other threads (the weather provider's
+    event loop) are recorded straight away.
+    """
+
+    def __init__(self, collectors: Optional[List[Callable[[], List[str]]]] = None):
+        """
+        Args:
+            collectors: Callables returning extra exposition lines at every scrape
+        """
+        self.request_seconds = Histogram("agriwiz_request_duration_seconds",
+                                         "Time to handle an API request", ("method", "endpoint"))
+        self.requests = Counter("agriwiz_requests_total", "API requests handled", ("method", "endpoint", "status"))
+        self.request_errors = Counter("agriwiz_request_errors_total",
+                                      "API requests answered with a 5xx status", ("method", "endpoint"))
+        self.stage_seconds = Histogram("agriwiz_stage_duration_seconds", "Time spent in a request stage", ("stage",))
+        self.stage_errors = Counter("agriwiz_stage_errors_total", "Request stages that raised", ("stage",))
+        self.collectors = list(collectors) if collectors is not None else [upstream_collector]
+        self._local = _RequestState()
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.extensions[EXTENSION_KEY] = self
+
+    def _start(self):
+        # Thread-local rather than flask.g, whose proxy lookups cost more than the timing itself
+        self._local.start = time.perf_counter()
+        self._local.stages = []
+
+    def _record(self, response):
+        start, stages = self._local.start, self._local.stages
+        self._local.start = self._local.stages = None
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        req = request._get_current_object()
+        method = req.method
+        endpoint = req.url_rule.rule if req.url_rule else "unmatched"  # raw paths would be unbounded
+        status = response.status_code
+        self.request_seconds.observe((method, endpoint), elapsed)
+        self.requests.inc((method, endpoint, str(status)))
+        if status >= ERROR_STATUS:
+            self.request_errors.inc((method, endpoint))
+        if stages:
+            self.stage_seconds.observe_many([((stage,), seconds) for stage, seconds, _ in stages])
+            for stage, _, failed in stages:
+                if failed:
+                    self.stage_errors.inc((stage,))
+            response.headers["Server-Timing"] = ", ".join(f"{stage};dur={seconds * 1000:.2f}"
+                                                          for stage, seconds, _ in stages)
+        return response
+
+    def observe_stage(self, stage: str, seconds: float, failed: bool = False):
+        stages = self._local.stages
+        if stages is not None:
+            stages.append((stage, seconds, failed))
+            return
+        self.stage_seconds.observe((stage,), seconds)
+        if failed:
+            self.stage_errors.inc((stage,))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in (self.request_seconds, self.requests, self.request_errors, self.stage_seconds,
+                       self.stage_errors):
+            lines += metric.render()
+        for collector in self.collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """The process-wide metrics that spans record to."""
+    return _metrics
+
+
+class span:
+    """Times a block as a request stage: ``with span("soilgrids_profile"): ...``."""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _metrics.observe_stage(self.stage, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+
+def timed(stage: str):
+    """Decorator timing every call of a function or coroutine function as a request stage."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_app(app) -> Metrics:
+    """Time every request of an app with the process-wide metrics."""
+    _metrics.init_app(app)
+    return _metrics
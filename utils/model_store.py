@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# Model Store for Agri Wiz
+# Loads per-crop yield models on first use and keeps them in a memory-bounded LRU
+
+import os
+import itertools
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Iterable, List, NamedTuple, Optional
+
+import joblib
+
+from utils.compiled_forest import COMPILED_SUFFIX, CompiledForest
+
+MODEL_SUFFIX = "_model.joblib"
+SCALER_SUFFIX = "_scaler.joblib"
+
+# Most crops whose request counts are kept; the least requested are dropped beyond this
+MAX_TRACKED_CROPS = 1000
+
+def valid_crop_name(crop_name) -> bool:
+    """Whether a crop name is safe to build artifact and log file names from (no separators or "..")."""
+    return (isinstance(crop_name, str) and crop_name.strip() != "" and ".." not in crop_name
+            and not any(char in crop_name for char in ("/", "\\", "\0")))
+
+
+# Every entry gets a process-wide unique version, so anything keyed on it
+# (e.g. cached predictions) can never mistake a newer model for an older one
+_versions = itertools.count(1)
+
+
+class LoadedModel(NamedTuple):
+    model: object
+    scaler: object
+    nbytes: int
+    version: int = 0
+
+
+class ModelStore:
+    """Lazily loaded, memory-bounded cache of per-crop models and scalers.
+
+    A compiled forest (``{crop}_forest.npz``) is served in preference to the
+    sklearn model and scaler pair; its scaler is folded into the thresholds,
+    so entries built from it carry ``scaler=None`` and report the exact size
+    of their arrays.
+
+    Memory use of sklearn entries is estimated from the size of the artifacts
+    on disk, which is dominated by the tree arrays and tracks the in-memory
+    footprint of a forest closely. With ``mmap_mode`` set, those arrays are
+    memory-mapped and paged in by the OS instead of copied onto the heap.
+    """
+
+    def __init__(self, model_dir: str, max_bytes: Optional[int] = None, mmap_mode: Optional[str] = None):
+        self.model_dir = model_dir
+        self.max_bytes = max_bytes
+        self.mmap_mode = mmap_mode
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._requests = Counter()
+
+    def _paths(self, crop_name: str):
+        return (
+            os.path.join(self.model_dir, f"{crop_name}{MODEL_SUFFIX}"),
+            os.path.join(self.model_dir, f"{crop_name}{SCALER_SUFFIX}"),
+        )
+
+    def _compiled_path(self, crop_name: str) -> str:
+        return os.path.join(self.model_dir, f"{crop_name}{COMPILED_SUFFIX}")
+
+    def __contains__(self, crop_name: str) -> bool:
+        if not valid_crop_name(crop_name):
+            return False
+        if crop_name in self._entries or os.path.exists(self._compiled_path(crop_name)):
+            return True
+        return all(os.path.exists(path) for path in self._paths(crop_name))
+
+    def crops(self) -> List[str]:
+        """Names of all crops with a compiled forest, or a model and scaler, on disk."""
+        try:
+            files = os.listdir(self.model_dir)
+        except OSError:
+            return []
+        compiled = {file[:-len(COMPILED_SUFFIX)] for file in files if file.endswith(COMPILED_SUFFIX)}
+        pairs = {
+            file[:-len(MODEL_SUFFIX)] for file in files
+            if file.endswith(MODEL_SUFFIX) and file[:-len(MODEL_SUFFIX)] + SCALER_SUFFIX in files
+        }
+        return sorted(compiled | pairs)
+
+    def get(self, crop_name: str) -> Optional[LoadedModel]:
+        """Return the model and scaler for a crop, loading them if needed."""
+        if not valid_crop_name(crop_name):
+            return None
+        with self._lock:
+            entry = self._entries.get(crop_name)
+            if entry is not None:
+                self._entries.move_to_end(crop_name)
+                self.hits += 1
+                self._count_request(crop_name)
+                return entry
+            self.misses += 1
+        entry = self._load_once(crop_name)
+        if entry is not None:
+            # Only crops that exist are counted, so unknown names cannot grow the counter
+            with self._lock:
+                self._count_request(crop_name)
+        return entry
+
+    def _count_request(self, crop_name: str):
+        self._requests[crop_name] += 1
+        if len(self._requests) > MAX_TRACKED_CROPS:
+            self._requests = Counter(dict(self._requests.most_common(MAX_TRACKED_CROPS // 2)))
+
+    def _load_once(self, crop_name: str) -> Optional[LoadedModel]:
+        """Load a crop unless another thread already has; concurrent callers share one load."""
+        with self._lock:
+            load_lock = self._load_locks.setdefault(crop_name, threading.Lock())
+
+        # Load outside the store lock so other crops stay servable
+        try:
+            with load_lock:
+                with self._lock:
+                    entry = self._entries.get(crop_name)
+                if entry is None:
+                    entry = self._load(crop_name)
+                    if entry is not None:
+                        self._insert(crop_name, entry)
+                return entry
+        finally:
+            # Drop the lock once loaded (or found missing) so names that never load are not kept;
+            # later callers find the entry, or at worst repeat a cheap failed lookup
+            with self._lock:
+                if self._load_locks.get(crop_name) is load_lock:
+                    del self._load_locks[crop_name]
+
+    def _load(self, crop_name: str) -> Optional[LoadedModel]:
+        compiled_path = self._compiled_path(crop_name)
+        if os.path.exists(compiled_path):
+            try:
+                forest = CompiledForest.load(compiled_path)
+                return LoadedModel(forest, None, forest.nbytes, next(_versions))
+            except Exception as e:
+                logging.error(f"Error loading compiled yield model for {crop_name}: {e}")
+        
+        pair = self.load_sklearn(crop_name)
+        if pair is None:
+            return None
+        model_path, scaler_path = self._paths(crop_name)
+        nbytes = os.path.getsize(model_path) + os.path.getsize(scaler_path)
+        return LoadedModel(pair[0], pair[1], nbytes, next(_versions))
+
+    def load_sklearn(self, crop_name: str):
+        """Load a crop's sklearn model and scaler from disk, bypassing the cache.
+
+        Returns a (model, scaler) tuple, or None if either file is missing or unreadable.
+        """
+        model_path, scaler_path = self._paths(crop_name)
+        if not (os.path.exists(model_path) and os.path.exists(scaler_path)):
+            return None
+        try:
+            model = joblib.load(model_path, mmap_mode=self.mmap_mode)
+            scaler = joblib.load(scaler_path)
+            return model, scaler
+        except Exception as e:
+            logging.error(f"Error loading yield model for {crop_name}: {e}")
+            return None
+
+    def put(self, crop_name: str, model, scaler, nbytes: Optional[int] = None) -> int:
+        """Insert or replace the model and scaler served for a crop; returns the new version.
+
+        Callers already holding the previous entry keep using it, so a
+        replacement never blocks or disturbs predictions in flight.
+        """
+        if nbytes is None and isinstance(model, CompiledForest):
+            nbytes = model.nbytes
+        elif nbytes is None:
+            nbytes = sum(os.path.getsize(path) for path in self._paths(crop_name) if os.path.exists(path))
+        version = next(_versions)
+        self._insert(crop_name, LoadedModel(model, scaler, nbytes, version))
+        return version
+
+    def _insert(self, crop_name: str, entry: LoadedModel):
+        with self._lock:
+            previous = self._entries.pop(crop_name, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+            self._entries[crop_name] = entry
+            self.current_bytes += entry.nbytes
+
+            # Evict least recently used crops, always keeping the newest one
+            while self.max_bytes is not None and self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def preload(self, crop_names: Iterable[str], background: bool = True) -> Optional[threading.Thread]:
+        """Load the given crops ahead of their first request."""
+        crop_names = list(crop_names)
+
+        def _run():
+            for crop_name in crop_names:
+                self._load_once(crop_name)
+
+        if not background:
+            _run()
+            return None
+        thread = threading.Thread(target=_run, name="yield-model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def most_requested(self, n: int) -> List[str]:
+        """The n crops requested most often since start-up."""
+        with self._lock:
+            return [crop_name for crop_name, _ in self._requests.most_common(n)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": list(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
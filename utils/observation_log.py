@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# Observation Log for Agri Wiz
+# Append-only per-crop record of observed growing conditions and yields
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Tuple
+
+import numpy as np
+
+from utils.model_store import valid_crop_name
+
+
+class ObservationLog:
+    """Observed feature rows and yields, one JSON-lines file per crop.
+
+    Each append is written with a single ``write`` on a file opened in append
+    mode, so concurrent writers (threads or processes) never interleave
+    within a line. Lines that fail to parse, e.g. from a write cut short by
+    a crash, are skipped on read.
+    """
+
+    def __init__(self, log_dir: str, n_features: int):
+        self.log_dir = log_dir
+        self.n_features = n_features
+        self._lock = threading.Lock()
+
+    def path(self, crop_name: str) -> str:
+        if not valid_crop_name(crop_name):
+            raise ValueError(f"Invalid crop name: {crop_name!r}")
+        return os.path.join(self.log_dir, f"{crop_name}.jsonl")
+
+    def append(self, crop_name: str, features, yields) -> int:
+        """Append observations for a crop; returns the number of rows written."""
+        features = np.asarray(features, dtype=np.float64)
+        yields = np.asarray(yields, dtype=np.float64)
+        if features.ndim != 2 or features.shape[1] != self.n_features or len(features) != len(yields):
+            raise ValueError(f"Expected {self.n_features} features per row and one yield per row")
+
+        recorded_at = time.time()
+        lines = "".join(
+            json.dumps({"features": row.tolist(), "yield": float(value), "recorded_at": recorded_at}) + "\n"
+            for row, value in zip(features, yields)
+        )
+        os.makedirs(self.log_dir, exist_ok=True)
+        with self._lock, open(self.path(crop_name), "a") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(features)
+
+    def read(self, crop_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """All observations logged for a crop, as (features, yields) arrays."""
+        features, yields = [], []
+        try:
+            with open(self.path(crop_name), "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        row = [float(value) for value in record["features"]]
+                        value = float(record["yield"])
+                    except (ValueError, KeyError, TypeError):
+                        logging.warning(f"Skipping malformed observation for {crop_name}")
+                        continue
+                    if len(row) == self.n_features:
+                        features.append(row)
+                        yields.append(value)
+        except FileNotFoundError:
+            pass
+        return np.array(features, dtype=np.float64).reshape(-1, self.n_features), np.array(yields, dtype=np.float64)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# Prediction Cache for Agri Wiz
+# LRU of yield predictions keyed by crop, model version and quantized conditions
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class PredictionCache:
+    """Thread-safe LRU of per-row yield predictions.
+
+    Keys are ``(crop_name, model_version, feature_bytes)``. A retrained model
+    gets a new version, so its predictions never collide with the previous
+    model's; ``invalidate`` drops a crop's older entries early to free room.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Tuple]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Tuple):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, crop_name: str, keep_version: Optional[int] = None):
+        """Drop a crop's cached predictions, except those of ``keep_version``."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == crop_name and key[1] != keep_version]
+            for key in stale:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
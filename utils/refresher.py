@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# Hot Key Refresher for Agri Wiz
+# Refreshes the most requested cache entries in the background before they expire
+
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from utils.cache_store import CacheStore, NO_EXPIRY
+
+# Defaults, each overridable through the environment
+TOP_N = 20  # WEATHER_REFRESH_TOP_N, keys kept fresh; 0 disables the refresher
+LEAD_TIME = 120  # WEATHER_REFRESH_LEAD, seconds before expiry a key is refreshed
+INTERVAL = 30  # WEATHER_REFRESH_INTERVAL, seconds between checks
+
+# Keys counted in memory before the least requested are dropped
+MAX_TRACKED_KEYS = 2000
+
+
+class HotKeyRefresher:
+    """Keeps the most requested keys of a cache fresh.
+
+    Callers ``touch`` a key on every request. A background thread refreshes
+    the ``top_n`` most requested keys that expire within ``lead_time``
+    seconds, plus any key a caller asked for with ``request_refresh`` after
+    serving it stale. Request counts are saved to an access history store,
+    so after a restart the first pass warms the previous top keys. Counts
+    from several processes sharing the history overwrite rather than add to
+    each other, which is precise enough for ranking.
+    """
+
+    def __init__(self, name: str, history: CacheStore, expires_at: Callable[[str], Optional[float]],
+                 refresh: Callable[[List[str]], None], top_n: Optional[int] = None,
+                 lead_time: Optional[float] = None, interval: Optional[float] = None):
+        """
+        Args:
+            name: Used in the thread name and log messages
+            history: Store of request counts per key, kept across restarts
+            expires_at: Returns a key's cache expiry time, or None if it is not cached
+            refresh: Fetches and caches a list of keys
+            top_n: Number of most requested keys kept fresh
+            lead_time: Seconds before expiry to refresh a key
+            interval: Seconds between checks for keys due a refresh
+        """
+        self.name = name
+        self.history = history
+        self.expires_at = expires_at
+        self.refresh = refresh
+        self.top_n = top_n if top_n is not None else int(os.getenv("WEATHER_REFRESH_TOP_N", TOP_N))
+        self.lead_time = lead_time if lead_time is not None else float(os.getenv("WEATHER_REFRESH_LEAD", LEAD_TIME))
+        self.interval = interval if interval is not None else float(os.getenv("WEATHER_REFRESH_INTERVAL", INTERVAL))
+        self.refreshes = 0
+        self.failures = 0
+        self.counts: Counter = Counter()
+        self._saved: Dict[str, int] = {}
+        self._pending = set()
+        self._warm = set()
+        self._attempted: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_n > 0
+
+    def start(self):
+        """Load the access history and start the background thread; its first pass warms the top keys."""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            try:
+                history = dict(self.history.items())
+            except Exception as e:
+                logging.error(f"Error loading {self.name} access history: {e}")
+                history = {}
+            self.counts.update(history)
+            self._saved.update(history)
+            self._warm = set(history)
+            self._thread = threading.Thread(target=self._run, name=f"refresh-{self.name}", daemon=True)
+            self._thread.start()
+
+    def touch(self, key: str):
+        """Count a request for a key."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counts[key] += 1
+            if len(self.counts) > MAX_TRACKED_KEYS:
+                self.counts = Counter(dict(self.counts.most_common(MAX_TRACKED_KEYS // 2)))
+
+    def request_refresh(self, key: str):
+        """Refresh a key soon, e.g. after serving a stale copy of it."""
+        if not self.enabled or time.time() - self._attempted.get(key, 0) < self.interval:
+            return
+        with self._lock:
+            self._pending.add(key)
+        self.start()
+        self._wake.set()
+
+    def hot(self, n: Optional[int] = None) -> List[str]:
+        """The n most requested keys, most requested first."""
+        with self._lock:
+            return [key for key, _ in self.counts.most_common(n or self.top_n)]
+
+    def due(self) -> List[str]:
+        """Requested keys, and hot keys that expire within the lead time.
+
+        A hot key that is not cached at all is only due on the first pass
+        after loading the access history; otherwise it is either being
+        fetched by a request right now or its lookup keeps failing.
+        """
+        now = time.time()
+        with self._lock:
+            keys, self._pending = list(self._pending), set()
+            warm, self._warm = self._warm, set()
+        for key in self.hot():
+            if key in keys or now - self._attempted.get(key, 0) < self.lead_time:
+                continue  # recently refreshed or failed; wait for the lead time to pass
+            expires_at = self.expires_at(key)
+            if expires_at is None and key in warm or expires_at is not None and expires_at - now <= self.lead_time:
+                keys.append(key)
+        return keys
+
+    def run_once(self):
+        """Refresh every due key and save the access history."""
+        keys = self.due()
+        if keys:
+            now = time.time()
+            self._attempted.update((key, now) for key in keys)
+            try:
+                self.refresh(keys)
+                self.refreshes += len(keys)
+            except Exception as e:
+                self.failures += len(keys)
+                logging.error(f"Error refreshing {self.name} keys {keys}: {e}")
+        self._save_history()
+
+    def _run(self):
+        while True:
+            self.run_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _save_history(self):
+        cutoff = time.time() - self.lead_time
+        self._attempted = {key: at for key, at in self._attempted.items() if at > cutoff}
+        with self._lock:
+            changed = {key: count for key, count in self.counts.most_common(self.top_n * 10)
+                       if self._saved.get(key) != count}
+            self._saved.update(changed)
+        for key, count in changed.items():
+            self.history.set(key, count, expires_at=NO_EXPIRY)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"tracked": len(self.counts), "top_n": self.top_n, "refreshes": self.refreshes,
+                    "failures": self.failures, "pending": len(self._pending)}
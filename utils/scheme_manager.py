@@ -2,15 +2,18 @@ import json
 import os
 from typing import List, Dict, Optional
 
+SCHEMES_PATH = "data/raw/agricultural_schemes.json"
+
 class SchemeManager:
-    def __init__(self):
+    def __init__(self, schemes_path: str = SCHEMES_PATH):
+        self.schemes_path = schemes_path
         self.schemes_data = {}
         self.load_schemes()
     
     def load_schemes(self):
         """Load schemes data from JSON file."""
         try:
-            with open("data/raw/agricultural_schemes.json", "r") as file:
+            with open(self.schemes_path, "r") as file:
                 self.schemes_data = json.load(file)
         except Exception as e:
             print(f"Error loading schemes data: {e}")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# Soil Cache for Agri Wiz
+# SoilGrids responses kept on disk per ~250 m grid cell
+
+import os
+import csv
+import json
+import math
+import argparse
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.cache_store import CacheStore, NO_EXPIRY
+
+# Default database of cached soil responses (env SOIL_CACHE_DB)
+DEFAULT_SOIL_CACHE_DB = "data/processed/soil_cache.db"
+
+# Cell size in degrees. SoilGrids serves a 250 m grid in the Homolosine
+# projection; 0.0025 degrees is about 280 m north-south and no wider east-west,
+# so no cell spans two very different SoilGrids pixels.
+CELL_DEGREES = 0.0025
+
+# Most points a bounding-box prefetch may request
+MAX_PREFETCH_POINTS = 2500
+
+
+def soil_cell(lat: float, lon: float) -> Tuple[int, int]:
+    """(row, column) of the grid cell containing a coordinate."""
+    return math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+
+
+class SoilCache:
+    """On-disk cache of SoilGrids responses, one entry per grid cell and query.
+
+    Soil properties do not change on any timescale we care about, so entries
+    never expire unless a TTL is configured. The cache lives in its own
+    SQLite file in WAL mode, so every worker process shares it.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            path: SQLite database file (env SOIL_CACHE_DB)
+            ttl: Seconds to keep entries (env SOIL_CACHE_TTL); None or 0 keeps them forever
+        """
+        self.store = CacheStore(path or os.getenv("SOIL_CACHE_DB", DEFAULT_SOIL_CACHE_DB), "soilgrids")
+        self.ttl = ttl if ttl is not None else float(os.getenv("SOIL_CACHE_TTL", 0))
+
+    @staticmethod
+    def key(lat: float, lon: float, query: Sequence[Iterable[str]]) -> str:
+        """Cache key of a coordinate's cell and the properties, depths and values requested."""
+        row, col = soil_cell(lat, lon)
+        return f"{row},{col}|" + "|".join(",".join(part) for part in query)
+
+    def get(self, lat: float, lon: float, query: Sequence[Iterable[str]]) -> Optional[Dict]:
+        return self.store.get(self.key(lat, lon, query))
+
+    def put(self, lat: float, lon: float, query: Sequence[Iterable[str]], data: Dict):
+        if self.ttl:
+            self.store.set(self.key(lat, lon, query), data, ttl=self.ttl)
+        else:
+            self.store.set(self.key(lat, lon, query), data, expires_at=NO_EXPIRY)
+
+    def flush(self):
+        self.store.flush()
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+def read_coordinates(path: str) -> List[Tuple[float, float]]:
+    """Read "lat,lon" rows from a CSV file (header optional) or a JSON list of [lat, lon] pairs."""
+    with open(path, "r") as f:
+        if path.endswith(".json"):
+            return [(float(lat), float(lon)) for lat, lon in json.load(f)]
+        coordinates = []
+        for row in csv.reader(f):
+            try:
+                coordinates.append((float(row[0]), float(row[1])))
+            except (IndexError, ValueError):
+                continue  # header or blank line
+        return coordinates
+
+
+def warm(coordinates: Iterable[Tuple[float, float]], provider=None) -> Dict[str, int]:
+    """
+    Fetch soil profiles for every grid cell of the given coordinates that is not cached yet.
+
+    Args:
+        coordinates: (lat, lon) pairs, e.g. known farm locations
+        provider: WeatherProvider whose soil cache is filled; defaults to the process-wide one
+
+    Returns:
+        Counts of distinct cells, cells already cached, cells fetched and failures
+    """
+    from utils.async_weather import get_weather_provider
+    from utils.soil_profile import PROFILE_QUERY
+    provider = provider or get_weather_provider()
+    cache = provider.provider.soil_cache
+
+    cells = {soil_cell(lat, lon): (lat, lon) for lat, lon in coordinates}
+    missing = [point for point in cells.values() if cache.get(*point, PROFILE_QUERY) is None]
+    failed = sum(profile is None for profile in provider.soil_profiles(missing))
+    cache.flush()
+    return {"cells": len(cells), "cached": len(cells) - len(missing), "fetched": len(missing) - failed, "failed": failed}
+
+
+def bbox_points(min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                step: float = CELL_DEGREES, max_points: int = MAX_PREFETCH_POINTS) -> List[Tuple[float, float]]:
+    """
+    Centres of a grid covering a bounding box.
+
+    Args:
+        step: Grid spacing in degrees; the default visits every cache cell,
+            larger steps sample the box more sparsely
+        max_points: Refuse boxes needing more points than this, as SoilGrids
+            is rate limited
+
+    Raises:
+        ValueError: if the box is inverted or needs more than max_points points
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError("Bounding box minimums must not exceed its maximums")
+    # The epsilon keeps an exact multiple of the step from losing its last row to rounding
+    rows = math.floor((max_lat - min_lat) / step + 1e-9) + 1
+    cols = math.floor((max_lon - min_lon) / step + 1e-9) + 1
+    if rows * cols > max_points:
+        raise ValueError(f"Bounding box needs {rows * cols} points at a {step} degree step; "
+                         f"the limit is {max_points}, use a larger step")
+    return [(round(min_lat + (i + 0.5) * step, 6), round(min_lon + (j + 0.5) * step, 6))
+            for i in range(rows) for j in range(cols)]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Agri Wiz SoilGrids cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    warm_parser = subparsers.add_parser("warm", help="Pre-fetch soil data for a list of coordinates")
+    warm_parser.add_argument("coordinates", help="CSV of lat,lon rows or JSON list of [lat, lon] pairs")
+    bbox_parser = subparsers.add_parser("prefetch", help="Pre-fetch soil data for a bounding box")
+    bbox_parser.add_argument("bbox", nargs=4, type=float, metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"))
+    bbox_parser.add_argument("--step", type=float, default=CELL_DEGREES, help="Grid spacing in degrees")
+    bbox_parser.add_argument("--max-points", type=int, default=MAX_PREFETCH_POINTS,
+                             help="Refuse boxes needing more points than this")
+
+    args = parser.parse_args(argv)
+    if args.command == "warm":
+        coordinates = read_coordinates(args.coordinates)
+    else:
+        try:
+            coordinates = bbox_points(*args.bbox, step=args.step, max_points=args.max_points)
+        except ValueError as e:
+            parser.error(str(e))
+    counts = warm(coordinates)
+    print(f"{counts['cells']} cells: {counts['cached']} already cached, "
+          f"{counts['fetched']} fetched, {counts['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# Soil Profile for Agri Wiz
+# SoilGrids properties parsed into a fixed property x depth x statistic array
+
+import base64
+from typing import Dict, Optional
+
+import numpy as np
+
+# Properties, depths and statistics requested from SoilGrids in one query
+SOIL_PROPERTIES = ("bdod", "cec", "clay", "nitrogen", "phh2o", "sand", "silt", "soc")
+SOIL_DEPTHS = ("0-5cm", "5-15cm", "15-30cm", "30-60cm", "60-100cm", "100-200cm")
+SOIL_STATISTICS = ("mean", "Q0.05", "Q0.5", "Q0.95")
+PROFILE_QUERY = (SOIL_PROPERTIES, SOIL_DEPTHS, SOIL_STATISTICS)
+
+_PROPERTY_INDEX = {name: i for i, name in enumerate(SOIL_PROPERTIES)}
+_DEPTH_INDEX = {name: i for i, name in enumerate(SOIL_DEPTHS)}
+_STATISTIC_INDEX = {name: i for i, name in enumerate(SOIL_STATISTICS)}
+
+# Topsoil organic carbon (g/kg) at or above which fertility is medium and high
+SOC_FERTILITY_THRESHOLDS = (10.0, 20.0)
+
+
+class SoilProfile:
+    """SoilGrids values for one location as a float32 array.
+
+    ``values[p, d, s]`` holds property ``SOIL_PROPERTIES[p]`` at depth
+    ``SOIL_DEPTHS[d]`` for statistic ``SOIL_STATISTICS[s]``, converted to
+    SoilGrids' target units (pH, %, g/kg, ...). Values SoilGrids has no data
+    for, such as urban or water pixels, are NaN.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    @classmethod
+    def from_soilgrids(cls, data: Dict) -> "SoilProfile":
+        """Parse a SoilGrids v2 properties query response ({"properties": {"layers": [...]}})."""
+        values = np.full((len(SOIL_PROPERTIES), len(SOIL_DEPTHS), len(SOIL_STATISTICS)), np.nan, dtype=np.float32)
+        for layer in data.get("properties", {}).get("layers", []):
+            p = _PROPERTY_INDEX.get(layer.get("name"))
+            if p is None:
+                continue
+            d_factor = layer.get("unit_measure", {}).get("d_factor") or 1
+            for depth in layer.get("depths", []):
+                d = _DEPTH_INDEX.get(depth.get("label"))
+                if d is None:
+                    continue
+                for statistic, value in depth.get("values", {}).items():
+                    s = _STATISTIC_INDEX.get(statistic)
+                    if s is not None and value is not None:
+                        values[p, d, s] = value / d_factor
+        return cls(values)
+
+    def encode(self) -> str:
+        """Compact text form for caching: the raw float32 array in base64."""
+        return base64.b64encode(self.values.tobytes()).decode("ascii")
+
+    @classmethod
+    def decode(cls, encoded: str) -> "SoilProfile":
+        values = np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+        return cls(values.reshape(len(SOIL_PROPERTIES), len(SOIL_DEPTHS), len(SOIL_STATISTICS)))
+
+    def get(self, name: str, depth: str = "0-5cm", statistic: str = "mean") -> Optional[float]:
+        """One value, or None if SoilGrids has no data for it."""
+        value = self.values[_PROPERTY_INDEX[name], _DEPTH_INDEX[depth], _STATISTIC_INDEX[statistic]]
+        return None if np.isnan(value) else round(float(value), 3)
+
+    def topsoil(self) -> Dict[str, Optional[float]]:
+        """Mean of every property at 0-5 cm."""
+        return {name: self.get(name) for name in SOIL_PROPERTIES}
+
+    def fertility(self) -> Optional[str]:
+        """"low", "medium" or "high" from topsoil organic carbon, or None without data."""
+        soc = self.get("soc")
+        if soc is None:
+            return None
+        low, high = SOC_FERTILITY_THRESHOLDS
+        return "high" if soc >= high else "medium" if soc >= low else "low"
+
+    @property
+    def empty(self) -> bool:
+        return bool(np.isnan(self.values).all())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# Spatial Cache for Agri Wiz
+# Coordinate lookups cached per geohash cell and served to nearby coordinates
+
+import math
+import threading
+from typing import Any, List, Optional, Tuple
+
+from utils.cache_store import CacheStore
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Geohash length of a cache cell; 5 characters is about 4.9 x 4.9 km at the equator
+DEFAULT_PRECISION = 5
+# Furthest a cached reading may be from the requested point, in kilometres
+DEFAULT_TOLERANCE_KM = 5.0
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def geohash_encode(lat: float, lon: float, precision: int = DEFAULT_PRECISION) -> str:
+    """Geohash of a coordinate, ``precision`` characters long."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = bit_count = 0
+    even = True
+    while len(chars) < precision:
+        interval, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if bits >> shift & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_neighbors(geohash: str) -> List[str]:
+    """The up to eight cells surrounding a geohash cell, wrapping across the antimeridian."""
+    min_lat, max_lat, min_lon, max_lon = geohash_bounds(geohash)
+    height, width = max_lat - min_lat, max_lon - min_lon
+    center_lat, center_lon = min_lat + height / 2, min_lon + width / 2
+    neighbors = []
+    for dlat in (-1, 0, 1):
+        lat = center_lat + dlat * height
+        if not -90 < lat < 90:
+            continue
+        for dlon in (-1, 0, 1):
+            if dlat == dlon == 0:
+                continue
+            lon = (center_lon + dlon * width + 180) % 360 - 180
+            neighbors.append(geohash_encode(lat, lon, len(geohash)))
+    return neighbors
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class SpatialCache:
+    """Expiring cache of per-coordinate values bucketed by geohash cell.
+
+    Each cell holds the value fetched for one point in it. A lookup returns
+    the value of the nearest cached point within ``tolerance_km``, checking
+    the point's own cell and then its eight neighbours, so requests from
+    the same area share one upstream fetch even across cell boundaries.
+    Tolerances larger than a cell's width are capped by that neighbourhood.
+    """
+
+    def __init__(self, path: str, namespace: str, precision: int = DEFAULT_PRECISION,
+                 tolerance_km: float = DEFAULT_TOLERANCE_KM):
+        """
+        Args:
+            path: SQLite database file
+            namespace: CacheStore namespace of the cells
+            precision: Geohash length of a cell; smaller is coarser
+            tolerance_km: Furthest a cached point may be from the requested one
+        """
+        self.store = CacheStore(path, namespace)
+        self.precision = precision
+        self.tolerance_km = tolerance_km
+        self.hits = 0
+        self.neighbor_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def cell(self, lat: float, lon: float) -> str:
+        return geohash_encode(lat, lon, self.precision)
+
+    def _nearest(self, lat: float, lon: float, cells: List[str]) -> Optional[Tuple[float, Any]]:
+        best = None
+        for cell in cells:
+            entry = self.store.get(cell)
+            if entry is None:
+                continue
+            distance = haversine_km(lat, lon, entry["lat"], entry["lon"])
+            if distance <= self.tolerance_km and (best is None or distance < best[0]):
+                best = (distance, entry["value"])
+        return best
+
+    def get(self, lat: float, lon: float, record: bool = True) -> Optional[Any]:
+        """The value cached nearest to a coordinate within the tolerance, or None.
+
+        ``record=False`` leaves the hit and miss counts alone, for a repeat
+        lookup that belongs to one already counted.
+        """
+        cell = self.cell(lat, lon)
+        found = self._nearest(lat, lon, [cell])
+        neighbor = False
+        if found is None:
+            found = self._nearest(lat, lon, geohash_neighbors(cell))
+            neighbor = found is not None
+        if not record:
+            return found[1] if found else None
+        with self._lock:
+            if found is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.neighbor_hits += neighbor
+        return found[1] if found else None
+
+    def set(self, lat: float, lon: float, value: Any, ttl: Optional[float] = None,
+            expires_at: Optional[float] = None):
+        """Cache the value fetched for a coordinate, replacing its cell's previous entry."""
+        self.store.set(self.cell(lat, lon), {"lat": lat, "lon": lon, "value": value}, ttl=ttl, expires_at=expires_at)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "precision": self.precision,
+                "tolerance_km": self.tolerance_km,
+                "hits": self.hits,
+                "neighbor_hits": self.neighbor_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
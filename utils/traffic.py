@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# Traffic Capture for Agri Wiz
+# Appends a sanitized record of every API request to a JSONL log for later replay
+
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from flask import g, request  # type: ignore
+
+EXTENSION_KEY = "traffic_capture"
+
+# Defaults, each overridable through the environment
+CAPTURE_PATH = "data/processed/traffic.jsonl"  # TRAFFIC_CAPTURE_PATH
+FLUSH_INTERVAL = 1.0  # seconds between background writes of buffered records
+
+# Query and body fields whose values are never written, matched case-insensitively
+SECRET_FIELDS = {"appid", "api_key", "apikey", "key", "token", "access_token", "password", "secret",
+                 "authorization", "email", "phone", "mobile", "aadhaar", "farmer_name"}
+# Coordinate fields, rounded to about 1 km so a log does not pinpoint a farm
+COORDINATE_FIELDS = {"lat", "lon", "latitude", "longitude"}
+COORDINATE_DECIMALS = 2
+# Bodies larger than this are recorded as truncated
+MAX_BODY_BYTES = 16 * 1024
+REDACTED = "[redacted]"
+
+
+def sanitize(value: Any, field: Optional[str] = None) -> Any:
+    """A copy of a query or body value with secrets redacted and coordinates rounded."""
+    if isinstance(value, list):
+        return [sanitize(item, field) for item in value]
+    if field is not None:
+        lowered = field.lower()
+        if lowered in SECRET_FIELDS:
+            return REDACTED
+        if lowered in COORDINATE_FIELDS:
+            try:
+                return round(float(value), COORDINATE_DECIMALS)
+            except (TypeError, ValueError):
+                return value
+    if isinstance(value, dict):
+        return {key: sanitize(item, key) for key, item in value.items()}
+    return value
+
+
+class TrafficCapture:
+    """Records API requests to a JSONL file.
+
+    Each line holds the method, path, matched route, sanitized query and
+    JSON body, status and latency of one request. Records are buffered in
+    memory and appended by a background thread, so capturing adds no file
+    I/O to the request path. CORS preflight (OPTIONS) requests are skipped.
+    """
+
+    def __init__(self, path: str = CAPTURE_PATH, flush_interval: float = FLUSH_INTERVAL):
+        """
+        Args:
+            path: JSONL file records are appended to
+            flush_interval: Seconds between background writes
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.captured = 0
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        threading.Thread(target=self._flush_loop, name="traffic-capture", daemon=True).start()
+        atexit.register(self.flush)
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.extensions[EXTENSION_KEY] = self
+
+    def _start(self):
+        g.traffic_start = time.perf_counter()
+
+    def _record(self, response):
+        start = g.pop("traffic_start", None)
+        if start is None or request.method == "OPTIONS":
+            return response
+        latency_ms = (time.perf_counter() - start) * 1000
+        try:
+            body = None
+            if request.content_length and request.content_length > MAX_BODY_BYTES:
+                body = {"truncated": True}
+            elif request.is_json:
+                body = sanitize(request.get_json(silent=True))
+            record = {
+                "ts": round(time.time(), 3),
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.url_rule.rule if request.url_rule else None,
+                "query": sanitize(request.args.to_dict(flat=False)),
+                "body": body,
+                "status": response.status_code,
+                "latency_ms": round(latency_ms, 2),
+            }
+            line = json.dumps(record, separators=(",", ":"))
+        except Exception as e:
+            logging.error(f"Error capturing request {request.path}: {e}")
+            return response
+        with self._lock:
+            self._buffer.append(line)
+            self.captured += 1
+        return response
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Append buffered records to the log."""
+        with self._write_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError as e:
+                logging.error(f"Error writing traffic log {self.path}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"path": self.path, "captured": self.captured, "buffered": len(self._buffer)}
+
+
+def init_app(app, path: Optional[str] = None) -> Optional[TrafficCapture]:
+    """
+    Capture an app's traffic when TRAFFIC_CAPTURE is set (or a path is given).
+
+    Args:
+        app: Flask app
+        path: Log file; defaults to TRAFFIC_CAPTURE_PATH or data/processed/traffic.jsonl
+
+    Returns:
+        The capture, or None if capturing is off
+    """
+    if path is None and os.getenv("TRAFFIC_CAPTURE", "").lower() not in ("1", "true", "yes"):
+        return None
+    capture = TrafficCapture(path or os.getenv("TRAFFIC_CAPTURE_PATH", CAPTURE_PATH))
+    capture.init_app(app)
+    return capture
+
+
+def read_log(path: str) -> List[Dict]:
+    """The records of a traffic log, skipping lines that do not parse."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # a line cut short by a crash
+    return records
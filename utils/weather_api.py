@@ -4,17 +4,31 @@
 
 import json
 import os
-import urllib.request
-import urllib.parse
 import datetime
 import time
-import requests
 import socket
 import logging
+import zlib
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Optional
 
+from utils.async_weather import get_weather_provider
+from utils.cache_store import CacheStore, DEFAULT_CACHE_DB
+from utils.refresher import HotKeyRefresher
+from utils.http_client import get_client
+from utils.metrics import timed
+from utils.singleflight import SingleFlight, SingleFlightTimeout
+from utils.spatial_cache import SpatialCache, DEFAULT_PRECISION, DEFAULT_TOLERANCE_KM
+
+# Seconds a request waits on another request's in-flight fetch (env WEATHER_FETCH_TIMEOUT)
+FETCH_TIMEOUT = 15
+
+# Seconds past expiry a cached reading or forecast may still be served, marked
+# stale, while it is refreshed
+WEATHER_STALE_TTL = 3 * 3600
+FORECAST_STALE_TTL = 24 * 3600
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -29,6 +43,7 @@ class GPSConfig:
         self.cache_duration = 300  # Cache GPS location for 5 minutes
         self._geolocator = None
         self.use_windows_location = True
+        self.weather_provider = get_weather_provider()
         
     async def _init_windows_location(self):
         """Initialize Windows location service"""
@@ -79,18 +94,16 @@ class GPSConfig:
 
         for url, parser in services:
             try:
-                response = await asyncio.get_event_loop().run_in_executor(
-                    None, 
-                    lambda: requests.get(url, timeout=5)
+                # Each service is a fallback for the previous one, so fail fast instead of retrying
+                data = await self.weather_provider.run_async(
+                    self.weather_provider.provider.get_json(url, timeout=5, retries=0)
                 )
-                if response.status_code == 200:
-                    data = response.json()
-                    if url == 'http://ip-api.com/json/' and data.get('status') != 'success':
-                        continue
-                    
-                    location = parser(data)
-                    location['timestamp'] = time.time()
-                    return location
+                if url == 'http://ip-api.com/json/' and data.get('status') != 'success':
+                    continue
+                
+                location = parser(data)
+                location['timestamp'] = time.time()
+                return location
             except Exception as e:
                 logging.warning(f"Error with {url}: {e}")
                 continue
@@ -140,17 +153,41 @@ class GPSConfig:
             return None
 
 class WeatherAPI:
-    def __init__(self, api_key=None):
-        """Initialize the WeatherAPI with an optional API key."""
+    def __init__(self, api_key=None, cache_path=None):
+        """Initialize the WeatherAPI with an optional API key and cache database path."""
         self.api_key = api_key or os.getenv("OPENWEATHERMAP_API_KEY", "demo_key")
-        self.cache_file = "weather_cache.json"
+        self.cache_file = "weather_cache.json"  # Legacy JSON cache, imported once
         self.cache_duration = 3600  # Cache weather data for 1 hour
-        self.weather_cache = self._load_cache()
+        cache_path = cache_path or os.getenv("WEATHER_CACHE_DB", DEFAULT_CACHE_DB)
+        self.weather_cache = CacheStore(
+            cache_path,
+            "weather_api",
+            legacy_json=self.cache_file,
+            legacy_expiry=lambda key, data: data.get("timestamp", 0) + self.cache_duration,
+            stale_ttl=WEATHER_STALE_TTL,
+        )
+        # Coordinate lookups are shared by every request within a few km
+        # (WEATHER_GEOHASH_PRECISION, WEATHER_TOLERANCE_KM)
+        self.coordinate_cache = SpatialCache(
+            cache_path,
+            "weather_geohash",
+            precision=int(os.getenv("WEATHER_GEOHASH_PRECISION", DEFAULT_PRECISION)),
+            tolerance_km=float(os.getenv("WEATHER_TOLERANCE_KM", DEFAULT_TOLERANCE_KM)),
+        )
+        # Concurrent misses for one location share a single upstream fetch
+        self.inflight = SingleFlight()
+        self.fetch_timeout = float(os.getenv("WEATHER_FETCH_TIMEOUT", FETCH_TIMEOUT))
         self.gps_config = GPSConfig()
-        self.nominatim_url = "https://nominatim.openstreetmap.org/reverse"
-        self.nominatim_headers = {
-            'User-Agent': 'AgriWiz/1.0'
-        }
+        self.http = get_client()
+        self.weather_provider = get_weather_provider()
+        # The busiest locations are refreshed before they expire
+        self.refresher = HotKeyRefresher(
+            "weather_api",
+            CacheStore(cache_path, "weather_api_access"),
+            expires_at=self._expires_at,
+            refresh=self._refresh_weather_data,
+        )
+        self.refresher.start()
     
     async def get_current_location(self, use_gps: bool = True) -> Dict:
         """
@@ -175,33 +212,16 @@ class WeatherAPI:
         
         # Fall back to IP-based location
         logging.info("Using IP-based location detection")
-        return self.gps_config._get_ip_location()
+        return await self.gps_config._get_ip_location()
 
     async def _get_location_name(self, lat: float, lon: float) -> Dict:
         """Get location name from coordinates using OpenStreetMap Nominatim."""
         try:
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'format': 'json'
-            }
-            
-            # Add necessary headers to comply with usage policy
-            headers = {
-                'User-Agent': 'AgriWiz/1.0 (agricultural-assistant)',
-                'Accept-Language': 'en-US,en;q=0.5'
-            }
-            
             # Add timeout to prevent hanging
-            response = requests.get(
-                self.nominatim_url, 
-                params=params, 
-                headers=headers,
-                timeout=5
+            data = await self.weather_provider.run_async(
+                self.weather_provider.provider.reverse_geocode(lat, lon, timeout=5)
             )
-            
-            if response.status_code == 200:
-                data = response.json()
+            if data:
                 address = data.get('address', {})
                 
                 # Try various address fields in priority order
@@ -224,7 +244,7 @@ class WeatherAPI:
                         'display_name': data.get('display_name', f"{lat:.4f}, {lon:.4f}")
                     }
                     
-        except requests.Timeout:
+        except asyncio.TimeoutError:
             logging.error("Timeout while getting location name")
         except Exception as e:
             logging.error(f"Error getting location name: {e}")
@@ -237,31 +257,9 @@ class WeatherAPI:
             'display_name': f"{lat:.4f}, {lon:.4f}"
         }
 
-    def _load_cache(self) -> Dict:
-        """Load the weather cache from file if it exists."""
-        try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, "r") as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            logging.error(f"Error loading weather cache: {e}")
-            return {}
-    
-    def _save_cache(self):
-        """Save the weather cache to file."""
-        try:
-            with open(self.cache_file, "w") as f:
-                json.dump(self.weather_cache, f)
-        except Exception as e:
-            logging.error(f"Error saving weather cache: {e}")
-    
-    def _is_cache_valid(self, location: str) -> bool:
-        """Check if cache for a location is still valid."""
-        if location in self.weather_cache:
-            timestamp = self.weather_cache[location].get("timestamp", 0)
-            return (time.time() - timestamp) < self.cache_duration
-        return False
+    def _cache_weather(self, location: str, weather_data: Dict):
+        """Cache weather data until it is cache_duration old; written to disk in the background."""
+        self.weather_cache.set(location, weather_data, expires_at=weather_data["timestamp"] + self.cache_duration)
     
     def get_weather_data(self, location):
         """
@@ -270,30 +268,59 @@ class WeatherAPI:
         This is a simplified implementation using OpenWeatherMap API.
         In production, replace this with actual API calls using your API key.
         """
+        self.refresher.touch(location)
         # Check if we have valid cached data
-        if self._is_cache_valid(location):
+        cached = self.weather_cache.get(location)
+        if cached is not None:
             print(f"Using cached weather data for {location}")
-            return self.weather_cache[location]
-            
+            return cached
+        
+        # Serve an expired copy at once and refresh it in the background
+        if self.refresher.enabled:
+            entry = self.weather_cache.peek(location)
+            if entry is not None:
+                self.refresher.request_refresh(location)
+                return {**entry[0], "stale": True}
+        
+        try:
+            return self.inflight.do(location, lambda: self._fetch_weather_data(location), self.fetch_timeout)
+        except SingleFlightTimeout as e:
+            print(f"Error fetching weather data for {location}: {e}")
+            return self._get_mock_weather_data(location)
+    
+    def _expires_at(self, location: str) -> Optional[float]:
+        entry = self.weather_cache.peek(location)
+        return entry[1] if entry is not None else None
+
+    def _refresh_weather_data(self, locations):
+        """Re-fetch cached weather for locations, keeping the old entry if a fetch fails."""
+        for location in locations:
+            self.inflight.do(location, lambda: self._fetch_weather_data(location, force=True), self.fetch_timeout)
+
+    def _fetch_weather_data(self, location, force=False):
+        """Fetch and cache current weather for a location; runs once per concurrent miss."""
+        # A fetch that finished just before this one started may have filled the cache
+        cached = None if force else self.weather_cache.get(location)
+        if cached is not None:
+            return cached
+        
         try:
             # In a real implementation, use the API key and make actual HTTP requests
             if self.api_key == "demo_key":
                 # Return mock data for demo purposes
                 weather_data = self._get_mock_weather_data(location)
             else:
-                # Construct the API URL (OpenWeatherMap example)
-                encoded_location = urllib.parse.quote(location)
-                url = f"http://api.openweathermap.org/data/2.5/weather?q={encoded_location}&appid={self.api_key}&units=metric"
-                
-                # Make the API request
-                with urllib.request.urlopen(url) as response:
-                    data = response.read()
-                    weather_data = self._parse_api_response(json.loads(data))
+                # Make the API request (OpenWeatherMap example)
+                response = self.http.get(
+                    "https://api.openweathermap.org/data/2.5/weather",
+                    params={"q": location, "appid": self.api_key, "units": "metric"}
+                )
+                response.raise_for_status()
+                weather_data = self._parse_api_response(response.json())
                     
             # Cache the result
             weather_data["timestamp"] = time.time()
-            self.weather_cache[location] = weather_data
-            self._save_cache()
+            self._cache_weather(location, weather_data)
             
             return weather_data
             
@@ -357,29 +384,32 @@ class WeatherAPI:
                     "timestamp": time.time()
                 }
         
-        # Generic mock data if location not recognized
+        # Generic mock data if location not recognized. crc32 rather than hash(),
+        # which is salted per process, so every run and worker agrees
         current_month = datetime.now().month
+        seed = zlib.crc32(location.encode("utf-8"))
+        reverse_seed = zlib.crc32(location[::-1].encode("utf-8"))
         
         # Adjust temperature and rainfall based on season in northern hemisphere
         if 3 <= current_month <= 5:  # Spring
-            temp = 20.0 + (hash(location) % 10) - 5
-            rainfall = 1.0 + (hash(location[::-1]) % 3)
-            humidity = 60 + (hash(location) % 20)
+            temp = 20.0 + (seed % 10) - 5
+            rainfall = 1.0 + (reverse_seed % 3)
+            humidity = 60 + (seed % 20)
             description = "Spring showers"
         elif 6 <= current_month <= 8:  # Summer
-            temp = 28.0 + (hash(location) % 15) - 7
-            rainfall = 0.5 + (hash(location[::-1]) % 2)
-            humidity = 55 + (hash(location) % 25)
+            temp = 28.0 + (seed % 15) - 7
+            rainfall = 0.5 + (reverse_seed % 2)
+            humidity = 55 + (seed % 25)
             description = "Warm and humid"
         elif 9 <= current_month <= 11:  # Fall
-            temp = 15.0 + (hash(location) % 10) - 5
-            rainfall = 0.7 + (hash(location[::-1]) % 2.5)
-            humidity = 50 + (hash(location) % 20)
+            temp = 15.0 + (seed % 10) - 5
+            rainfall = 0.7 + (reverse_seed % 2.5)
+            humidity = 50 + (seed % 20)
             description = "Cool and breezy"
         else:  # Winter
-            temp = 5.0 + (hash(location) % 15) - 10
-            rainfall = 0.3 + (hash(location[::-1]) % 1.5)
-            humidity = 40 + (hash(location) % 30)
+            temp = 5.0 + (seed % 15) - 10
+            rainfall = 0.3 + (reverse_seed % 1.5)
+            humidity = 40 + (seed % 30)
             description = "Cold with occasional precipitation"
         
         return {
@@ -438,36 +468,34 @@ class WeatherAPI:
     def get_weather_by_coordinates(self, lat: float, lon: float) -> Dict:
         """Get weather data for specific coordinates."""
         try:
-            # Use the coordinates to fetch weather data
-            location_key = f"{lat:.4f},{lon:.4f}"
-            
-            # Check cache first
-            if self._is_cache_valid(location_key):
-                return self.weather_cache[location_key]
-            
-            if self.api_key == "demo_key":
-                # Return mock data for demo purposes
-                mock_data = self._get_mock_weather_data(location_key)
-                mock_data.update({
-                    'latitude': lat,
-                    'longitude': lon,
-                    'location': f"{lat:.4f}, {lon:.4f}"
-                })
-                return mock_data
-            else:
-                # Construct the API URL (OpenWeatherMap example)
-                url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={self.api_key}&units=metric"
-                
-                # Make the API request
-                with urllib.request.urlopen(url) as response:
-                    data = response.read()
-                    weather_data = self._parse_api_response(json.loads(data))
-                    weather_data.update({
-                        'latitude': lat,
-                        'longitude': lon,
-                        'location': f"{lat:.4f}, {lon:.4f}"
-                    })
-                    return weather_data
+            # Check cache first; a reading from a nearby point is good enough
+            cached = self.coordinate_cache.get(lat, lon)
+            if cached is None:
+                cell = self.coordinate_cache.cell(lat, lon)
+                led = []
+
+                def fetch():
+                    led.append(True)
+                    return self._fetch_weather_by_coordinates(lat, lon)
+
+                cached = self.inflight.do(("coordinates", cell), fetch, self.fetch_timeout)
+                if not led:
+                    # A follower got the reading for the leader's point, which can be farther
+                    # than the tolerance within one cell; fall back to a fetch for this point.
+                    # The miss that started this call is already counted
+                    cached = self.coordinate_cache.get(lat, lon, record=False)
+                    if cached is None:
+                        cached = self.inflight.do(
+                            ("coordinates", cell, lat, lon),
+                            lambda: self._fetch_weather_by_coordinates(lat, lon), self.fetch_timeout
+                        )
+            weather_data = dict(cached)
+            weather_data.update({
+                'latitude': lat,
+                'longitude': lon,
+                'location': f"{lat:.4f}, {lon:.4f}"
+            })
+            return weather_data
 
         except Exception as e:
             logging.error(f"Error getting weather for coordinates: {e}")
@@ -481,113 +509,200 @@ class WeatherAPI:
                 "location": f"{lat:.4f}, {lon:.4f}"
             }
 
-class WeatherService:
-    def __init__(self):
-        self.api_key = os.getenv("OPENWEATHERMAP_API_KEY", "demo_key")
-        self.cache_file = "data/processed/weather_cache.json"
-        self.cache = self.load_cache()
+    def _fetch_weather_by_coordinates(self, lat: float, lon: float) -> Dict:
+        """Fetch and cache current weather for coordinates; runs once per concurrent miss in a cell."""
+        # A fetch that finished just before this one started may have filled the cache;
+        # the caller has already counted its lookup
+        cached = self.coordinate_cache.get(lat, lon, record=False)
+        if cached is not None:
+            return cached
 
-    def load_cache(self):
-        """Load weather cache from JSON file."""
-        try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, "r") as file:
-                    return json.load(file)
-        except Exception as e:
-            print(f"Error loading weather cache: {e}")
-        return {}
+        if self.api_key == "demo_key":
+            # Return mock data for demo purposes
+            return self._get_mock_weather_data(f"{lat:.4f},{lon:.4f}")
 
-    def save_cache(self):
-        """Save weather cache to JSON file."""
-        try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, "w") as file:
-                json.dump(self.cache, file)
-        except Exception as e:
-            print(f"Error saving weather cache: {e}")
+        # Make the API request (OpenWeatherMap example)
+        response = self.http.get(
+            "https://api.openweathermap.org/data/2.5/weather",
+            params={"lat": lat, "lon": lon, "appid": self.api_key, "units": "metric"}
+        )
+        response.raise_for_status()
+        weather_data = self._parse_api_response(response.json())
+        self.coordinate_cache.set(lat, lon, weather_data, expires_at=weather_data["timestamp"] + self.cache_duration)
+        return weather_data
+
+def _end_of_day(date: datetime) -> float:
+    """Timestamp of the local midnight ending the given date."""
+    return datetime.combine(date.date() + timedelta(days=1), datetime.min.time()).timestamp()
+
+
+def _forecast_expiry(cache_key: str, data) -> Optional[float]:
+    """Expiry of a legacy "{location}_{YYYY-MM-DD}" forecast entry: the end of its day."""
+    try:
+        return _end_of_day(datetime.strptime(cache_key.rsplit("_", 1)[1], "%Y-%m-%d"))
+    except (IndexError, ValueError):
+        return None
+
+
+def _summarize_forecast(forecast: Dict) -> Dict:
+    """Daily readings and averages (mean temperature and humidity, total rainfall) of a raw forecast."""
+    processed_data = {
+        "daily_forecasts": [],
+        "averages": {
+            "temperature": 0,
+            "humidity": 0,
+            "rainfall": 0
+        }
+    }
+    
+    temp_sum = humid_sum = rain_sum = 0
+    readings = 0
+    
+    for item in forecast["list"]:
+        date = datetime.fromtimestamp(item["dt"]).strftime('%Y-%m-%d')
+        temp = item["main"]["temp"]
+        humidity = item["main"]["humidity"]
+        rain = item["rain"]["3h"] if "rain" in item else 0
+        
+        processed_data["daily_forecasts"].append({
+            "date": date,
+            "temperature": temp,
+            "humidity": humidity,
+            "rainfall": rain
+        })
+        
+        temp_sum += temp
+        humid_sum += humidity
+        rain_sum += rain
+        readings += 1
+    
+    # Calculate averages
+    processed_data["averages"]["temperature"] = temp_sum / readings
+    processed_data["averages"]["humidity"] = humid_sum / readings
+    processed_data["averages"]["rainfall"] = rain_sum
+    return processed_data
+
+
+class WeatherService:
+    def __init__(self, cache_path=None):
+        self.api_key = os.getenv("OPENWEATHERMAP_API_KEY", "demo_key")
+        self.cache_file = "data/processed/weather_cache.json"  # Legacy JSON cache, imported once
+        # Forecasts are keyed by location and date and expire when the day ends
+        self.cache = CacheStore(
+            cache_path or os.getenv("WEATHER_CACHE_DB", DEFAULT_CACHE_DB),
+            "weather_service",
+            legacy_json=self.cache_file,
+            legacy_expiry=_forecast_expiry,
+            stale_ttl=FORECAST_STALE_TTL,
+        )
+        # Concurrent misses for one location share a single geocode and forecast fetch
+        self.inflight = SingleFlight()
+        self.weather_provider = get_weather_provider()
+        self.fetch_timeout = float(os.getenv("WEATHER_FETCH_TIMEOUT", FETCH_TIMEOUT))
+        # The busiest locations get the next day's forecast before the day rolls over
+        self.refresher = HotKeyRefresher(
+            "weather_service",
+            CacheStore(cache_path or os.getenv("WEATHER_CACHE_DB", DEFAULT_CACHE_DB), "weather_service_access"),
+            expires_at=self._expires_at,
+            refresh=self._refresh_forecasts,
+        )
+        self.refresher.start()
 
+    @timed("weather_forecast")
     def get_weather_forecast(self, location: str) -> Optional[Dict]:
         """Get 5-day weather forecast for a location."""
+        self.refresher.touch(location)
         # Check cache first
-        cache_key = f"{location}_{datetime.now().strftime('%Y-%m-%d')}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        now = datetime.now()
+        cache_key = f"{location}_{now.strftime('%Y-%m-%d')}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Serve yesterday's forecast at once and refresh it in the background
+        stale = self._stale_forecast(location, now)
+        if stale is not None:
+            return stale
 
         try:
-            # Get coordinates first
-            geo_url = f"http://api.openweathermap.org/geo/1.0/direct"
-            params = {
-                "q": location,
-                "limit": 1,
-                "appid": self.api_key
-            }
-            response = requests.get(geo_url, params=params)
-            location_data = response.json()
-            
-            if not location_data:
-                return None
-                
-            lat = location_data[0]["lat"]
-            lon = location_data[0]["lon"]
-            
-            # Get weather forecast
-            forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
-            params = {
-                "lat": lat,
-                "lon": lon,
-                "appid": self.api_key,
-                "units": "metric"
-            }
-            
-            response = requests.get(forecast_url, params=params)
-            forecast = response.json()
-            
-            # Process and cache the data
-            processed_data = {
-                "daily_forecasts": [],
-                "averages": {
-                    "temperature": 0,
-                    "humidity": 0,
-                    "rainfall": 0
-                }
-            }
-            
-            temp_sum = humid_sum = rain_sum = 0
-            readings = 0
-            
-            for item in forecast["list"]:
-                date = datetime.fromtimestamp(item["dt"]).strftime('%Y-%m-%d')
-                temp = item["main"]["temp"]
-                humidity = item["main"]["humidity"]
-                rain = item["rain"]["3h"] if "rain" in item else 0
-                
-                processed_data["daily_forecasts"].append({
-                    "date": date,
-                    "temperature": temp,
-                    "humidity": humidity,
-                    "rainfall": rain
-                })
-                
-                temp_sum += temp
-                humid_sum += humidity
-                rain_sum += rain
-                readings += 1
-            
-            # Calculate averages
-            processed_data["averages"]["temperature"] = temp_sum / readings
-            processed_data["averages"]["humidity"] = humid_sum / readings
-            processed_data["averages"]["rainfall"] = rain_sum
-            
-            # Cache the results
-            self.cache[cache_key] = processed_data
-            self.save_cache()
-            
-            return processed_data
-            
+            return self.inflight.do(cache_key, lambda: self._fetch_forecast(location, cache_key, now), self.fetch_timeout)
+        except SingleFlightTimeout as e:
+            print(f"Error fetching weather data: {e}")
+            return None
+
+    def get_weather_forecasts(self, locations) -> Dict[str, Optional[Dict]]:
+        """
+        Get 5-day weather forecasts for many locations at once.
+        
+        Cached forecasts are served directly; the rest are fetched concurrently
+        on the async weather provider and cached.
+        
+        Returns:
+            Dictionary mapping each location to its forecast, or None if unavailable
+        """
+        now = datetime.now()
+        today = now.strftime('%Y-%m-%d')
+        forecasts = {}
+        misses = []
+        for location in dict.fromkeys(locations):
+            self.refresher.touch(location)
+            forecasts[location] = self.cache.get(f"{location}_{today}") or self._stale_forecast(location, now)
+            if forecasts[location] is None:
+                misses.append(location)
+        
+        if misses:
+            for location, forecast in self.weather_provider.location_forecasts(misses, self.api_key).items():
+                forecasts[location] = self._cache_forecast(f"{location}_{today}", forecast, now)
+        return forecasts
+
+    def _stale_forecast(self, location: str, now: datetime) -> Optional[Dict]:
+        """Yesterday's forecast marked stale, scheduling a refresh, or None if there is none to serve."""
+        if not self.refresher.enabled:
+            return None
+        entry = self.cache.peek(f"{location}_{(now - timedelta(days=1)).strftime('%Y-%m-%d')}")
+        if entry is None:
+            return None
+        self.refresher.request_refresh(location)
+        return {**entry[0], "stale": True}
+
+    def _expires_at(self, location: str) -> Optional[float]:
+        entry = self.cache.peek(f"{location}_{datetime.now().strftime('%Y-%m-%d')}")
+        return entry[1] if entry is not None else None
+
+    def _refresh_forecasts(self, locations):
+        """Re-fetch forecasts for locations, caching them for today and, near midnight, for tomorrow too."""
+        now = datetime.now()
+        due = now + timedelta(seconds=self.refresher.lead_time)
+        days = [now] if due.date() == now.date() else [now, due]
+        for location, forecast in self.weather_provider.location_forecasts(locations, self.api_key).items():
+            for day in days:
+                self._cache_forecast(f"{location}_{day.strftime('%Y-%m-%d')}", forecast, day)
+
+    def _fetch_forecast(self, location: str, cache_key: str, now: datetime) -> Optional[Dict]:
+        """Fetch, process and cache the forecast for a location; runs once per concurrent miss."""
+        # A fetch that finished just before this one started may have filled the cache
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            forecast = self.weather_provider.location_forecast(location, self.api_key)
         except Exception as e:
             print(f"Error fetching weather data: {e}")
             return None
+        return self._cache_forecast(cache_key, forecast, now)
+
+    def _cache_forecast(self, cache_key: str, forecast: Optional[Dict], now: datetime) -> Optional[Dict]:
+        """Summarize a raw forecast and cache it until the end of the day."""
+        if not forecast:
+            return None
+        try:
+            processed_data = _summarize_forecast(forecast)
+        except Exception as e:
+            print(f"Error processing weather data: {e}")
+            return None
+        self.cache.set(cache_key, processed_data, expires_at=_end_of_day(now))
+        return processed_data
 
     def get_weather_suitability(self, crop: Dict, location: str) -> Dict:
         """Determine weather suitability for a specific crop."""
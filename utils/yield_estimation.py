@@ -2,14 +2,65 @@
 # Yield Estimation Module for Agri Wiz
 # Estimates crop yields based on environment and growing conditions
 
+import argparse
+import itertools
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
 import joblib
 import os
 from typing import Dict, Optional, List
 import logging
 import csv
+import threading
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from utils.compiled_forest import COMPILED_SUFFIX, CompiledForest
+from utils.metrics import timed
+from utils.model_store import ModelStore, MODEL_SUFFIX, SCALER_SUFFIX, valid_crop_name
+from utils.observation_log import ObservationLog
+from utils.prediction_cache import PredictionCache
+
+# Order of the model input features
+FEATURE_COLUMNS = [
+    'temperature',
+    'rainfall',
+    'humidity',
+    'soil_ph',
+    'soil_fertility',
+    'water_availability',
+    'season'
+]
+
+# Resolution predictions are made at, per feature: 0.5 °C, 5 mm rainfall, 1% humidity
+# and 0.1 pH. Rows falling in the same buckets share one (cacheable) prediction.
+QUANTIZATION_STEPS = np.array([0.5, 5.0, 1.0, 0.1, 1.0, 1.0, 1.0])
+
+# Default number of cached per-row predictions (env YIELD_PREDICTION_CACHE_SIZE, 0 disables)
+PREDICTION_CACHE_SIZE = 20000
+
+# Map categorical inputs to numbers
+SEASON_MAP = {'spring': 1, 'summer': 2, 'fall': 3, 'winter': 4}
+FERTILITY_MAP = {'low': 1, 'medium': 2, 'high': 3}
+
+# Soil pH range searched by the optimization grid
+PH_RANGE = (5.5, 7.5)
+
+# Crop parameters used to generate the initial training data
+CROP_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "raw", "crop_data.csv")
+DEFAULT_PARAMS = {'base_yield': 30, 'temp_range': (20.0, 35.0), 'rainfall_range': (500.0, 1000.0)}
+DEFAULT_CROP_PARAMS = {
+    'rice': {'base_yield': 50, 'temp_range': (20, 35), 'rainfall_range': (1000, 2500)},
+    'wheat': {'base_yield': 45, 'temp_range': (15, 25), 'rainfall_range': (650, 1000)},
+    'corn': {'base_yield': 55, 'temp_range': (20, 30), 'rainfall_range': (500, 800)},
+    'cotton': {'base_yield': 22, 'temp_range': (21, 30), 'rainfall_range': (500, 1000)},
+    'sugarcane': {'base_yield': 700, 'temp_range': (20, 35), 'rainfall_range': (1500, 2500)}
+}
+
+# Background retraining: extra trees per warm start, and the forest size
+# beyond which the model is refit from scratch instead of growing further
+BASE_TREES = 100
+WARM_START_TREES = 20
+MAX_TREES = 300
+SYNTHETIC_SAMPLES = 1000
 
 # Configure logging
 logging.basicConfig(
@@ -18,39 +69,65 @@ logging.basicConfig(
 )
 
 class YieldEstimator:
-    def __init__(self):
-        """Initialize the YieldEstimator with model paths."""
-        self.model_dir = "data/processed/models"
+    def __init__(self, model_dir: str = "data/processed/models", cache_mb: Optional[float] = None,
+                 mmap_mode: Optional[str] = None, preload: Optional[List[str]] = None,
+                 observation_dir: Optional[str] = None, max_trees: int = MAX_TREES,
+                 prediction_cache_size: Optional[int] = None):
+        """
+        Initialize the YieldEstimator with model paths.
+        
+        Args:
+            model_dir: Directory holding the per-crop model and scaler files
+            cache_mb: Memory budget for loaded models (env YIELD_MODEL_CACHE_MB, unbounded if unset)
+            mmap_mode: joblib mmap mode for model arrays, e.g. "r" (env YIELD_MODEL_MMAP)
+            preload: Crops to load in the background at start-up (env YIELD_PRELOAD_CROPS, comma-separated)
+            observation_dir: Directory of the per-crop observation logs (defaults to model_dir/observations)
+            max_trees: Forest size beyond which retraining refits from scratch
+            prediction_cache_size: Cached per-row predictions (env YIELD_PREDICTION_CACHE_SIZE, 0 disables)
+        """
+        self.model_dir = model_dir
+        self.observation_log = ObservationLog(
+            observation_dir or os.path.join(model_dir, "observations"), len(FEATURE_COLUMNS)
+        )
+        self.max_trees = max_trees
+        if prediction_cache_size is None:
+            prediction_cache_size = int(os.getenv("YIELD_PREDICTION_CACHE_SIZE", PREDICTION_CACHE_SIZE))
+        self.prediction_cache = PredictionCache(prediction_cache_size) if prediction_cache_size > 0 else None
+        self._retrain_executor = None
+        self._pending_retrains = {}
+        self._retrain_lock = threading.Lock()
+        self.feature_columns = FEATURE_COLUMNS
+        if cache_mb is None and os.getenv("YIELD_MODEL_CACHE_MB"):
+            cache_mb = float(os.getenv("YIELD_MODEL_CACHE_MB"))
+        self.cache_bytes = int(cache_mb * 1024 * 1024) if cache_mb else None
+        self.mmap_mode = mmap_mode or os.getenv("YIELD_MODEL_MMAP") or None
+        if preload is None:
+            preload = [c.strip().lower() for c in os.getenv("YIELD_PRELOAD_CROPS", "").split(",") if c.strip()]
+        self.preload = preload
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._known_crops = None
         self.load_models()
 
     def load_models(self):
-        """Load ML models for yield estimation."""
+        """Set up on-demand loading of the ML models for yield estimation."""
         try:
             os.makedirs(self.model_dir, exist_ok=True)
-            self.models = {}
-            self.scalers = {}
-            
-            # Load available models
-            for file in os.listdir(self.model_dir):
-                if file.endswith("_model.joblib"):
-                    crop_name = file.replace("_model.joblib", "")
-                    model_path = os.path.join(self.model_dir, file)
-                    scaler_path = os.path.join(self.model_dir, f"{crop_name}_scaler.joblib")
-                    
-                    if os.path.exists(scaler_path):
-                        self.models[crop_name] = joblib.load(model_path)
-                        self.scalers[crop_name] = joblib.load(scaler_path)
-                        
         except Exception as e:
-            print(f"Error loading yield estimation models: {e}")
+            print(f"Error preparing yield model directory: {e}")
+        
+        # Models are loaded on first use per crop and kept in a memory-bounded LRU
+        self.model_store = ModelStore(self.model_dir, max_bytes=self.cache_bytes, mmap_mode=self.mmap_mode)
+        # Training and compiling end here, and may have added crops
+        self.invalidate_known_crops()
+        if self.preload:
+            self.model_store.preload(self.preload)
 
-    def _generate_sample_data(self) -> Dict:
-        """Generate sample training data for initial models."""
-        # This is a simplified data generator that uses real crop parameters
-        # First read crop data to get proper ranges
+    def _load_crop_params(self, path: str = CROP_DATA_PATH) -> Dict:
+        """Read per-crop yield and range parameters for the sample data generator."""
         crop_params = {}
         try:
-            with open("crop_data.csv", "r") as f:
+            with open(path, "r") as f:
                 reader = csv.DictReader(f)
                 for row in reader:
                     # Set default ranges if not available
@@ -60,22 +137,16 @@ class YieldEstimator:
                     
                     # Try to extract ranges from data
                     if row.get('temperature_range'):
-                        try:
-                            temp_range = row['temperature_range'].split('-')
-                        except:
-                            pass
+                        temp_range = row['temperature_range'].split('-')
                             
                     if row.get('rainfall_range_mm'):
-                        try:
-                            rain_range = row['rainfall_range_mm'].split('-')
-                        except:
-                            pass
+                        rain_range = row['rainfall_range_mm'].split('-')
                             
                     if row.get('yield_potential_qt_per_ha'):
                         try:
                             # Take first number if range is given
                             base_yield = float(row['yield_potential_qt_per_ha'].split('-')[0])
-                        except:
+                        except ValueError:
                             base_yield = 30  # Default value
                     
                     crop_params[row['crop_name'].lower()] = {
@@ -89,93 +160,163 @@ class YieldEstimator:
         except Exception as e:
             logging.warning(f"Error reading crop parameters: {e}. Using default values.")
             # Fallback to default parameters if CSV read fails
-            crop_params = {
-                'rice': {'base_yield': 50, 'temp_range': (20, 35), 'rainfall_range': (1000, 2500)},
-                'wheat': {'base_yield': 45, 'temp_range': (15, 25), 'rainfall_range': (650, 1000)},
-                'corn': {'base_yield': 55, 'temp_range': (20, 30), 'rainfall_range': (500, 800)},
-                'cotton': {'base_yield': 22, 'temp_range': (21, 30), 'rainfall_range': (500, 1000)},
-                'sugarcane': {'base_yield': 700, 'temp_range': (20, 35), 'rainfall_range': (1500, 2500)}
-            }
+            crop_params = dict(DEFAULT_CROP_PARAMS)
+        
+        return crop_params
 
-        # Rest of the function remains the same
-        sample_data = {}
+    def _generate_sample_data(self, n_samples: int = 1000, seed: Optional[int] = None) -> Dict:
+        """
+        Generate sample training data for initial models.
         
-        for crop_name, params in crop_params.items():
-            features = []
-            yields = []
-            
-            # Generate 1000 sample points for each crop
-            for _ in range(1000):
-                # Generate random but realistic values
-                temp = np.random.uniform(params['temp_range'][0], params['temp_range'][1])
-                rainfall = np.random.uniform(params['rainfall_range'][0], params['rainfall_range'][1])
-                humidity = np.random.uniform(40, 90)
-                soil_ph = np.random.uniform(5.5, 7.5)
-                soil_fertility = np.random.randint(1, 4)  # 1=low, 2=medium, 3=high
-                water_availability = np.random.randint(1, 4)
-                season = np.random.randint(1, 5)  # 1=spring, 2=summer, 3=fall, 4=winter
-                
-                features.append([temp, rainfall, humidity, soil_ph, soil_fertility, 
-                               water_availability, season])
-                
-                # Calculate yield with some randomness and environmental factors
-                base_yield = params['base_yield']
-                
-                # Temperature effect
-                temp_optimal = (params['temp_range'][0] + params['temp_range'][1]) / 2
-                temp_effect = 1 - abs(temp - temp_optimal) / temp_optimal * 0.5
-                
-                # Rainfall effect
-                rainfall_optimal = (params['rainfall_range'][0] + params['rainfall_range'][1]) / 2
-                rainfall_effect = 1 - abs(rainfall - rainfall_optimal) / rainfall_optimal * 0.5
-                
-                # Other factors
-                soil_effect = soil_fertility / 3
-                water_effect = water_availability / 3
-                
-                # Combined effect with some randomness
-                yield_value = base_yield * temp_effect * rainfall_effect * soil_effect * water_effect
-                yield_value *= np.random.uniform(0.9, 1.1)  # Add 10% random variation
-                
-                yields.append(yield_value)
-            
-            sample_data[crop_name] = {
-                'features': features,
-                'yields': yields
+        Args:
+            n_samples: Number of samples per crop
+            seed: Seed for reproducible data; each crop gets its own stream
+        
+        Returns:
+            Dictionary mapping crop name to 'features' (n_samples, 7) and 'yields' arrays
+        """
+        return {
+            crop_name: generate_crop_samples(params, n_samples, _crop_rng(seed, crop_name))
+            for crop_name, params in self._load_crop_params().items()
+        }
+
+    def train_all(self, crop_names: Optional[List[str]] = None, n_samples: int = 1000,
+                  n_estimators: int = 100, seed: int = 42, workers: Optional[int] = None) -> List[str]:
+        """
+        Fit a scaler and RandomForest for every crop on generated data, in parallel processes.
+        
+        Args:
+            crop_names: Crops to train; defaults to every crop in the crop data
+            n_samples: Number of generated samples per crop
+            n_estimators: Number of trees per forest
+            seed: Seed for the generated data
+            workers: Number of worker processes (defaults to the CPU count)
+        
+        Returns:
+            Names of the crops whose artifacts were written
+        """
+        crop_params = self._load_crop_params()
+        if crop_names is not None:
+            crop_names = [name.lower() for name in crop_names]
+            crop_params = {name: crop_params.get(name, DEFAULT_PARAMS) for name in crop_names}
+        
+        trained = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_train_crop, self.model_dir, crop_name, params, n_samples, n_estimators, seed): crop_name
+                for crop_name, params in crop_params.items()
             }
+            for future in as_completed(futures):
+                crop_name = futures[future]
+                try:
+                    future.result()
+                    trained.append(crop_name)
+                except Exception as e:
+                    logging.error(f"Error training yield model for {crop_name}: {e}")
         
-        return sample_data
+        # Serve the new artifacts instead of any previously loaded ones
+        self.load_models()
+        return sorted(trained)
 
-    def _preprocess_input(self, data: Dict, crop_name: str) -> Optional[np.ndarray]:
-        """Preprocess input data for prediction."""
-        try:
-            # Convert input data to feature array
-            features = []
-            
-            # Map season to number
-            season_map = {'spring': 1, 'summer': 2, 'fall': 3, 'winter': 4}
-            fertility_map = {'low': 1, 'medium': 2, 'high': 3}
-            
-            features.append(float(data.get('temperature', 25)))
-            features.append(float(data.get('rainfall', 500)))
-            features.append(float(data.get('humidity', 60)))
-            features.append(float(data.get('soil_ph', 6.5)))
-            features.append(fertility_map.get(data.get('soil_fertility', 'medium'), 2))
-            features.append(fertility_map.get(data.get('water_availability', 'medium'), 2))
-            features.append(season_map.get(data.get('season', 'summer'), 2))
-            
-            features = np.array(features).reshape(1, -1)
-            
-            # Scale features
-            if crop_name in self.scalers:
-                features = self.scalers[crop_name].transform(features)
-                
-            return features
-            
-        except Exception as e:
-            print(f"Error preprocessing input: {e}")
-            return None
+    def compile_models(self, crop_names: Optional[List[str]] = None) -> List[str]:
+        """
+        Export sklearn models to compiled forests next to them.
+        
+        Args:
+            crop_names: Crops to compile; defaults to every crop with a model and scaler
+        
+        Returns:
+            Names of the crops whose compiled forest was written
+        """
+        if crop_names is None:
+            crop_names = self.model_store.crops()
+        
+        compiled = []
+        for crop_name in (name.lower() for name in crop_names):
+            pair = self.model_store.load_sklearn(crop_name)
+            if pair is None:
+                continue
+            forest = CompiledForest.from_sklearn(*pair)
+            forest.save(os.path.join(self.model_dir, f"{crop_name}{COMPILED_SUFFIX}"))
+            compiled.append(crop_name)
+        
+        # Serve the compiled forests instead of any previously loaded models
+        self.load_models()
+        return compiled
+
+    def _feature_row(self, data: Dict) -> List[float]:
+        """Convert a conditions dictionary into an unscaled feature row."""
+        return [
+            float(data.get('temperature', 25)),
+            float(data.get('rainfall', 500)),
+            float(data.get('humidity', 60)),
+            float(data.get('soil_ph', 6.5)),
+            FERTILITY_MAP.get(data.get('soil_fertility', 'medium'), 2),
+            FERTILITY_MAP.get(data.get('water_availability', 'medium'), 2),
+            SEASON_MAP.get(data.get('season', 'summer'), 2),
+        ]
+
+    def _tree_predictions(self, entry, features: np.ndarray) -> np.ndarray:
+        """Predictions of every tree for every unscaled feature row, shaped (rows, trees)."""
+        if isinstance(entry.model, CompiledForest):
+            return entry.model.tree_predictions(features)
+        
+        X = entry.scaler.transform(features) if entry.scaler is not None else features
+        # Trees evaluate float32 input; convert once instead of once per tree
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        estimators = entry.model.estimators_
+        predictions = np.empty((len(X), len(estimators)))
+        for j, tree in enumerate(estimators):
+            predictions[:, j] = tree.predict(X, check_input=False)
+        return predictions
+
+    def _quantize(self, features: np.ndarray) -> np.ndarray:
+        """Snap feature rows to the prediction resolution (see QUANTIZATION_STEPS)."""
+        # The outer round gives the double nearest the decimal bucket value, e.g. 7.1
+        # rather than 71 * 0.1 = 7.1000000000000005
+        return np.round(np.round(features / QUANTIZATION_STEPS) * QUANTIZATION_STEPS, 6)
+
+    def _predict_rows(self, crop_name: str, entry, features: np.ndarray):
+        """
+        Rounded mean and confidence interval per feature row, served from the
+        prediction cache where possible.
+        
+        With the cache enabled, rows are quantized first, so a cached result
+        is always identical to a freshly computed one; without it, rows are
+        predicted exactly as given.
+        """
+        cache = self.prediction_cache
+        if cache is None:
+            return self._summarize(self._tree_predictions(entry, features))
+        
+        features = self._quantize(features)
+        means = np.empty(len(features))
+        intervals = np.empty((len(features), 2))
+        keys = [(crop_name, entry.version, row.tobytes()) for row in features]
+        missing = []
+        for i, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                means[i], intervals[i] = cached
+        
+        if missing:
+            new_means, new_intervals = self._summarize(self._tree_predictions(entry, features[missing]))
+            means[missing] = new_means
+            intervals[missing] = new_intervals
+            for j, i in enumerate(missing):
+                cache.put(keys[i], (new_means[j], tuple(new_intervals[j])))
+        return means, intervals
 
+    def _summarize(self, predictions: np.ndarray):
+        """Rounded mean and 5/95 percentile interval of per-tree predictions, per row."""
+        return (
+            np.round(predictions.mean(axis=1), 2),
+            np.round(np.percentile(predictions, [5, 95], axis=1).T, 2)
+        )
+
+    @timed("yield_predict")
     def predict_yield(self, crop_name: str, conditions: Dict) -> Dict:
         """
         Predict crop yield based on given conditions.
@@ -187,97 +328,273 @@ class YieldEstimator:
         Returns:
             Dictionary with predicted yield and confidence interval
         """
-        crop_name = crop_name.lower()
+        result = self.predict_yield_batch(crop_name, [conditions])
+        if 'error' in result:
+            return result
         
-        if crop_name not in self.models:
+        if 0 in result['errors']:
             return {
-                'error': 'Crop model not available',
+                'error': 'Error processing input data',
                 'estimated_yield': None,
                 'confidence_interval': None
             }
-            
-        features = self._preprocess_input(conditions, crop_name)
-        if features is None:
+        
+        return {
+            'estimated_yield': result['estimated_yield'][0],
+            'confidence_interval': list(result['confidence_interval'][0]),
+            'unit': result['unit']
+        }
+
+    def predict_yield_batch(self, crop_name: str, conditions_list: List[Dict]) -> Dict:
+        """
+        Predict crop yield for many sets of conditions in one pass over the forest.
+        
+        Args:
+            crop_name: Name of the crop
+            conditions_list: List of dictionaries containing environmental conditions
+        
+        Returns:
+            Dictionary with 'estimated_yield' (n,) and 'confidence_interval' (n, 2)
+            arrays, plus 'errors' mapping the index of every row that could not be
+            processed to a message; those rows are NaN in the arrays
+        """
+        crop_name = crop_name.lower()
+        
+        entry = self.model_store.get(crop_name)
+        if entry is None:
             return {
-                'error': 'Error processing input data',
+                'error': 'Crop model not available',
                 'estimated_yield': None,
                 'confidence_interval': None
             }
-            
+        
+        # Build one feature matrix for all rows
+        n_rows = len(conditions_list)
+        features = np.full((n_rows, len(FEATURE_COLUMNS)), np.nan)
+        errors = {}
+        for i, conditions in enumerate(conditions_list):
+            try:
+                features[i] = self._feature_row(conditions)
+            except Exception as e:
+                errors[i] = f'Error processing input data: {str(e)}'
+        valid = np.ones(n_rows, dtype=bool)
+        valid[list(errors)] = False
+        
+        estimated_yield = np.full(n_rows, np.nan)
+        confidence_interval = np.full((n_rows, 2), np.nan)
+        if valid.any():
+            try:
+                # Means and confidence intervals over all trees, per row
+                estimated_yield[valid], confidence_interval[valid] = self._predict_rows(
+                    crop_name, entry, features[valid]
+                )
+            except Exception as e:
+                return {
+                    'error': f'Error making prediction: {str(e)}',
+                    'estimated_yield': None,
+                    'confidence_interval': None
+                }
+        
+        return {
+            'estimated_yield': estimated_yield,
+            'confidence_interval': confidence_interval,
+            'unit': 'quintals per hectare',
+            'errors': errors
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Persistent pool for per-crop inference; tree prediction releases the GIL."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    workers = int(os.getenv("YIELD_INFERENCE_THREADS", min(8, os.cpu_count() or 1)))
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yield-inference")
+        return self._executor
+
+    def _predict_features(self, crop_name: str, features: np.ndarray) -> Dict:
+        """Predict one crop for an already built feature matrix."""
+        entry = self.model_store.get(crop_name)
+        if entry is None:
+            return {'error': 'Crop model not available', 'estimated_yield': None, 'confidence_interval': None}
         try:
-            # Get predictions from all trees in the forest
-            predictions = [tree.predict(features)[0] 
-                         for tree in self.models[crop_name].estimators_]
-            
-            # Calculate mean and confidence interval
-            mean_yield = np.mean(predictions)
-            confidence_interval = np.percentile(predictions, [5, 95])
-            
-            return {
-                'estimated_yield': round(mean_yield, 2),
-                'confidence_interval': [round(ci, 2) for ci in confidence_interval],
-                'unit': 'quintals per hectare'
-            }
-            
+            means, intervals = self._predict_rows(crop_name, entry, features)
         except Exception as e:
-            return {
-                'error': f'Error making prediction: {str(e)}',
-                'estimated_yield': None,
-                'confidence_interval': None
-            }
+            return {'error': f'Error making prediction: {str(e)}', 'estimated_yield': None, 'confidence_interval': None}
+        return {
+            'estimated_yield': means[0],
+            'confidence_interval': list(intervals[0]),
+            'unit': 'quintals per hectare'
+        }
+
+    @timed("yield_predict_all")
+    def predict_all_crops(self, conditions: Dict, crop_names: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Predict yields for many crops under the same conditions.
+        
+        The conditions are converted to features once, then each crop's forest
+        runs on the shared inference pool.
+        
+        Args:
+            conditions: Dictionary containing environmental conditions
+            crop_names: Crops to predict; defaults to every crop with a model
+        
+        Returns:
+            List of dictionaries with 'crop_name', 'estimated_yield' and
+            'confidence_interval', ranked by estimated yield, highest first.
+            Crops without a prediction rank as zero yield; ties keep input order.
+        """
+        if crop_names is None:
+            crop_names = self.model_store.crops()
+        crop_names = list(dict.fromkeys(crop_names))
+        
+        try:
+            features = np.array([self._feature_row(conditions)])
+        except Exception as e:
+            error = f'Error processing input data: {str(e)}'
+            return [
+                {'crop_name': name, 'error': error, 'estimated_yield': None, 'confidence_interval': None}
+                for name in crop_names
+            ]
+        
+        executor = self._get_executor()
+        futures = [executor.submit(self._predict_features, name.lower(), features) for name in crop_names]
+        results = [{'crop_name': name, **future.result()} for name, future in zip(crop_names, futures)]
+        
+        results.sort(key=lambda x: x['estimated_yield'] or 0, reverse=True)
+        return results
 
-    def update_model(self, crop_name: str, new_data: Dict[str, List]):
+    def update_model(self, crop_name: str, new_data: Dict[str, List], wait: bool = False) -> bool:
         """
         Update model with new training data.
         
+        The data is appended to the crop's observation log and the model is
+        retrained in the background; predictions keep using the current
+        model until the new version is swapped in.
+        
         Args:
             crop_name: Name of the crop
             new_data: Dictionary containing 'features' and 'yields' lists
+            wait: Block until the retrained model is serving
+        
+        Returns:
+            True if the data was recorded (and, with wait, the retrain succeeded)
         """
         crop_name = crop_name.lower()
+        if not self.is_known_crop(crop_name):
+            print(f"Error updating model: unknown crop {crop_name!r}")
+            return False
+        
+        try:
+            self.observation_log.append(crop_name, new_data['features'], new_data['yields'])
+        except Exception as e:
+            print(f"Error updating model: {e}")
+            return False
+        
+        future = self.schedule_retrain(crop_name)
+        return future.result() if wait else True
+
+    def record_observations(self, crop_name: str, observations: List[Dict]) -> Future:
+        """
+        Log observed yields under the given conditions and schedule a retrain.
+        
+        Args:
+            crop_name: Name of the crop
+            observations: Condition dictionaries, each with the observed 'yield'
+        
+        Returns:
+            Future resolving to True once the retrained model is serving
+        
+        Raises:
+            ValueError: If the crop has neither a model nor a catalog entry
+        """
+        crop_name = crop_name.lower()
+        if not self.is_known_crop(crop_name):
+            raise ValueError(f"Unknown crop: {crop_name}")
+        features = [self._feature_row(observation) for observation in observations]
+        yields = [float(observation['yield']) for observation in observations]
+        self.observation_log.append(crop_name, features, yields)
+        return self.schedule_retrain(crop_name)
+
+    def is_known_crop(self, crop_name: str) -> bool:
+        """Whether a crop has a model on disk or an entry in the crop catalog."""
+        crop_name = crop_name.lower()
+        if not valid_crop_name(crop_name):
+            return False
+        known = self._known_crops
+        if known is None:
+            # Listing the model directory and reading the catalog is too slow for every request
+            known = self._known_crops = frozenset(self.model_store.crops()) | frozenset(self._load_crop_params())
+        return crop_name in known
+
+    def invalidate_known_crops(self):
+        """Forget the cached set of known crops after models or the crop catalog change."""
+        self._known_crops = None
+
+    def schedule_retrain(self, crop_name: str) -> Future:
+        """Queue a background retrain of a crop, unless one is already waiting to start."""
+        crop_name = crop_name.lower()
+        with self._retrain_lock:
+            future = self._pending_retrains.get(crop_name)
+            if future is None:
+                if self._retrain_executor is None:
+                    # One worker: retrains of a crop never race each other on its artifacts
+                    self._retrain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yield-retrain")
+                future = self._retrain_executor.submit(self._retrain, crop_name)
+                self._pending_retrains[crop_name] = future
+            return future
+
+    def _retrain(self, crop_name: str) -> bool:
+        """Train a new model version from the observation log and swap it into serving."""
+        # Observations logged from here on schedule another run
+        with self._retrain_lock:
+            self._pending_retrains.pop(crop_name, None)
         
         try:
-            X = np.array(new_data['features'])
-            y = np.array(new_data['yields'])
+            X_log, y_log = self.observation_log.read(crop_name)
+            # A private copy from disk; the serving entry is never mutated
+            existing = self.model_store.load_sklearn(crop_name)
             
-            if crop_name in self.models:
-                # Update existing model
-                scaler = self.scalers[crop_name]
-                X_scaled = scaler.transform(X)
-                self.models[crop_name].fit(X_scaled, y)
+            if (existing is not None and len(X_log)
+                    and existing[0].n_estimators + WARM_START_TREES <= self.max_trees):
+                # Grow the forest with trees fitted to the accumulated observations
+                model, scaler = existing
+                model.set_params(warm_start=True, n_estimators=model.n_estimators + WARM_START_TREES)
+                model.fit(scaler.transform(X_log), y_log)
             else:
-                # Create new model
+                # Refit from scratch on generated data plus every observation
+                from sklearn.ensemble import RandomForestRegressor
+                from sklearn.preprocessing import StandardScaler
+                params = self._load_crop_params().get(crop_name, DEFAULT_PARAMS)
+                sample = generate_crop_samples(params, SYNTHETIC_SAMPLES, _crop_rng(42, crop_name))
+                X = np.vstack([sample['features'], X_log])
+                y = np.concatenate([sample['yields'], y_log])
                 scaler = StandardScaler()
-                X_scaled = scaler.fit_transform(X)
-                model = RandomForestRegressor(n_estimators=100, random_state=42)
-                model.fit(X_scaled, y)
-                
-                self.models[crop_name] = model
-                self.scalers[crop_name] = scaler
-            
-            # Save updated model and scaler
-            model_file = os.path.join(self.model_dir, f"{crop_name}_model.joblib")
-            scaler_file = os.path.join(self.model_dir, f"{crop_name}_scaler.joblib")
-            
-            joblib.dump(self.models[crop_name], model_file)
-            joblib.dump(self.scalers[crop_name], scaler_file)
+                model = RandomForestRegressor(n_estimators=BASE_TREES, random_state=42)
+                model.fit(scaler.fit_transform(X), y)
             
+            compiled = _save_artifacts(self.model_dir, crop_name, model, scaler)
+            version = self.model_store.put(crop_name, compiled, None)
+            if self.prediction_cache is not None:
+                self.prediction_cache.invalidate(crop_name, keep_version=version)
+            logging.info(f"Serving {crop_name} yield model version {version} "
+                         f"({compiled.n_trees} trees, {len(X_log)} observations)")
             return True
             
         except Exception as e:
-            print(f"Error updating model: {e}")
+            logging.error(f"Error retraining yield model for {crop_name}: {e}")
             return False
 
     def get_yield_factors(self, crop_name: str) -> Dict:
         """Get the importance of different factors affecting yield."""
         crop_name = crop_name.lower()
         
-        if crop_name not in self.models:
+        entry = self.model_store.get(crop_name)
+        if entry is None:
             return {'error': 'Crop model not available'}
             
         try:
             # Get feature importances from the model
-            importances = self.models[crop_name].feature_importances_
+            importances = entry.model.feature_importances_
             
             # Map importances to factors
             factors = {}
@@ -292,62 +609,196 @@ class YieldEstimator:
         except Exception as e:
             return {'error': f'Error getting yield factors: {str(e)}'}
 
-    def get_optimization_suggestions(self, crop_name: str, current_conditions: Dict) -> Dict:
-        """Get suggestions for optimizing yield based on current conditions."""
+    def _optimization_grid(self, ph_step: Optional[float] = None) -> List[Dict]:
+        """Every combination of the controllable factors, as a list of {factor: value} changes."""
+        levels = {
+            'soil_fertility': list(FERTILITY_MAP),
+            'water_availability': list(FERTILITY_MAP),
+            'season': list(SEASON_MAP),
+        }
+        if ph_step:
+            ph_values = np.arange(PH_RANGE[0], PH_RANGE[1] + ph_step / 2, ph_step)
+            levels['soil_ph'] = [round(float(ph), 2) for ph in ph_values]
+        
+        factors = list(levels)
+        grid = []
+        for combination in itertools.product(*(levels[factor] for factor in factors)):
+            grid.append(dict(zip(factors, combination)))
+        return grid
+
+    def _same_level(self, factor: str, value, current_value) -> bool:
+        """Whether a grid value equals the current value of a factor."""
+        if factor == 'soil_ph':
+            try:
+                return abs(float(value) - float(current_value)) < 1e-9
+            except (TypeError, ValueError):
+                return False
+        return value == current_value
+
+    def _describe_change(self, factor: str, value, current_value) -> str:
+        """Human readable advice for changing one factor."""
+        if factor == 'soil_fertility':
+            direction = "Increase" if FERTILITY_MAP.get(value, 2) > FERTILITY_MAP.get(current_value, 2) else "Reduce"
+            return f"{direction} soil fertility to {value}"
+        if factor == 'water_availability':
+            return f"Adjust irrigation to achieve {value} water availability"
+        if factor == 'season':
+            return f"Plant in the {value} season"
+        return f"Adjust soil pH to {value}"
+
+    def get_optimization_suggestions(self, crop_name: str, current_conditions: Dict, top_k: int = 5,
+                                     ph_step: Optional[float] = None) -> Dict:
+        """
+        Get suggestions for optimizing yield based on current conditions.
+        
+        Searches the full grid of controllable factors (soil fertility, water
+        availability, season and, with ph_step, soil pH) with one batched
+        prediction and returns the best combinations.
+        
+        Args:
+            crop_name: Name of the crop
+            current_conditions: Dictionary containing environmental conditions
+            top_k: Maximum number of suggestions to return
+            ph_step: Optional pH increment for searching soil pH across PH_RANGE
+        
+        Returns:
+            Dictionary with the current yield and up to top_k suggestions,
+            sorted by potential improvement
+        """
         crop_name = crop_name.lower()
         
-        if crop_name not in self.models:
+        if crop_name not in self.model_store:
             return {'error': 'Crop model not available'}
             
         try:
-            # Get current predicted yield
-            current_yield = self.predict_yield(crop_name, current_conditions)
+            defaults = {'soil_fertility': 'medium', 'water_availability': 'medium', 'season': 'summer', 'soil_ph': 6.5}
+            current = {factor: current_conditions.get(factor, default) for factor, default in defaults.items()}
             
-            # Try variations in controllable parameters
-            suggestions = []
+            # Score the current conditions and every counterfactual in one call
+            grid = self._optimization_grid(ph_step)
+            rows = [current_conditions] + [{**current_conditions, **changes} for changes in grid]
+            result = self.predict_yield_batch(crop_name, rows)
+            if 'error' in result:
+                return {'error': result['error']}
+            if 0 in result['errors']:
+                return {'error': 'Error processing input data'}
             
-            # Test different soil fertility levels
-            for fertility in ['low', 'medium', 'high']:
-                test_conditions = current_conditions.copy()
-                test_conditions['soil_fertility'] = fertility
-                test_yield = self.predict_yield(crop_name, test_conditions)
-                
-                if test_yield['estimated_yield'] > current_yield['estimated_yield']:
-                    suggestions.append({
-                        'factor': 'soil_fertility',
-                        'suggestion': f"Increase soil fertility to {fertility}",
-                        'potential_improvement': round(
-                            test_yield['estimated_yield'] - current_yield['estimated_yield'], 2
-                        )
-                    })
+            current_yield = {
+                'estimated_yield': result['estimated_yield'][0],
+                'confidence_interval': list(result['confidence_interval'][0]),
+                'unit': result['unit']
+            }
+            gains = result['estimated_yield'][1:] - current_yield['estimated_yield']
             
-            # Test different water availability levels
-            for water in ['low', 'medium', 'high']:
-                test_conditions = current_conditions.copy()
-                test_conditions['water_availability'] = water
-                test_yield = self.predict_yield(crop_name, test_conditions)
-                
-                if test_yield['estimated_yield'] > current_yield['estimated_yield']:
-                    suggestions.append({
-                        'factor': 'water_availability',
-                        'suggestion': f"Adjust irrigation to achieve {water} water availability",
-                        'potential_improvement': round(
-                            test_yield['estimated_yield'] - current_yield['estimated_yield'], 2
-                        )
-                    })
+            suggestions = []
+            for i in np.flatnonzero(gains > 0):
+                changes = {
+                    factor: value for factor, value in grid[i].items()
+                    if not self._same_level(factor, value, current[factor])
+                }
+                suggestions.append({
+                    'factor': ", ".join(changes),
+                    'changes': changes,
+                    'suggestion': "; ".join(
+                        self._describe_change(factor, value, current[factor]) for factor, value in changes.items()
+                    ),
+                    'estimated_yield': result['estimated_yield'][i + 1],
+                    'potential_improvement': round(gains[i], 2)
+                })
+            
+            # Biggest gain first; prefer fewer changes for equal gains
+            suggestions.sort(key=lambda x: (-x['potential_improvement'], len(x['changes'])))
             
             return {
                 'current_yield': current_yield,
-                'suggestions': sorted(suggestions, 
-                                   key=lambda x: x['potential_improvement'],
-                                   reverse=True)
+                'suggestions': suggestions[:top_k]
             }
             
         except Exception as e:
             return {'error': f'Error generating optimization suggestions: {str(e)}'}
 
-# Simple test if run directly
-if __name__ == "__main__":
+def _crop_rng(seed: Optional[int], crop_name: str) -> np.random.Generator:
+    """Independent random stream per crop, so results do not depend on training order."""
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng([seed, zlib.crc32(crop_name.encode())])
+
+
+def generate_crop_samples(params: Dict, n_samples: int, rng: np.random.Generator) -> Dict:
+    """Generate random but realistic conditions and yields for one crop."""
+    temp_low, temp_high = params['temp_range']
+    rain_low, rain_high = params['rainfall_range']
+    
+    features = np.column_stack([
+        rng.uniform(temp_low, temp_high, n_samples),
+        rng.uniform(rain_low, rain_high, n_samples),
+        rng.uniform(40, 90, n_samples),              # humidity
+        rng.uniform(5.5, 7.5, n_samples),            # soil pH
+        rng.integers(1, 4, n_samples),               # soil fertility: 1=low, 2=medium, 3=high
+        rng.integers(1, 4, n_samples),               # water availability
+        rng.integers(1, 5, n_samples),               # season: 1=spring, 2=summer, 3=fall, 4=winter
+    ])
+    temp, rainfall = features[:, 0], features[:, 1]
+    
+    # Temperature and rainfall effects peak at the middle of the crop's range
+    temp_optimal = (temp_low + temp_high) / 2
+    temp_effect = 1 - np.abs(temp - temp_optimal) / temp_optimal * 0.5
+    rainfall_optimal = (rain_low + rain_high) / 2
+    rainfall_effect = 1 - np.abs(rainfall - rainfall_optimal) / rainfall_optimal * 0.5
+    
+    # Other factors
+    soil_effect = features[:, 4] / 3
+    water_effect = features[:, 5] / 3
+    
+    # Combined effect with 10% random variation
+    yields = params['base_yield'] * temp_effect * rainfall_effect * soil_effect * water_effect
+    yields *= rng.uniform(0.9, 1.1, n_samples)
+    
+    return {'features': features, 'yields': yields}
+
+
+def _atomic_dump(obj, path: str):
+    """Write a joblib artifact so readers never see a partially written file."""
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _save_artifacts(model_dir: str, crop_name: str, model, scaler) -> CompiledForest:
+    """Write a crop's sklearn model and scaler plus the compiled forest built from them."""
+    if not valid_crop_name(crop_name):
+        raise ValueError(f"Invalid crop name: {crop_name!r}")
+    os.makedirs(model_dir, exist_ok=True)
+    # The store serves a crop once both files exist, so write the scaler first
+    _atomic_dump(scaler, os.path.join(model_dir, f"{crop_name}{SCALER_SUFFIX}"))
+    _atomic_dump(model, os.path.join(model_dir, f"{crop_name}{MODEL_SUFFIX}"))
+    compiled = CompiledForest.from_sklearn(model, scaler)
+    compiled.save(os.path.join(model_dir, f"{crop_name}{COMPILED_SUFFIX}"))
+    return compiled
+
+
+def _train_crop(model_dir: str, crop_name: str, params: Dict, n_samples: int,
+                n_estimators: int, seed: int) -> str:
+    """Fit and save one crop's scaler and model; runs in a worker process."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+    
+    data = generate_crop_samples(params, n_samples, _crop_rng(seed, crop_name))
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(data['features'])
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=42)
+    model.fit(X_scaled, data['yields'])
+    
+    _save_artifacts(model_dir, crop_name, model, scaler)
+    return crop_name
+
+
+def _run_demo():
+    """Simple test of the estimator with rice."""
     estimator = YieldEstimator()
     
     # Test with rice in good conditions
@@ -371,7 +822,7 @@ if __name__ == "__main__":
         "features": [[30, 1500, 70, 6.5, 3, 3, 2]],
         "yields": [55]
     }
-    estimator.update_model("rice", new_data)
+    estimator.update_model("rice", new_data, wait=True)
     print("Model updated with new data.")
     
     # Test getting yield factors
@@ -380,4 +831,35 @@ if __name__ == "__main__":
     
     # Test getting optimization suggestions
     suggestions = estimator.get_optimization_suggestions("rice", conditions)
-    print(f"Optimization suggestions: {suggestions}")
\ No newline at end of file
+    print(f"Optimization suggestions: {suggestions}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Agri Wiz yield estimation models")
+    parser.add_argument("--model-dir", default="data/processed/models", help="Directory for model artifacts")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    train = subparsers.add_parser("train-all", help="Train every crop's model in parallel")
+    train.add_argument("--crops", nargs="+", help="Only train these crops")
+    train.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    train.add_argument("--samples", type=int, default=1000, help="Generated samples per crop")
+    train.add_argument("--trees", type=int, default=100, help="Trees per forest")
+    train.add_argument("--seed", type=int, default=42, help="Seed for the generated data")
+    
+    compile_parser = subparsers.add_parser("compile-models", help="Export sklearn models to compiled forests")
+    compile_parser.add_argument("--crops", nargs="+", help="Only compile these crops")
+    
+    args = parser.parse_args(argv)
+    if args.command == "train-all":
+        estimator = YieldEstimator(model_dir=args.model_dir)
+        trained = estimator.train_all(args.crops, n_samples=args.samples, n_estimators=args.trees,
+                                      seed=args.seed, workers=args.workers)
+        print(f"Trained {len(trained)} crop models in {args.model_dir}")
+    elif args.command == "compile-models":
+        compiled = YieldEstimator(model_dir=args.model_dir).compile_models(args.crops)
+        print(f"Compiled {len(compiled)} crop models in {args.model_dir}")
+    else:
+        _run_demo()
+
+
+if __name__ == "__main__":
+    main()